@@ -18,11 +18,17 @@
 """Example DAG demonstrating the usage of dynamic task mapping."""
 from __future__ import annotations
 
+import functools
+import inspect
 import logging
+import os
+import re
 from datetime import datetime, timedelta
 
 from airflow import DAG
 from airflow.decorators import task
+from airflow.operators.python import get_current_context
+from dotenv import load_dotenv
 from github.github_api_helpers import (
     extract_linked_issues_from_pr,
     fetch_commit_files,
@@ -40,9 +46,19 @@ from github.github_api_helpers import (
     get_all_repo_labels,
     get_all_repo_review_comments,
     get_all_reviews_of_pull_request,
+    map_in_threads,
+    raise_failed_results,
+)
+from github.metrics import (
+    GitHubETLMetrics,
+    export_metrics,
+    summarize_run_metrics,
 )
 from github.neo4j_storage import (
+    BulkImportStager,
     get_orgs_profile_from_neo4j,
+    is_bulk_import_enabled,
+    load_bulk_import_files,
     save_comment_to_neo4j,
     save_commit_files_changes_to_neo4j,
     save_commit_to_neo4j,
@@ -58,6 +74,26 @@ from github.neo4j_storage import (
     save_review_comment_to_neo4j,
     save_review_to_neo4j,
 )
+from github.scheduling import order_repos_by_expected_work
+from github.staging import (
+    cleanup_staged_runs,
+    is_xcom_staging_enabled,
+    resolve_staged_data,
+    stage_task_output,
+)
+
+load_dotenv()
+
+# `fused` streams each entity of a repo from extract to load within one task,
+# `debug` keeps a separate task for each of the extract, transform and load
+GITHUB_DAG_MODE = os.getenv("GITHUB_DAG_MODE", "debug")
+
+# the tasks calling the github api run in a pool sized to the proxy capacity
+# and each of the repo tasks can have a limited number of running mapped instances
+GITHUB_API_TASK_ARGS = {
+    "pool": os.getenv("GITHUB_API_POOL") or "default_pool",
+    "max_active_tis_per_dagrun": int(os.getenv("GITHUB_MAX_ACTIVE_REPO_TASKS") or "16"),
+}
 
 with DAG(
     dag_id="github_functionality",
@@ -66,6 +102,131 @@ with DAG(
     catchup=False,
 ) as dag:
 
+    def get_run_dir() -> str:
+        # the run id is used in file urls of `LOAD CSV`, so keeping it url safe
+        return re.sub(r"[^A-Za-z0-9_-]", "_", get_current_context()["run_id"])
+
+    def get_task_instance_prefix() -> str:
+        task_instance = get_current_context()["ti"]
+        return re.sub(
+            r"[^A-Za-z0-9_-]",
+            "_",
+            f"{task_instance.task_id}_{task_instance.map_index}",
+        )
+
+    def get_bulk_import_stager() -> BulkImportStager:
+        return BulkImportStager(
+            run_dir=get_run_dir(), prefix=get_task_instance_prefix()
+        )
+
+    def with_metrics(func):
+        """
+        record the metrics of the github api calls and neo4j writes of the task
+        and export them at the end of it
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            repo_name = ""
+            for value in [*args, *kwargs.values()]:
+                if isinstance(value, dict) and isinstance(value.get("repo"), dict):
+                    repo_name = value["repo"].get("full_name", "")
+                    break
+
+            metrics = GitHubETLMetrics()
+            metrics.reset()
+            metrics.set_context(
+                task=get_current_context()["ti"].task_id, repo=repo_name
+            )
+            try:
+                return func(*args, **kwargs)
+            finally:
+                export_metrics(run_dir=get_run_dir(), prefix=get_task_instance_prefix())
+
+        return wrapper
+
+    def staged(func):
+        """
+        pass the task data through staged files, so just a small reference
+        of them would be saved in xcom
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            args = [resolve_staged_data(arg) for arg in args]
+            kwargs = {key: resolve_staged_data(value) for key, value in kwargs.items()}
+            output = with_metrics(func)(*args, **kwargs)
+
+            if not is_xcom_staging_enabled():
+                return output
+
+            return stage_task_output(
+                output,
+                inputs=[*args, *kwargs.values()],
+                run_dir=get_run_dir(),
+                prefix=get_task_instance_prefix(),
+            )
+
+        return wrapper
+
+    def fuse(
+        task_id: str,
+        stages: list,
+        source=None,
+        batch_key: str | None = None,
+    ):
+        """
+        create a task running the given tasks one after another within one process
+
+        Parameters
+        ------------
+        task_id : str
+            the id of the fused task
+        stages : list
+            the extract, transform and load tasks to run for the data
+        source : Any
+            the task fetching the data to be streamed through the stages
+            if not given, the task input is used
+        batch_key : str | None
+            the key of the data items to stream through the stages batch by batch
+            if not given, the whole data goes through the stages at once
+        """
+        source_function = inspect.unwrap(source.function) if source else None
+        functions = [inspect.unwrap(stage.function) for stage in stages]
+
+        @task(task_id=task_id, **GITHUB_API_TASK_ARGS)
+        def fused_task(data):
+            return with_metrics(run_stages)(resolve_staged_data(data))
+
+        def run_stages(data):
+            if source_function is not None:
+                data = source_function(data)
+
+            if batch_key is None:
+                for function in functions:
+                    data = function(data)
+                return data
+
+            batch_size = int(os.getenv("GITHUB_FUSED_BATCH_SIZE") or "50")
+            items = data[batch_key]
+            for idx in range(0, len(items), batch_size):
+                logging.info(
+                    f"Streaming {batch_key} {idx + 1}-"
+                    f"{min(idx + batch_size, len(items))}/{len(items)}"
+                )
+                batch = {**data, batch_key: items[idx : idx + batch_size]}
+                for function in functions:
+                    batch = function(batch)
+
+            # just the identifiers are passed to the next tasks
+            references = [
+                {key: item[key] for key in ["id", "number", "sha"] if key in item}
+                for item in items
+            ]
+            return {**data, batch_key: references}
+
+        return fused_task
+
     @task
     def get_all_organization():
         orgs = get_orgs_profile_from_neo4j()
@@ -92,7 +253,8 @@ with DAG(
         # return orgs
 
     # region organization ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_github_organization(organization):
         logging.info(f"All data from last stage: {organization}")
         organization_name = organization["name"]
@@ -101,11 +263,13 @@ with DAG(
         return {"organization_basic": organization, "organization_info": org_info}
 
     @task
+    @staged
     def transform_github_organization(organization):
         logging.info(f"All data from last stage: {organization}")
         return organization
 
     @task
+    @staged
     def load_github_organization(organization):
         logging.info(f"All data from last stage: {organization}")
         organization_info = organization["organization_info"]
@@ -116,7 +280,8 @@ with DAG(
     # endregion
 
     # region organization members ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_github_organization_members(organization):
         logging.info(f"All data from last stage: {organization}")
         organization_name = organization["organization_basic"]["name"]
@@ -125,11 +290,13 @@ with DAG(
         return {"organization_members": members, **organization}
 
     @task
+    @staged
     def transform_github_organization_members(data):
         logging.info(f"All data from last stage: {data}")
         return data
 
     @task
+    @staged
     def load_github_organization_members(data):
         members = data["organization_members"]
         org_id = data["organization_info"]["id"]
@@ -142,7 +309,8 @@ with DAG(
     # endregion
 
     # region github repos ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_github_repos(organizations):
         all_repos = []
         for i, organization in enumerate(organizations):
@@ -154,15 +322,18 @@ with DAG(
 
             all_repos.extend(repos)
 
-        return all_repos
+        # the mapped tasks of the busiest repos are scheduled first
+        return order_repos_by_expected_work(all_repos)
 
     @task
+    @staged
     def transform_github_repos(repo):
         logging.info("Just passing through github repos")
 
         return repo
 
     @task
+    @staged
     def load_github_repos(repo):
         repo = repo["repo"]
 
@@ -172,7 +343,8 @@ with DAG(
     # endregion
 
     # region pull requests ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_pull_requests(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
@@ -182,31 +354,38 @@ with DAG(
         new_data = {"prs": prs, **data}
         return new_data
 
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_pull_request_linked_issues(data):
         repo = data["repo"]
         prs = data["prs"]
         owner = repo["owner"]["login"]
         repo_name = repo["name"]
 
+        results = map_in_threads(
+            lambda pr: extract_linked_issues_from_pr(
+                owner=owner, repo=repo_name, pull_number=pr["number"]
+            ),
+            prs,
+            description="PRs linked issues",
+        )
+        raise_failed_results(results, description="PRs linked issues")
         new_prs = []
-        for i, pr in enumerate(prs):
-            logging.info(f"Processing iter {i + 1}/{len(prs)}")
-            pr_number = pr["number"]
-            linked_issues = extract_linked_issues_from_pr(
-                owner=owner, repo=repo_name, pull_number=pr_number
-            )
-            new_prs.append({**pr, "linked_issues": linked_issues})
+        for result in results:
+            linked_issues = result.value if result.error is None else []
+            new_prs.append({**result.item, "linked_issues": linked_issues})
 
         new_data = {**data, "prs": new_prs}
         return new_data
 
     @task
+    @staged
     def transform_pull_requests(data):
         logging.info("Just passing throught PRs for now!")
         return data
 
     @task
+    @staged
     def load_pull_requests(data):
         prs = data["prs"]
         repository_id = data["repo"]["id"]
@@ -219,33 +398,51 @@ with DAG(
     # endregion
 
     # region pull request files changes ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_pull_request_files_changes(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
         repo_name = repo["name"]
         prs = data["prs"]
 
-        pr_files_changes = {}
-        for i, pr in enumerate(prs):
-            logging.info(f"Iteration {i + 1}/{len(prs)}")
-            files_changes = get_all_pull_request_files(
+        results = map_in_threads(
+            lambda pr: get_all_pull_request_files(
                 owner=owner, repo=repo_name, pull_number=pr.get("number", None)
-            )
-            pr_files_changes[pr["id"]] = files_changes
+            ),
+            prs,
+            description="PRs files changes",
+        )
+        raise_failed_results(results, description="PRs files changes")
+        pr_files_changes = {
+            result.item["id"]: result.value
+            for result in results
+            if result.error is None
+        }
 
         return {"pr_files_changes": pr_files_changes, **data}
 
     @task
+    @staged
     def transform_pull_request_files_changes(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_pull_request_files_changes(data):
         pr_files_changes = data["pr_files_changes"]
         repository_id = data["repo"]["id"]
 
+        if is_bulk_import_enabled():
+            stager = get_bulk_import_stager()
+            for pr_id, files_changes in pr_files_changes.items():
+                stager.stage_pr_files_changes(
+                    pr_id=pr_id, repository_id=repository_id, file_changes=files_changes
+                )
+            stager.close()
+            return data
+
         for idx, (pr_id, files_changes) in enumerate(pr_files_changes.items()):
             logging.info(f"Iteration {idx + 1}/{len(pr_files_changes)}")
             save_pr_files_changes_to_neo4j(
@@ -257,32 +454,49 @@ with DAG(
     # endregion
 
     # region pr review ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_pr_review(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
         repo_name = repo["name"]
         prs = data["prs"]
 
-        pr_reviews = {}
-        for i, pr in enumerate(prs):
-            logging.info(f"Iteration {i}/{len(prs)}")
-            reviews = get_all_reviews_of_pull_request(
+        results = map_in_threads(
+            lambda pr: get_all_reviews_of_pull_request(
                 owner=owner, repo=repo_name, pull_number=pr.get("number", None)
-            )
-            pr_reviews[pr["id"]] = reviews
+            ),
+            prs,
+            description="PRs reviews",
+        )
+        raise_failed_results(results, description="PRs reviews")
+        pr_reviews = {
+            result.item["id"]: result.value
+            for result in results
+            if result.error is None
+        }
 
         return {"pr_reviews": pr_reviews, **data}
 
     @task
+    @staged
     def transform_pr_review(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_pr_review(data):
         pr_reviews = data["pr_reviews"]
 
+        if is_bulk_import_enabled():
+            stager = get_bulk_import_stager()
+            for pr_id, reviews in pr_reviews.items():
+                for review in reviews:
+                    stager.stage_review(pr_id=pr_id, review=review)
+            stager.close()
+            return data
+
         for idx, (pr_id, reviews) in enumerate(pr_reviews.items()):
             logging.info(f"Iteration {idx + 1}/{len(pr_reviews)}")
             for review in reviews:
@@ -294,7 +508,8 @@ with DAG(
 
     # region pr review comment ETL
 
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_pr_review_comments(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
@@ -304,11 +519,13 @@ with DAG(
         return {"review_comments": review_comments, **data}
 
     @task
+    @staged
     def transform_pr_review_comments(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_pr_review_comments(data):
         review_comments = data["review_comments"]
         repository_id = data["repo"]["id"]
@@ -324,7 +541,8 @@ with DAG(
     # endregion
 
     # region pr & issue comments ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_pr_issue_comments(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
@@ -333,27 +551,31 @@ with DAG(
         comments = get_all_repo_issues_and_prs_comments(owner=owner, repo=repo_name)
         return {"comments": comments, **data}
 
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_pr_issue_comments_reactions_member(data):
         comments = data["comments"]
         repo = data["repo"]
         owner = repo["owner"]["login"]
         repo_name = repo["name"]
 
+        new_comments = []
         for comment in comments:
             reactions = get_all_comment_reactions(
                 owner=owner, repo=repo_name, comment_id=comment.get("id", None)
             )
-            comment["reactions_member"] = reactions
+            new_comments.append({**comment, "reactions_member": reactions})
 
-        return {"comments": comments, **data}
+        return {**data, "comments": new_comments}
 
     @task
+    @staged
     def transform_pr_issue_comments(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_pr_issue_comments(data):
         comments = data["comments"]
         repository_id = data["repo"]["id"]
@@ -366,7 +588,8 @@ with DAG(
     # endregion
 
     # region repo contributors ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_repo_contributors(data):
         repo = data["repo"]
         repo_name = repo["name"]
@@ -376,15 +599,26 @@ with DAG(
         return {"contributors": contributors, **data}
 
     @task
+    @staged
     def transform_repo_contributors(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_repo_contributors(data):
         contributors = data["contributors"]
         repository_id = data["repo"]["id"]
 
+        if is_bulk_import_enabled():
+            stager = get_bulk_import_stager()
+            for contributor in contributors:
+                stager.stage_repo_contributor(
+                    contributor=contributor, repository_id=repository_id
+                )
+            stager.close()
+            return data
+
         for i, contributor in enumerate(contributors):
             logging.info(f"Iteration {i + 1}/{len(contributors)}")
             save_repo_contributors_to_neo4j(
@@ -396,7 +630,8 @@ with DAG(
     # endregion
 
     # region issues ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_issues(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
@@ -406,11 +641,13 @@ with DAG(
         return {"issues": issues, **data}
 
     @task
+    @staged
     def transform_issues(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_issues(data):
         issues = data["issues"]
         repository_id = data["repo"]["id"]
@@ -424,7 +661,8 @@ with DAG(
     # endregion
 
     # region labels ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_labels(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
@@ -434,14 +672,23 @@ with DAG(
         return {"labels": labels, **data}
 
     @task
+    @staged
     def transform_labels(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_labels(data):
         labels = data["labels"]
 
+        if is_bulk_import_enabled():
+            stager = get_bulk_import_stager()
+            for label in labels:
+                stager.stage_label(label=label)
+            stager.close()
+            return data
+
         for i, label in enumerate(labels):
             logging.info(f"Iteration {i + 1}/{len(labels)}")
             save_label_to_neo4j(label=label)
@@ -451,7 +698,8 @@ with DAG(
     # endregion
 
     # region commits ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_commits(data):
         repo = data["repo"]
         owner = repo["owner"]["login"]
@@ -461,15 +709,24 @@ with DAG(
         return {"commits": commits, **data}
 
     @task
+    @staged
     def transform_commits(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_commits(data):
         commits = data["commits"]
         repository_id = data["repo"]["id"]
 
+        if is_bulk_import_enabled():
+            stager = get_bulk_import_stager()
+            for commit in commits:
+                stager.stage_commit(commit=commit, repository_id=repository_id)
+            stager.close()
+            return data
+
         for i, commit in enumerate(commits):
             logging.info(f"Iteration {i + 1}/{len(commits)}")
             save_commit_to_neo4j(commit=commit, repository_id=repository_id)
@@ -479,23 +736,31 @@ with DAG(
     # endregion
 
     # region of pull requests for commit
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_commit_pull_requests(data):
         commits = data["commits"]
-        commit_prs = {}
-        for i, commit in enumerate(commits):
-            logging.info(f"Iteration {i + 1}/{len(commits)}")
-            repo = data["repo"]
-            owner = repo["owner"]["login"]
-            repo_name = repo["name"]
+        repo = data["repo"]
+        owner = repo["owner"]["login"]
+        repo_name = repo["name"]
 
-            prs = fetch_commit_pull_requests(owner, repo_name, commit["sha"])
-            commit_prs[commit["sha"]] = prs
+        results = map_in_threads(
+            lambda commit: fetch_commit_pull_requests(owner, repo_name, commit["sha"]),
+            commits,
+            description="commits PRs",
+        )
+        raise_failed_results(results, description="commits PRs")
+        commit_prs = {
+            result.item["sha"]: result.value
+            for result in results
+            if result.error is None
+        }
 
         new_data = {**data, "commit_prs": commit_prs}
         return new_data
 
     @task
+    @staged
     def load_commit_pull_requests(data):
         commit_prs: dict = data["commit_prs"]
         repo_id = data["repo"]["id"]
@@ -509,7 +774,8 @@ with DAG(
     # endregion
 
     # region commits files changes ETL
-    @task
+    @task(**GITHUB_API_TASK_ARGS)
+    @staged
     def extract_commits_files_changes(data):
         logging.info(f"All data from last stage: {data}")
         repo = data["repo"]
@@ -517,25 +783,45 @@ with DAG(
         repo_name = repo["name"]
         commits = data["commits"]
 
-        commits_files_changes = {}
-        for i, commit in enumerate(commits):
-            logging.info(f"Iteration {i + 1}/{len(commits)}")
-            sha = commit["sha"]
-            files_changes = fetch_commit_files(owner=owner, repo=repo_name, sha=sha)
-            commits_files_changes[sha] = files_changes
+        results = map_in_threads(
+            lambda commit: fetch_commit_files(
+                owner=owner, repo=repo_name, sha=commit["sha"]
+            ),
+            commits,
+            description="commits files changes",
+        )
+        raise_failed_results(results, description="commits files changes")
+        commits_files_changes = {
+            result.item["sha"]: result.value
+            for result in results
+            if result.error is None
+        }
 
         return {"commits_files_changes": commits_files_changes, **data}
 
     @task
+    @staged
     def transform_commits_files_changes(data):
         logging.info("Just passing through the data for now!")
         return data
 
     @task
+    @staged
     def load_commits_files_changes(data):
         commits_files_changes = data["commits_files_changes"]
         repository_id = data["repo"]["id"]
 
+        if is_bulk_import_enabled():
+            stager = get_bulk_import_stager()
+            for sha, files_changes in commits_files_changes.items():
+                stager.stage_commit_files_changes(
+                    commit_sha=sha,
+                    repository_id=repository_id,
+                    file_changes=files_changes,
+                )
+            stager.close()
+            return data
+
         for idx, (sha, files_changes) in enumerate(commits_files_changes.items()):
             logging.info(f"Iteration {idx + 1}/{len(commits_files_changes)}")
             save_commit_files_changes_to_neo4j(
@@ -546,96 +832,269 @@ with DAG(
 
     # endregion
 
+    # region bulk import
+    @task
+    def load_bulk_import():
+        if not is_bulk_import_enabled():
+            logging.info("Bulk import is disabled, the entities are already saved!")
+            return
+
+        load_bulk_import_files(run_dir=get_run_dir())
+
+    # endregion
+
+    # region metrics
+    @task(trigger_rule="all_done")
+    def summarize_metrics():
+        if not os.getenv("GITHUB_METRICS_DIR"):
+            logging.info("GITHUB_METRICS_DIR is not set, no metrics to summarize!")
+            return
+
+        summary = summarize_run_metrics(run_dir=get_run_dir())
+        for task_id, task_metrics in summary.items():
+            logging.info(f"Metrics of task {task_id}: {task_metrics}")
+        return summary
+
+    # endregion
+
+    # region xcom staging
+    @task
+    def cleanup_xcom_staging():
+        if not is_xcom_staging_enabled():
+            logging.info("XCom staging is disabled, nothing to clean up!")
+            return
+
+        retention_days = int(os.getenv("GITHUB_XCOM_STAGING_RETENTION_DAYS") or "7")
+        cleanup_staged_runs(retention_days=retention_days)
+
+    # endregion
+
     orgs = get_all_organization()
-    orgs_info = extract_github_organization.expand(organization=orgs)
-    transform_orgs = transform_github_organization.expand(organization=orgs_info)
-    load_orgs = load_github_organization.expand(organization=transform_orgs)
-
-    orgs_members = extract_github_organization_members.expand(organization=orgs_info)
-    transform_orgs_members = transform_github_organization_members.expand(
-        data=orgs_members
-    )
-    load_orgs_members = load_github_organization_members.expand(
-        data=transform_orgs_members
-    )
-    load_orgs >> load_orgs_members
-
-    repos = extract_github_repos(organizations=orgs_info)
-    transform_repos = transform_github_repos.expand(repo=repos)
-    load_repos = load_github_repos.expand(repo=transform_repos)
-    load_orgs >> load_repos
-
-    contributors = extract_repo_contributors.expand(data=repos)
-    transform_contributors = transform_repo_contributors.expand(data=contributors)
-    load_contributors = load_repo_contributors.expand(data=transform_contributors)
-    load_repos >> load_contributors
-
-    labels = extract_labels.expand(data=repos)
-    transform_label = transform_labels.expand(data=labels)
-    load_label = load_labels.expand(data=transform_label)
-
-    issues = extract_issues.expand(data=repos)
-    transform_issue = transform_issues.expand(data=issues)
-    load_issue = load_issues.expand(data=transform_issue)
-    load_contributors >> load_issue
-    load_label >> load_issue
-
-    prs = extract_pull_requests.expand(data=repos)
-    prs_linked_issues = extract_pull_request_linked_issues.expand(data=prs)
-    transform_prs = transform_pull_requests.expand(data=prs_linked_issues)
-    load_prs = load_pull_requests.expand(data=transform_prs)
-    load_contributors >> load_prs
-    load_label >> load_prs
-    load_issue >> load_prs
-
-    pr_files_changes = extract_pull_request_files_changes.expand(data=prs)
-    transform_pr_files_changes = transform_pull_request_files_changes.expand(
-        data=pr_files_changes
-    )
-    load_pr_files_changes = load_pull_request_files_changes.expand(
-        data=transform_pr_files_changes
-    )
-
-    pr_reviews = extract_pr_review.expand(data=prs)
-    transform_pr_review = transform_pr_review.expand(data=pr_reviews)
-    load_pr_review = load_pr_review.expand(data=transform_pr_review)
-
-    pr_review_comments = extract_pr_review_comments.expand(data=prs)
-    transformed_pr_review_comments = transform_pr_review_comments.expand(
-        data=pr_review_comments
-    )
-    load_pr_review_comments = load_pr_review_comments.expand(
-        data=transformed_pr_review_comments
-    )
-    load_prs >> load_pr_review_comments
-
-    pr_issue_comments = extract_pr_issue_comments.expand(data=prs)
-    pr_issue_comments_with_reactions_member = (
-        extract_pr_issue_comments_reactions_member.expand(data=pr_issue_comments)
-    )
-    transformed_pr_issue_comments = transform_pr_issue_comments.expand(
-        data=pr_issue_comments_with_reactions_member
-    )
-    loaded_pr_issue_comments = load_pr_issue_comments.expand(
-        data=transformed_pr_issue_comments
-    )
-    load_prs >> loaded_pr_issue_comments
-    load_issue >> loaded_pr_issue_comments
-
-    commits = extract_commits.expand(data=repos)
-    commits_transformed = transform_commits.expand(data=commits)
-    load_commit = load_commits.expand(data=commits_transformed)
-
-    commit_prs = extract_commit_pull_requests.expand(data=commits_transformed)
-    load_commit_prs = load_commit_pull_requests.expand(data=commit_prs)
-    commit_prs >> load_commit_prs
-
-    commits_files_changes = extract_commits_files_changes.expand(data=commits)
-    transform_commits_files_changes = transform_commits_files_changes.expand(
-        data=commits_files_changes
-    )
-    load_commits_files_changes = load_commits_files_changes.expand(
-        data=transform_commits_files_changes
-    )
-    load_commit >> load_commits_files_changes
-    load_pr_files_changes >> load_commits_files_changes
+
+    if GITHUB_DAG_MODE == "fused":
+        orgs_info = fuse(
+            "etl_github_organization",
+            source=extract_github_organization,
+            stages=[transform_github_organization, load_github_organization],
+        ).expand(data=orgs)
+
+        load_orgs_members = fuse(
+            "etl_github_organization_members",
+            source=extract_github_organization_members,
+            stages=[
+                transform_github_organization_members,
+                load_github_organization_members,
+            ],
+            batch_key="organization_members",
+        ).expand(data=orgs_info)
+
+        repos = extract_github_repos(organizations=orgs_info)
+        load_repos = load_github_repos.expand(repo=repos)
+
+        load_contributors = fuse(
+            "etl_repo_contributors",
+            source=extract_repo_contributors,
+            stages=[transform_repo_contributors, load_repo_contributors],
+            batch_key="contributors",
+        ).expand(data=repos)
+        load_repos >> load_contributors
+
+        load_label = fuse(
+            "etl_labels",
+            source=extract_labels,
+            stages=[transform_labels, load_labels],
+            batch_key="labels",
+        ).expand(data=repos)
+
+        load_issue = fuse(
+            "etl_issues",
+            source=extract_issues,
+            stages=[transform_issues, load_issues],
+            batch_key="issues",
+        ).expand(data=repos)
+        load_contributors >> load_issue
+        load_label >> load_issue
+
+        load_prs = fuse(
+            "etl_pull_requests",
+            source=extract_pull_requests,
+            stages=[
+                extract_pull_request_linked_issues,
+                transform_pull_requests,
+                load_pull_requests,
+            ],
+            batch_key="prs",
+        ).expand(data=repos)
+        load_contributors >> load_prs
+        load_label >> load_prs
+        load_issue >> load_prs
+
+        load_pr_files_changes = fuse(
+            "etl_pull_request_files_changes",
+            stages=[
+                extract_pull_request_files_changes,
+                transform_pull_request_files_changes,
+                load_pull_request_files_changes,
+            ],
+            batch_key="prs",
+        ).expand(data=load_prs)
+
+        load_pr_review = fuse(
+            "etl_pr_review",
+            stages=[extract_pr_review, transform_pr_review, load_pr_review],
+            batch_key="prs",
+        ).expand(data=load_prs)
+
+        load_pr_review_comments = fuse(
+            "etl_pr_review_comments",
+            source=extract_pr_review_comments,
+            stages=[transform_pr_review_comments, load_pr_review_comments],
+            batch_key="review_comments",
+        ).expand(data=load_prs)
+
+        loaded_pr_issue_comments = fuse(
+            "etl_pr_issue_comments",
+            source=extract_pr_issue_comments,
+            stages=[
+                extract_pr_issue_comments_reactions_member,
+                transform_pr_issue_comments,
+                load_pr_issue_comments,
+            ],
+            batch_key="comments",
+        ).expand(data=load_prs)
+        load_issue >> loaded_pr_issue_comments
+
+        load_commit = fuse(
+            "etl_commits",
+            source=extract_commits,
+            stages=[transform_commits, load_commits],
+            batch_key="commits",
+        ).expand(data=repos)
+
+        load_commit_prs = fuse(
+            "etl_commit_pull_requests",
+            stages=[extract_commit_pull_requests, load_commit_pull_requests],
+            batch_key="commits",
+        ).expand(data=load_commit)
+
+        load_commits_files_changes = fuse(
+            "etl_commits_files_changes",
+            stages=[
+                extract_commits_files_changes,
+                transform_commits_files_changes,
+                load_commits_files_changes,
+            ],
+            batch_key="commits",
+        ).expand(data=load_commit)
+        load_pr_files_changes >> load_commits_files_changes
+    else:
+        orgs_info = extract_github_organization.expand(organization=orgs)
+        transform_orgs = transform_github_organization.expand(organization=orgs_info)
+        load_orgs = load_github_organization.expand(organization=transform_orgs)
+
+        orgs_members = extract_github_organization_members.expand(
+            organization=orgs_info
+        )
+        transform_orgs_members = transform_github_organization_members.expand(
+            data=orgs_members
+        )
+        load_orgs_members = load_github_organization_members.expand(
+            data=transform_orgs_members
+        )
+        load_orgs >> load_orgs_members
+
+        repos = extract_github_repos(organizations=orgs_info)
+        transform_repos = transform_github_repos.expand(repo=repos)
+        load_repos = load_github_repos.expand(repo=transform_repos)
+        load_orgs >> load_repos
+
+        contributors = extract_repo_contributors.expand(data=repos)
+        transform_contributors = transform_repo_contributors.expand(data=contributors)
+        load_contributors = load_repo_contributors.expand(data=transform_contributors)
+        load_repos >> load_contributors
+
+        labels = extract_labels.expand(data=repos)
+        transform_label = transform_labels.expand(data=labels)
+        load_label = load_labels.expand(data=transform_label)
+
+        issues = extract_issues.expand(data=repos)
+        transform_issue = transform_issues.expand(data=issues)
+        load_issue = load_issues.expand(data=transform_issue)
+        load_contributors >> load_issue
+        load_label >> load_issue
+
+        prs = extract_pull_requests.expand(data=repos)
+        prs_linked_issues = extract_pull_request_linked_issues.expand(data=prs)
+        transform_prs = transform_pull_requests.expand(data=prs_linked_issues)
+        load_prs = load_pull_requests.expand(data=transform_prs)
+        load_contributors >> load_prs
+        load_label >> load_prs
+        load_issue >> load_prs
+
+        pr_files_changes = extract_pull_request_files_changes.expand(data=prs)
+        transform_pr_files_changes = transform_pull_request_files_changes.expand(
+            data=pr_files_changes
+        )
+        load_pr_files_changes = load_pull_request_files_changes.expand(
+            data=transform_pr_files_changes
+        )
+
+        pr_reviews = extract_pr_review.expand(data=prs)
+        transform_pr_review = transform_pr_review.expand(data=pr_reviews)
+        load_pr_review = load_pr_review.expand(data=transform_pr_review)
+
+        pr_review_comments = extract_pr_review_comments.expand(data=prs)
+        transformed_pr_review_comments = transform_pr_review_comments.expand(
+            data=pr_review_comments
+        )
+        load_pr_review_comments = load_pr_review_comments.expand(
+            data=transformed_pr_review_comments
+        )
+        load_prs >> load_pr_review_comments
+
+        pr_issue_comments = extract_pr_issue_comments.expand(data=prs)
+        pr_issue_comments_with_reactions_member = (
+            extract_pr_issue_comments_reactions_member.expand(data=pr_issue_comments)
+        )
+        transformed_pr_issue_comments = transform_pr_issue_comments.expand(
+            data=pr_issue_comments_with_reactions_member
+        )
+        loaded_pr_issue_comments = load_pr_issue_comments.expand(
+            data=transformed_pr_issue_comments
+        )
+        load_prs >> loaded_pr_issue_comments
+        load_issue >> loaded_pr_issue_comments
+
+        commits = extract_commits.expand(data=repos)
+        commits_transformed = transform_commits.expand(data=commits)
+        load_commit = load_commits.expand(data=commits_transformed)
+
+        commit_prs = extract_commit_pull_requests.expand(data=commits_transformed)
+        load_commit_prs = load_commit_pull_requests.expand(data=commit_prs)
+        commit_prs >> load_commit_prs
+
+        commits_files_changes = extract_commits_files_changes.expand(data=commits)
+        transform_commits_files_changes = transform_commits_files_changes.expand(
+            data=commits_files_changes
+        )
+        load_commits_files_changes = load_commits_files_changes.expand(
+            data=transform_commits_files_changes
+        )
+        load_commit >> load_commits_files_changes
+        load_pr_files_changes >> load_commits_files_changes
+
+    bulk_import = load_bulk_import()
+    [
+        load_contributors,
+        load_label,
+        load_commit,
+        load_pr_files_changes,
+        load_pr_review,
+        load_commits_files_changes,
+    ] >> bulk_import
+
+    cleanup_xcom_staging()
+
+    # the summary runs after all the other tasks
+    dag_leaves = dag.leaves
+    dag_leaves >> summarize_metrics()
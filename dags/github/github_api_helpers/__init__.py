@@ -25,3 +25,4 @@ from .pull_requests import (
     get_all_reviews_of_pull_request,
 )
 from .repos import get_all_org_repos, get_all_repo_contributors
+from .thread_pool import map_in_threads, raise_failed_results
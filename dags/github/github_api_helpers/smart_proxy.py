@@ -1,12 +1,17 @@
 import logging
 import random
+import threading
+import time
 
 import requests
+from github.metrics import GitHubETLMetrics, normalize_endpoint
 from requests import Response
 
 
 class UniqueRandomNumbers:
     _instance = None
+    # the api calls could be made from multiple threads
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -14,6 +19,10 @@ class UniqueRandomNumbers:
         return cls._instance
 
     def __init__(self):
+        with self._lock:
+            self._init_numbers()
+
+    def _init_numbers(self):
         self.original_numbers = list(range(20001, 29981))
         self.numbers = self.original_numbers.copy()
         random.shuffle(self.numbers)
@@ -25,11 +34,12 @@ class UniqueRandomNumbers:
         #     time.sleep(60)
         #     self.counter = 0
 
-        if not self.numbers:
-            self.reset()
+        with self._lock:
+            if not self.numbers:
+                self.reset()
 
-        self.counter += 1
-        return self.numbers.pop()
+            self.counter += 1
+            return self.numbers.pop()
 
     def reset(self):
         self.numbers = self.original_numbers.copy()
@@ -47,6 +57,8 @@ def get(url: str, params=None) -> Response:
     """
 
     urn = UniqueRandomNumbers()
+    metrics = GitHubETLMetrics()
+    endpoint = normalize_endpoint(url)
     max_attempts = 10
     attempt = 0
 
@@ -59,8 +71,27 @@ def get(url: str, params=None) -> Response:
             "https": proxy_url,
         }
 
+        if attempt > 0:
+            metrics.increment("github_api_retries_total", endpoint=endpoint)
+
+        start = time.perf_counter()
         try:
             response = requests.get(url=url, params=params, proxies=proxies)
+            metrics.observe(
+                "github_api_request_seconds",
+                time.perf_counter() - start,
+                endpoint=endpoint,
+            )
+            metrics.increment(
+                "github_api_requests_total",
+                endpoint=endpoint,
+                status=response.status_code,
+            )
+            metrics.increment(
+                "github_api_response_bytes_total",
+                len(response.content),
+                endpoint=endpoint,
+            )
 
             if response.status_code == 200:
                 return response
@@ -75,9 +106,13 @@ def get(url: str, params=None) -> Response:
                 f"HTTP error occurred، Failed to get {url} with error: {http_err}"
             )
         except Exception as err:
+            metrics.increment(
+                "github_api_requests_total", endpoint=endpoint, status="error"
+            )
             logging.error(f"Some error occurred during getting {url}, error: {err}")
 
         attempt += 1
 
+    metrics.increment("github_api_failures_total", endpoint=endpoint)
     logging.error(f"All attempts failed for URL: {url}")
     raise Exception(f"All attempts failed for URL: {url}")
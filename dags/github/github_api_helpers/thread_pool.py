@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, NamedTuple
+
+from dotenv import load_dotenv
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+class ItemResult(NamedTuple):
+    item: Any
+    value: Any
+    error: Exception | None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    get the thread pool shared between the github api calls of a process
+    the pool width is configured with the `GITHUB_API_MAX_WORKERS` env variable
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            load_dotenv()
+            max_workers = int(os.getenv("GITHUB_API_MAX_WORKERS") or "8")
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="github_api"
+            )
+        return _executor
+
+
+def map_in_threads(
+    function: Callable, items: list, description: str = "items"
+) -> list[ItemResult]:
+    """
+    call the function for each of the items within the shared thread pool
+
+    Parameters
+    ------------
+    function : Callable
+        the function to call with each item
+    items : list
+        the items to process
+    description : str
+        the name of items to be used in progress logs
+
+    Returns
+    ---------
+    results : list[ItemResult]
+        the results in the same order of the items
+        the `error` of each result would be set if its call has failed
+        and the other items would be processed anyway
+    """
+    executor = get_executor()
+    futures = {executor.submit(function, item): idx for idx, item in enumerate(items)}
+
+    results: list[ItemResult | None] = [None] * len(items)
+    log_step = max(1, len(items) // 10)
+    for done, future in enumerate(as_completed(futures), start=1):
+        idx = futures[future]
+        try:
+            results[idx] = ItemResult(
+                item=items[idx], value=future.result(), error=None
+            )
+        except Exception as exp:
+            logging.error(f"Failed processing {description} {idx + 1}, error: {exp}")
+            results[idx] = ItemResult(item=items[idx], value=None, error=exp)
+
+        if done % log_step == 0 or done == len(items):
+            logging.info(f"Processed {done}/{len(items)} {description}")
+
+    failed = sum(1 for result in results if result.error is not None)
+    if failed:
+        logging.warning(f"{failed}/{len(items)} {description} failed!")
+
+    return results
+
+
+def raise_failed_results(results: list[ItemResult], description: str = "items") -> None:
+    """
+    fail the task if the calls of more items than the allowed ratio have failed
+    the ratio is configured with the `GITHUB_MAX_FAILED_ITEMS_RATIO` env variable
+    and the default `0` means failing if any of them has failed
+
+    Parameters
+    ------------
+    results : list[ItemResult]
+        the results of `map_in_threads`
+    description : str
+        the name of items to be used in the error message
+    """
+    errors = [result.error for result in results if result.error is not None]
+    if not errors:
+        return
+
+    load_dotenv()
+    max_failed_ratio = float(os.getenv("GITHUB_MAX_FAILED_ITEMS_RATIO") or "0")
+    if len(errors) / len(results) > max_failed_ratio:
+        raise RuntimeError(
+            f"{len(errors)}/{len(results)} {description} failed!"
+        ) from errors[0]
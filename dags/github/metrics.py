@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import re
+import socket
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+# the upper bounds of the latency histograms in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class GitHubETLMetrics:
+    """
+    the metrics of the github etl within the current process
+
+    all metrics have the `task` and `repo` labels of the current context
+    in addition to the labels given when recording them
+    """
+
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        # making it singleton
+        if not hasattr(cls, "instance"):
+            cls.instance = super(GitHubETLMetrics, cls).__new__(cls)
+            cls.instance.reset()
+        return cls.instance
+
+    def reset(self) -> None:
+        """
+        remove all the recorded metrics and the context labels
+        """
+        with self._lock:
+            self.context: dict[str, str] = {"task": "", "repo": ""}
+            self.counters: dict[tuple, float] = defaultdict(float)
+            self.histograms: dict[tuple, list[int]] = {}
+            self.histogram_sums: dict[tuple, float] = defaultdict(float)
+
+    def set_context(self, task: str | None = None, repo: str | None = None) -> None:
+        """
+        set the labels to be added to the metrics recorded from now on
+        """
+        with self._lock:
+            if task is not None:
+                self.context["task"] = task
+            if repo is not None:
+                self.context["repo"] = repo
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """
+        increment the counter metric `name` with the given value
+        """
+        key = self._get_key(name, labels)
+        with self._lock:
+            self.counters[key] += value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        record a value in the histogram metric `name`
+        """
+        key = self._get_key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                # the last item is for the values more than all bucket bounds
+                self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1)
+
+            idx = len(LATENCY_BUCKETS)
+            for bucket_idx, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    idx = bucket_idx
+                    break
+            self.histograms[key][idx] += 1
+            self.histogram_sums[key] += value
+
+    def to_dict(self) -> dict:
+        """
+        get the recorded metrics as a json serializable dict
+        """
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "buckets": list(buckets),
+                        "sum": self.histogram_sums[(name, labels)],
+                    }
+                    for (name, labels), buckets in self.histograms.items()
+                ],
+            }
+
+    def _get_key(self, name: str, labels: dict) -> tuple:
+        all_labels = {**self.context, **labels}
+        return name, tuple(sorted((key, str(val)) for key, val in all_labels.items()))
+
+
+def normalize_endpoint(url: str) -> str:
+    """
+    replace the owner, repo and ids within a github api url with placeholders
+    so the requests of the same endpoint would be aggregated together
+
+    Parameters
+    ------------
+    url : str
+        the github api url
+
+    Returns
+    ---------
+    endpoint : str
+        the url path with placeholders, e.g. `/repos/{owner}/{repo}/pulls/{id}`
+    """
+    segments = urlparse(url).path.strip("/").split("/")
+    if segments and segments[0] == "repos" and len(segments) >= 3:
+        segments[1:3] = ["{owner}", "{repo}"]
+    elif segments and segments[0] in ("orgs", "users") and len(segments) >= 2:
+        segments[1] = "{name}"
+
+    for idx, segment in enumerate(segments):
+        if segment.isdigit():
+            segments[idx] = "{id}"
+        elif re.fullmatch(r"[0-9a-f]{40}", segment):
+            segments[idx] = "{sha}"
+
+    return "/" + "/".join(segments)
+
+
+def estimate_percentile(buckets: list[int], percentile: float) -> float:
+    """
+    estimate a percentile of a histogram as the upper bound of its bucket
+
+    Parameters
+    ------------
+    buckets : list[int]
+        the count of values within each of `LATENCY_BUCKETS` and the overflow one
+    percentile : float
+        the percentile to estimate, between 0 and 100
+
+    Returns
+    ---------
+    value : float
+        the estimated percentile, `inf` if it is more than all bucket bounds
+    """
+    total = sum(buckets)
+    if total == 0:
+        return 0.0
+
+    cumulative = 0
+    for idx, count in enumerate(buckets):
+        cumulative += count
+        if cumulative >= total * percentile / 100:
+            return LATENCY_BUCKETS[idx] if idx < len(LATENCY_BUCKETS) else float("inf")
+    return float("inf")
+
+
+def to_prometheus_text(metrics: dict) -> str:
+    """
+    convert the metrics dict to the prometheus text exposition format
+
+    Parameters
+    ------------
+    metrics : dict
+        the metrics in the format of `GitHubETLMetrics.to_dict`
+    """
+    lines = []
+    for counter in metrics["counters"]:
+        lines.append(
+            f"{counter['name']}{_format_labels(counter['labels'])} {counter['value']}"
+        )
+    for histogram in metrics["histograms"]:
+        name, labels = histogram["name"], histogram["labels"]
+        cumulative = 0
+        for bound, count in zip(
+            [*map(str, LATENCY_BUCKETS), "+Inf"], histogram["buckets"]
+        ):
+            cumulative += count
+            bucket_labels = _format_labels({**labels, "le": bound})
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+def to_statsd_lines(metrics: dict, prefix: str = "github_etl") -> list[str]:
+    """
+    convert the metrics dict to statsd lines with dogstatsd style tags
+    the histograms are sent as their count and sum
+
+    Parameters
+    ------------
+    metrics : dict
+        the metrics in the format of `GitHubETLMetrics.to_dict`
+    prefix : str
+        the prefix of the metric names
+    """
+    lines = []
+    for counter in metrics["counters"]:
+        tags = _format_tags(counter["labels"])
+        lines.append(f"{prefix}.{counter['name']}:{counter['value']}|c{tags}")
+    for histogram in metrics["histograms"]:
+        tags = _format_tags(histogram["labels"])
+        name = histogram["name"]
+        lines.append(f"{prefix}.{name}_count:{sum(histogram['buckets'])}|c{tags}")
+        lines.append(f"{prefix}.{name}_sum:{histogram['sum']}|c{tags}")
+    return lines
+
+
+def export_metrics(run_dir: str, prefix: str) -> None:
+    """
+    export the metrics of the current process, to be called at the end of a task
+
+    - the json metrics and a prometheus textfile are written within
+      `GITHUB_METRICS_DIR/<run_dir>` if the env variable is set
+    - the metrics are sent to the statsd server at
+      `GITHUB_METRICS_STATSD_HOST:GITHUB_METRICS_STATSD_PORT` if the host is set
+
+    Parameters
+    ------------
+    run_dir : str
+        the directory name of the dag run
+    prefix : str
+        a unique prefix for the files of the task instance
+    """
+    load_dotenv()
+    metrics = GitHubETLMetrics().to_dict()
+
+    metrics_dir = os.getenv("GITHUB_METRICS_DIR")
+    if metrics_dir:
+        directory = os.path.join(metrics_dir, run_dir)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{prefix}.json"), "w") as file:
+            json.dump(metrics, file)
+        with open(os.path.join(directory, f"{prefix}.prom"), "w") as file:
+            file.write(to_prometheus_text(metrics))
+
+    statsd_host = os.getenv("GITHUB_METRICS_STATSD_HOST")
+    if statsd_host:
+        statsd_port = int(os.getenv("GITHUB_METRICS_STATSD_PORT") or "8125")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for line in to_statsd_lines(metrics):
+                sock.sendto(line.encode("utf-8"), (statsd_host, statsd_port))
+        except OSError as exp:
+            logging.error(f"Failed to send the metrics to statsd, error: {exp}")
+        finally:
+            sock.close()
+
+
+def summarize_run_metrics(run_dir: str) -> dict:
+    """
+    aggregate the exported metrics of all tasks of a dag run
+
+    Parameters
+    ------------
+    run_dir : str
+        the directory name of the dag run
+
+    Returns
+    ---------
+    summary : dict
+        the metric values per task, having the total count, sum and
+        estimated p50/p90/p99 for the histograms
+    """
+    load_dotenv()
+    metrics_dir = os.getenv("GITHUB_METRICS_DIR")
+    if not metrics_dir:
+        raise ValueError("GITHUB_METRICS_DIR is not given in env")
+
+    directory = os.path.join(metrics_dir, run_dir)
+    counters: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    histograms: dict[str, dict[str, list]] = defaultdict(dict)
+    sums: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    file_names = os.listdir(directory) if os.path.exists(directory) else []
+    for file_name in sorted(file_names):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, file_name)) as file:
+            metrics = json.load(file)
+
+        for counter in metrics["counters"]:
+            task = counter["labels"].get("task", "")
+            counters[task][counter["name"]] += counter["value"]
+        for histogram in metrics["histograms"]:
+            task = histogram["labels"].get("task", "")
+            name = histogram["name"]
+            buckets = histograms[task].get(name, [0] * len(histogram["buckets"]))
+            histograms[task][name] = [
+                total + count for total, count in zip(buckets, histogram["buckets"])
+            ]
+            sums[task][name] += histogram["sum"]
+
+    summary = {}
+    for task in sorted(set(counters) | set(histograms)):
+        summary[task] = dict(counters[task])
+        for name, buckets in histograms[task].items():
+            summary[task][name] = {
+                "count": sum(buckets),
+                "sum": sums[task][name],
+                "p50": estimate_percentile(buckets, 50),
+                "p90": estimate_percentile(buckets, 90),
+                "p99": estimate_percentile(buckets, 99),
+            }
+    return summary
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    items = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        items.append(f'{key}="{escaped}"')
+    return "{" + ",".join(items) + "}"
+
+
+def _format_tags(labels: dict) -> str:
+    tags = [f"{key}:{value}" for key, value in labels.items() if value != ""]
+    return "|#" + ",".join(tags) if tags else ""
@@ -1,4 +1,10 @@
 # flake8: noqa
+from .bulk_import import (
+    BulkImportStager,
+    is_bulk_import_enabled,
+    load_bulk_import_files,
+    prepare_admin_import,
+)
 from .comments import save_comment_to_neo4j, save_review_comment_to_neo4j
 from .commits import save_commit_files_changes_to_neo4j, save_commit_to_neo4j
 from .issues import save_issue_to_neo4j
@@ -8,6 +14,12 @@ from .orgs import (
     save_org_member_to_neo4j,
     save_orgs_to_neo4j,
 )
+from .patch_store import (
+    FileSystemPatchStore,
+    PostgresPatchStore,
+    get_patch_store,
+    offload_file_changes_patches,
+)
 from .pull_requests import (
     save_commits_relation_to_pr,
     save_pr_files_changes_to_neo4j,
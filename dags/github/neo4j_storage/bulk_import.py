@@ -0,0 +1,409 @@
+import csv
+import json
+import logging
+import os
+import re
+from glob import glob
+
+from dotenv import load_dotenv
+
+from .neo4j_connection import Neo4jConnection
+from .neo4j_enums import Node, Relationship
+from .patch_store import get_patch_store, offload_file_changes_patches
+from .utils import FLAT_MAP_RULES, flat_map
+
+# the properties used to merge the nodes, the rest of the nodes are merged by `id`
+NODE_KEYS: dict[Node, tuple[str, ...]] = {
+    Node.Commit: ("sha",),
+    Node.File: ("sha", "filename"),
+}
+
+# escaped quotes and backslashes are written as unicode escapes
+# so the csv reader of neo4j never sees a `\"` sequence
+_JSON_ESCAPES = re.compile(r'\\(["\\])')
+
+
+def is_bulk_import_enabled() -> bool:
+    """
+    whether the GitHub DAG should stage the entities for bulk import
+    instead of merging them one by one (`GITHUB_BULK_IMPORT` env variable)
+    """
+    load_dotenv()
+    return os.getenv("GITHUB_BULK_IMPORT", "false").lower() == "true"
+
+
+def get_import_dir() -> str:
+    """
+    the neo4j import directory shared between airflow workers and neo4j
+    (`NEO4J_IMPORT_DIR` env variable)
+    """
+    load_dotenv()
+    import_dir = os.getenv("NEO4J_IMPORT_DIR")
+    if not import_dir:
+        raise ValueError("NEO4J_IMPORT_DIR is not given in env")
+    return import_dir
+
+
+def get_node_key(label: Node) -> tuple[str, ...]:
+    return NODE_KEYS.get(label, ("id",))
+
+
+def _to_csv_json(data: dict | None) -> str:
+    return _JSON_ESCAPES.sub(
+        lambda match: "\\u0022" if match.group(1) == '"' else "\\u005c",
+        json.dumps(data or {}, default=str),
+    )
+
+
+class BulkImportStager:
+    def __init__(self, run_dir: str, prefix: str) -> None:
+        """
+        stage the GitHub entities as csv files in the node/relationship layout
+        of `neo4j_enums.Node` and `neo4j_enums.Relationship`
+
+        Parameters
+        ------------
+        run_dir : str
+            the directory within the neo4j import directory to write the files in
+            all the stagers of a DAG run should share the same `run_dir`
+        prefix : str
+            a unique name for the files of this stager (e.g. the task id)
+            so parallel tasks never write to the same file
+        """
+        self.run_dir = run_dir
+        self.prefix = prefix
+        self.directory = os.path.join(get_import_dir(), run_dir)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._writers: dict[str, tuple] = {}
+
+    def stage_node(self, label: Node, properties: dict) -> None:
+        key = {name: properties[name] for name in get_node_key(label)}
+        self._write(
+            f"nodes.{label.value}.{self.prefix}.csv",
+            ["key", "properties"],
+            [_to_csv_json(key), _to_csv_json(properties)],
+        )
+
+    def stage_relationship(
+        self,
+        relationship: Relationship,
+        start_label: Node,
+        start_key: dict,
+        end_label: Node,
+        end_key: dict,
+        properties: dict | None = None,
+    ) -> None:
+        self._write(
+            (
+                f"rels.{relationship.value}.{start_label.value}"
+                f".{end_label.value}.{self.prefix}.csv"
+            ),
+            ["start", "end", "properties"],
+            [_to_csv_json(start_key), _to_csv_json(end_key), _to_csv_json(properties)],
+        )
+
+    def stage_commit(self, commit: dict, repository_id: str) -> None:
+        committer = commit.pop("committer", None)
+        author = commit.pop("author", None)
+        cleaned_commit = flat_map(commit, **FLAT_MAP_RULES[Node.Commit])
+        cleaned_commit["repository_id"] = repository_id
+        self.stage_node(Node.Commit, cleaned_commit)
+
+        commit_key = {"sha": cleaned_commit["sha"]}
+        for user, relationship in [
+            (committer, Relationship.COMMITTED_BY),
+            (author, Relationship.AUTHORED_BY),
+        ]:
+            if user:
+                self.stage_node(Node.GitHubUser, user)
+                self.stage_relationship(
+                    relationship,
+                    Node.GitHubUser,
+                    {"id": user["id"]},
+                    Node.Commit,
+                    commit_key,
+                )
+
+    def stage_commit_files_changes(
+        self, commit_sha: str, repository_id: str, file_changes: list
+    ) -> None:
+        self._stage_files_changes(
+            Node.Commit, {"sha": commit_sha}, repository_id, file_changes
+        )
+
+    def stage_pr_files_changes(
+        self, pr_id: int, repository_id: str, file_changes: list
+    ) -> None:
+        self._stage_files_changes(
+            Node.PullRequest, {"id": int(pr_id)}, int(repository_id), file_changes
+        )
+
+    def stage_review(self, pr_id: int, review: dict) -> None:
+        author = review.pop("user", None)
+        if not author:
+            return
+        self.stage_node(Node.GitHubUser, author)
+        self.stage_relationship(
+            Relationship.REVIEWED,
+            Node.GitHubUser,
+            {"id": author["id"]},
+            Node.PullRequest,
+            {"id": int(pr_id)},
+            {"state": review.get("state")},
+        )
+
+    def stage_repo_contributor(self, contributor: dict, repository_id: str) -> None:
+        self.stage_node(Node.GitHubUser, contributor)
+        self.stage_relationship(
+            Relationship.IS_MEMBER,
+            Node.GitHubUser,
+            {"id": contributor["id"]},
+            Node.Repository,
+            {"id": repository_id},
+        )
+
+    def stage_label(self, label: dict) -> None:
+        self.stage_node(Node.Label, label)
+
+    def close(self) -> None:
+        for file, _ in self._writers.values():
+            file.close()
+        self._writers = {}
+
+    def _stage_files_changes(
+        self, label: Node, key: dict, repository_id, file_changes: list
+    ) -> None:
+        # Not saving file changes without a sha
+        file_changes = [fc for fc in file_changes if fc.get("sha") is not None]
+        file_changes = offload_file_changes_patches(file_changes, get_patch_store())
+        for file_change in file_changes:
+            self.stage_node(Node.File, file_change)
+            file_key = {
+                "sha": file_change["sha"],
+                "filename": file_change["filename"],
+            }
+            self.stage_relationship(
+                Relationship.CHANGED, label, key, Node.File, file_key
+            )
+            self.stage_relationship(
+                Relationship.IS_ON,
+                Node.File,
+                file_key,
+                Node.Repository,
+                {"id": repository_id},
+            )
+
+    def _write(self, file_name: str, header: list[str], row: list[str]) -> None:
+        if file_name not in self._writers:
+            path = os.path.join(self.directory, file_name)
+            is_new = not os.path.exists(path)
+            file = open(path, "a", newline="", encoding="utf-8")
+            writer = csv.writer(file)
+            if is_new:
+                writer.writerow(header)
+            self._writers[file_name] = (file, writer)
+
+        _, writer = self._writers[file_name]
+        writer.writerow(row)
+
+
+def _merge_pattern(variable: str, label: Node, key_map: str) -> str:
+    properties = ", ".join(f"{name}: {key_map}.{name}" for name in get_node_key(label))
+    return f"({variable}:{label.value} {{{properties}}})"
+
+
+def _list_staged_files(run_dir: str) -> tuple[list[str], list[str]]:
+    directory = os.path.join(get_import_dir(), run_dir)
+    node_files = sorted(glob(os.path.join(directory, "nodes.*.csv")))
+    relationship_files = sorted(glob(os.path.join(directory, "rels.*.csv")))
+    return node_files, relationship_files
+
+
+def load_bulk_import_files(run_dir: str, batch_size: int = 10000) -> None:
+    """
+    load the files staged by `BulkImportStager` into neo4j using `LOAD CSV`
+    committing every `batch_size` rows. All nodes are loaded before the relationships.
+
+    Parameters
+    ------------
+    run_dir : str
+        the directory within the neo4j import directory having the staged files
+    batch_size : int
+        the number of rows to commit in each transaction
+    """
+    node_files, relationship_files = _list_staged_files(run_dir)
+
+    neo4jConnection = Neo4jConnection()
+    driver = neo4jConnection.connect_neo4j()
+
+    with driver.session() as session:
+        labels = {Node(os.path.basename(path).split(".")[1]) for path in node_files}
+        for label in labels:
+            keys = ", ".join(f"n.{name}" for name in get_node_key(label))
+            session.run(
+                f"CREATE INDEX IF NOT EXISTS FOR (n:{label.value}) ON ({keys})"
+            ).consume()
+
+        for idx, path in enumerate(node_files):
+            logging.info(f"Loading node file {idx + 1}/{len(node_files)}: {path}")
+            label = Node(os.path.basename(path).split(".")[1])
+            session.run(
+                f"""
+                LOAD CSV WITH HEADERS FROM $url AS row
+                CALL {{
+                    WITH row
+                    WITH apoc.convert.fromJsonMap(row.key) AS key,
+                        apoc.convert.fromJsonMap(row.properties) AS properties
+                    MERGE {_merge_pattern("n", label, "key")}
+                        SET n += properties, n.latestSavedAt = datetime()
+                }} IN TRANSACTIONS OF $batch_size ROWS
+                """,
+                url=f"file:///{run_dir}/{os.path.basename(path)}",
+                batch_size=batch_size,
+            ).consume()
+
+        for idx, path in enumerate(relationship_files):
+            logging.info(
+                f"Loading relationship file {idx + 1}/{len(relationship_files)}: {path}"
+            )
+            _, relationship, start_label, end_label = os.path.basename(path).split(".")[
+                :4
+            ]
+            session.run(
+                f"""
+                LOAD CSV WITH HEADERS FROM $url AS row
+                CALL {{
+                    WITH row
+                    WITH apoc.convert.fromJsonMap(row.start) AS start_key,
+                        apoc.convert.fromJsonMap(row.end) AS end_key,
+                        apoc.convert.fromJsonMap(row.properties) AS properties
+                    MATCH {_merge_pattern("a", Node(start_label), "start_key")}
+                    MATCH {_merge_pattern("b", Node(end_label), "end_key")}
+                    MERGE (a)-[r:{Relationship(relationship).value}]->(b)
+                        SET r += properties, r.latestSavedAt = datetime()
+                }} IN TRANSACTIONS OF $batch_size ROWS
+                """,
+                url=f"file:///{run_dir}/{os.path.basename(path)}",
+                batch_size=batch_size,
+            ).consume()
+
+    driver.close()
+
+
+def _admin_id(label: Node, key: dict) -> str:
+    return "|".join(str(key[name]) for name in get_node_key(label))
+
+
+def _admin_type(value) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    elif isinstance(value, int):
+        return "long"
+    elif isinstance(value, float):
+        return "double"
+    return "string"
+
+
+def prepare_admin_import(run_dir: str, database: str = "neo4j") -> str:
+    """
+    convert the files staged by `BulkImportStager` to the `neo4j-admin` import
+    layout and return the import command. The admin import is only
+    possible on an empty and stopped database, the normal runs of the DAG
+    would then merge the rest of the data incrementally.
+
+    Parameters
+    ------------
+    run_dir : str
+        the directory within the neo4j import directory having the staged files
+    database : str
+        the database to import the data into
+
+    Returns
+    ---------
+    command : str
+        the `neo4j-admin database import full` command to run on the neo4j server
+    """
+    node_files, relationship_files = _list_staged_files(run_dir)
+    admin_dir = os.path.join(get_import_dir(), run_dir, "admin")
+    os.makedirs(admin_dir, exist_ok=True)
+
+    # merging the staged files of each label, the last written properties win
+    nodes: dict[Node, dict[str, dict]] = {}
+    for path in node_files:
+        label = Node(os.path.basename(path).split(".")[1])
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                key = json.loads(row["key"])
+                properties = json.loads(row["properties"])
+                nodes.setdefault(label, {}).setdefault(
+                    _admin_id(label, key), {}
+                ).update(properties)
+
+    arguments: list[str] = []
+    for label, label_nodes in nodes.items():
+        columns: dict[str, str] = {}
+        for properties in label_nodes.values():
+            for name, value in properties.items():
+                if value is not None and not isinstance(value, (dict, list)):
+                    columns.setdefault(name, _admin_type(value))
+
+        path = os.path.join(admin_dir, f"nodes.{label.value}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(
+                [f"importId:ID({label.value})", ":LABEL"]
+                + [f"{name}:{type}" for name, type in columns.items()]
+            )
+            for node_id, properties in label_nodes.items():
+                writer.writerow(
+                    [node_id, label.value]
+                    + [
+                        "" if properties.get(name) is None else properties[name]
+                        for name in columns
+                    ]
+                )
+        arguments.append(f"--nodes={path}")
+
+    for path in relationship_files:
+        _, relationship, start_label, end_label = os.path.basename(path).split(".")[:4]
+        with open(path, newline="", encoding="utf-8") as file:
+            rows = list(csv.DictReader(file))
+
+        columns = {}
+        for row in rows:
+            for name, value in json.loads(row["properties"]).items():
+                if value is not None and not isinstance(value, (dict, list)):
+                    columns.setdefault(name, _admin_type(value))
+
+        admin_path = os.path.join(admin_dir, os.path.basename(path))
+        with open(admin_path, "w", newline="", encoding="utf-8") as admin_file:
+            writer = csv.writer(admin_file)
+            writer.writerow(
+                [f":START_ID({start_label})", f":END_ID({end_label})", ":TYPE"]
+                + [f"{name}:{type}" for name, type in columns.items()]
+            )
+            for row in rows:
+                properties = json.loads(row["properties"])
+                writer.writerow(
+                    [
+                        _admin_id(Node(start_label), json.loads(row["start"])),
+                        _admin_id(Node(end_label), json.loads(row["end"])),
+                        relationship,
+                    ]
+                    + [
+                        "" if properties.get(name) is None else properties[name]
+                        for name in columns
+                    ]
+                )
+        arguments.append(f"--relationships={admin_path}")
+
+    # relationships to the nodes merged by the normal runs (e.g. repositories)
+    # cannot be imported and are created by the next incremental run
+    command = (
+        "neo4j-admin database import full "
+        "--skip-bad-relationships=true --skip-duplicate-nodes=true "
+        + " ".join(arguments)
+        + f" {database}"
+    )
+    return command
@@ -1,6 +1,7 @@
 from .neo4j_connection import Neo4jConnection
 from .neo4j_enums import Node, Relationship
-from .utils import flat_map
+from .transactions import execute_write_with_metrics
+from .utils import FLAT_MAP_RULES, flat_map
 
 
 def save_review_comment_to_neo4j(review_comment: dict, repository_id: str):
@@ -10,7 +11,7 @@ def save_review_comment_to_neo4j(review_comment: dict, repository_id: str):
     user = review_comment.pop("user", None)
     pull_request_number = review_comment.pop("pull_request_number", None)
     reactions_member = review_comment.pop("reactions_member", None)
-    cleaned_review = flat_map(review_comment)
+    cleaned_review = flat_map(review_comment, **FLAT_MAP_RULES[Node.ReviewComment])
 
     if pull_request_number:
         pull_request_query = f"""
@@ -48,7 +49,9 @@ def save_review_comment_to_neo4j(review_comment: dict, repository_id: str):
         reactions_member_query = ""
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_review_comment_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (rc:{Node.ReviewComment.value} {{id: $review.id}})
@@ -63,7 +66,7 @@ def save_review_comment_to_neo4j(review_comment: dict, repository_id: str):
                 user=user,
                 pull_request_number=pull_request_number,
                 reactions_member=reactions_member,
-            )
+            ),
         )
 
     driver.close()
@@ -77,7 +80,7 @@ def save_comment_to_neo4j(comment: dict, repository_id: str):
     type = comment.pop("type", None)
     number = comment.pop("number", None)
     reactions_member = comment.pop("reactions_member", None)
-    cleaned_comment = flat_map(comment)
+    cleaned_comment = flat_map(comment, **FLAT_MAP_RULES[Node.Comment])
 
     if type == "issue":
         issue_query = f"""
@@ -122,7 +125,9 @@ def save_comment_to_neo4j(comment: dict, repository_id: str):
         reactions_member_query = ""
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_comment_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (c:{Node.Comment.value} {{id: $comment.id}})
@@ -137,7 +142,7 @@ def save_comment_to_neo4j(comment: dict, repository_id: str):
                 user=user,
                 number=int(number),
                 reactions_member=reactions_member,
-            )
+            ),
         )
 
     driver.close()
@@ -1,6 +1,8 @@
 from .neo4j_connection import Neo4jConnection
 from .neo4j_enums import Node, Relationship
-from .utils import flat_map
+from .patch_store import get_patch_store, offload_file_changes_patches
+from .transactions import execute_write_with_metrics
+from .utils import FLAT_MAP_RULES, flat_map
 
 
 def save_commit_to_neo4j(commit: dict, repository_id: str):
@@ -9,7 +11,7 @@ def save_commit_to_neo4j(commit: dict, repository_id: str):
 
     committer = commit.pop("committer", None)
     author = commit.pop("author", None)
-    cleaned_commit = flat_map(commit)
+    cleaned_commit = flat_map(commit, **FLAT_MAP_RULES[Node.Commit])
 
     if committer:
         committer_query = f"""
@@ -36,7 +38,9 @@ def save_commit_to_neo4j(commit: dict, repository_id: str):
         author_query = ""
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_commit_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (c:{Node.Commit.value} {{sha: $commit.sha}})
@@ -49,7 +53,7 @@ def save_commit_to_neo4j(commit: dict, repository_id: str):
                 repository_id=repository_id,
                 committer=committer,
                 author=author,
-            )
+            ),
         )
 
     driver.close()
@@ -63,9 +67,13 @@ def save_commit_files_changes_to_neo4j(
 
     # Not saving file changes without a sha
     file_changes = list(filter(lambda fc: fc.get("sha") is not None, file_changes))
+    # patches would be kept out of neo4j if a patch store is configured
+    file_changes = offload_file_changes_patches(file_changes, get_patch_store())
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_commit_files_changes_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MATCH (repo:{Node.Repository.value} {{id: $repository_id}}),
@@ -82,7 +90,7 @@ def save_commit_files_changes_to_neo4j(
                 commit_sha=commit_sha,
                 repository_id=repository_id,
                 file_changes=file_changes,
-            )
+            ),
         )
 
     driver.close()
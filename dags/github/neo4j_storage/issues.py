@@ -1,5 +1,6 @@
 from .neo4j_connection import Neo4jConnection
 from .neo4j_enums import Node, Relationship
+from .transactions import execute_write_with_metrics
 from .utils import remove_nested_collections
 
 
@@ -46,7 +47,9 @@ def save_issue_to_neo4j(issue: dict, repository_id: str):
     """
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_issue_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (is:{Node.Issue.value} {{id: $issue.id}})
@@ -68,6 +71,6 @@ def save_issue_to_neo4j(issue: dict, repository_id: str):
                 labels=labels,
                 assignee=assignee,
                 assignees=assignees,
-            )
+            ),
         )
     driver.close()
@@ -1,5 +1,6 @@
 from .neo4j_connection import Neo4jConnection
 from .neo4j_enums import Node
+from .transactions import execute_write_with_metrics
 
 
 def save_label_to_neo4j(label: dict):
@@ -7,13 +8,15 @@ def save_label_to_neo4j(label: dict):
     driver = neo4jConnection.connect_neo4j()
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_label_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (lb:{Node.Label.value} {{id: $label.id}})
                   SET lb += $label, lb.latestSavedAt = datetime()
             """,
                 label=label,
-            )
+            ),
         )
     driver.close()
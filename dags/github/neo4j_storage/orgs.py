@@ -2,6 +2,7 @@ from neo4j.time import DateTime as Neo4jDateTime
 
 from .neo4j_connection import Neo4jConnection
 from .neo4j_enums import Node, Relationship
+from .transactions import execute_write_with_metrics
 
 
 def get_orgs_profile_from_neo4j():
@@ -43,14 +44,16 @@ def save_orgs_to_neo4j(org: dict):
     driver = neo4jConnection.connect_neo4j()
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_orgs_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (gho:{Node.GitHubOrganization.value} {{id: $org.id}})
                   SET gho += $org, gho.latestSavedAt = datetime()
             """,
                 org=org,
-            )
+            ),
         )
     driver.close()
 
@@ -60,7 +63,9 @@ def save_org_member_to_neo4j(org_id: str, member: dict):
     driver = neo4jConnection.connect_neo4j()
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_org_member_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MATCH (gho:{Node.GitHubOrganization.value} {{id: $org_id}})
@@ -73,6 +78,6 @@ def save_org_member_to_neo4j(org_id: str, member: dict):
             """,
                 org_id=org_id,
                 member=member,
-            )
+            ),
         )
     driver.close()
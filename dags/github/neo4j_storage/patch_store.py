@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import os
+import zlib
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+# the file change properties kept on the `GitHubFile` nodes when offloading patches
+FILE_CHANGE_STATS_KEYS = (
+    "sha",
+    "filename",
+    "previous_filename",
+    "status",
+    "additions",
+    "deletions",
+    "changes",
+)
+
+
+class FileSystemPatchStore:
+    def __init__(self, directory: str) -> None:
+        """
+        keep the compressed patches of file changes as files
+        under `directory/<sha[:2]>/<sha>/<hash of filename>.z`
+
+        Parameters
+        ------------
+        directory : str
+            the root directory of the patches
+        """
+        self.directory = directory
+
+    def save_patches(self, patches: list[tuple[str, str, str]]) -> None:
+        """
+        save the patches
+
+        Parameters
+        ------------
+        patches : list[tuple[str, str, str]]
+            a list of `(sha, filename, patch)` tuples
+        """
+        for sha, filename, patch in patches:
+            path = self._get_path(sha, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(zlib.compress(patch.encode("utf-8")))
+
+    def load_patch(self, sha: str, filename: str) -> str | None:
+        """
+        load the patch of a file change, `None` if it was not saved
+        """
+        path = self._get_path(sha, filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as file:
+            return zlib.decompress(file.read()).decode("utf-8")
+
+    def _get_path(self, sha: str, filename: str) -> str:
+        filename_hash = hashlib.sha256(filename.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, sha[:2], sha, f"{filename_hash}.z")
+
+
+class PostgresPatchStore:
+    def __init__(self, dbname: str, table_name: str = "github_file_patches") -> None:
+        """
+        keep the compressed patches of file changes in a postgresql bytea table
+        with `(sha, filename)` as the primary key
+
+        Parameters
+        ------------
+        dbname : str
+            the database to save the patches in
+        table_name : str
+            the table to save the patches in
+        """
+        self.dbname = dbname
+        self.table_name = table_name
+        self._table_created = False
+
+    def save_patches(self, patches: list[tuple[str, str, str]]) -> None:
+        """
+        save the patches
+
+        Parameters
+        ------------
+        patches : list[tuple[str, str, str]]
+            a list of `(sha, filename, patch)` tuples
+        """
+        if not patches:
+            return
+
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                self._create_table(cursor)
+                execute_values(
+                    cursor,
+                    f"""
+                    INSERT INTO {self.table_name} (sha, filename, patch)
+                    VALUES %s
+                    ON CONFLICT (sha, filename) DO UPDATE SET patch = EXCLUDED.patch
+                    """,
+                    [
+                        (
+                            sha,
+                            filename,
+                            psycopg2.Binary(zlib.compress(patch.encode("utf-8"))),
+                        )
+                        for sha, filename, patch in patches
+                    ],
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def load_patch(self, sha: str, filename: str) -> str | None:
+        """
+        load the patch of a file change, `None` if it was not saved
+        """
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT patch FROM {self.table_name}
+                    WHERE sha = %s AND filename = %s
+                    """,
+                    (sha, filename),
+                )
+                result = cursor.fetchone()
+        except psycopg2.errors.UndefinedTable:
+            result = None
+        finally:
+            connection.close()
+
+        if result is None:
+            return None
+        return zlib.decompress(bytes(result[0])).decode("utf-8")
+
+    def _create_table(self, cursor) -> None:
+        if self._table_created:
+            return
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                sha TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                patch BYTEA NOT NULL,
+                PRIMARY KEY (sha, filename)
+            );
+            """
+        )
+        self._table_created = True
+
+    def _connect(self):
+        load_dotenv()
+        return psycopg2.connect(
+            dbname=self.dbname,
+            user=os.getenv("POSTGRES_USER", ""),
+            password=os.getenv("POSTGRES_PASS", ""),
+            host=os.getenv("POSTGRES_HOST", ""),
+            port=os.getenv("POSTGRES_PORT", ""),
+        )
+
+
+def get_patch_store() -> FileSystemPatchStore | PostgresPatchStore | None:
+    """
+    get the patch store configured with the `GITHUB_PATCH_STORE` env variable
+
+    - `filesystem`: patches are saved under `GITHUB_PATCH_STORE_DIR`
+    - `postgres`: patches are saved within `GITHUB_PATCH_STORE_DB` database
+    - not set: patches are saved on the `GitHubFile` nodes
+
+    Returns
+    ---------
+    patch_store : FileSystemPatchStore | PostgresPatchStore | None
+        `None` if patches should stay within neo4j
+    """
+    load_dotenv()
+    store_type = os.getenv("GITHUB_PATCH_STORE", "").lower()
+
+    if store_type == "":
+        return None
+    elif store_type == "filesystem":
+        directory = os.getenv("GITHUB_PATCH_STORE_DIR")
+        if not directory:
+            raise ValueError("GITHUB_PATCH_STORE_DIR is not given in env")
+        return FileSystemPatchStore(directory)
+    elif store_type == "postgres":
+        dbname = os.getenv("GITHUB_PATCH_STORE_DB")
+        if not dbname:
+            raise ValueError("GITHUB_PATCH_STORE_DB is not given in env")
+        return PostgresPatchStore(dbname)
+    else:
+        raise ValueError(f"Not supported GITHUB_PATCH_STORE: {store_type}")
+
+
+def offload_file_changes_patches(
+    file_changes: list[dict],
+    patch_store: FileSystemPatchStore | PostgresPatchStore | None,
+) -> list[dict]:
+    """
+    save the patches of file changes within the patch store and keep just
+    the stats of file changes to be saved in neo4j
+
+    Parameters
+    ------------
+    file_changes : list[dict]
+        the file changes of a commit or a pull request
+    patch_store : FileSystemPatchStore | PostgresPatchStore | None
+        the store to save the patches in
+        if `None` the file changes are returned as they are
+
+    Returns
+    ---------
+    file_changes_stats : list[dict]
+        the file changes having just the stats properties
+    """
+    if patch_store is None:
+        return file_changes
+
+    patches = [
+        (file_change["sha"], file_change["filename"], file_change["patch"])
+        for file_change in file_changes
+        if file_change.get("patch")
+    ]
+    logging.info(f"Offloading {len(patches)} file change patches!")
+    patch_store.save_patches(patches)
+
+    file_changes_stats = [
+        {key: file_change[key] for key in FILE_CHANGE_STATS_KEYS if key in file_change}
+        for file_change in file_changes
+    ]
+    return file_changes_stats
@@ -1,5 +1,7 @@
 from .neo4j_connection import Neo4jConnection
 from .neo4j_enums import Node, Relationship
+from .patch_store import get_patch_store, offload_file_changes_patches
+from .transactions import execute_write_with_metrics
 from .utils import remove_nested_collections
 
 
@@ -68,7 +70,9 @@ def save_pull_request_to_neo4j(pr: dict, repository_id: str):
     """
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_pull_request_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (pr:{Node.PullRequest.value} {{id: $pr.id}})
@@ -96,7 +100,7 @@ def save_pull_request_to_neo4j(pr: dict, repository_id: str):
                 labels=labels,
                 requested_reviewers=requested_reviewers,
                 linked_issues=linked_issues,
-            )
+            ),
         )
     driver.close()
 
@@ -108,7 +112,9 @@ def save_review_to_neo4j(pr_id: int, review: dict):
     author = review.pop("user", None)
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_review_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MATCH (pr:{Node.PullRequest.value} {{id: $pr_id}})
@@ -122,7 +128,7 @@ def save_review_to_neo4j(pr_id: int, review: dict):
                 pr_id=int(pr_id),
                 author=author,
                 review=review,
-            )
+            ),
         )
 
     driver.close()
@@ -134,9 +140,13 @@ def save_pr_files_changes_to_neo4j(pr_id: int, repository_id: str, file_changes:
 
     # Not saving file changes without a sha
     file_changes = list(filter(lambda fc: fc.get("sha") is not None, file_changes))
+    # patches would be kept out of neo4j if a patch store is configured
+    file_changes = offload_file_changes_patches(file_changes, get_patch_store())
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_pr_files_changes_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MATCH (repo:{Node.Repository.value} {{id: $repository_id}}),
@@ -153,7 +163,7 @@ def save_pr_files_changes_to_neo4j(pr_id: int, repository_id: str, file_changes:
                 pr_id=int(pr_id),
                 repository_id=int(repository_id),
                 file_changes=file_changes,
-            )
+            ),
         )
 
     driver.close()
@@ -169,7 +179,9 @@ def save_commits_relation_to_pr(
         save_pull_request_to_neo4j(pr, repository_id)
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_commits_relation_to_pr",
             lambda tx: tx.run(
                 f"""
                 UNWIND $pull_requests as pr_data
@@ -182,7 +194,7 @@ def save_commits_relation_to_pr(
             """,
                 pull_requests=pull_requests,
                 commit_sha=commit_sha,
-            )
+            ),
         )
 
     driver.close()
@@ -1,17 +1,20 @@
 from .neo4j_connection import Neo4jConnection
 from .neo4j_enums import Node, Relationship
-from .utils import flat_map
+from .transactions import execute_write_with_metrics
+from .utils import FLAT_MAP_RULES, flat_map
 
 
 def save_repo_to_neo4j(repo: dict):
     owner = repo.pop("owner", None)
-    cleaned_repo = flat_map(repo)
+    cleaned_repo = flat_map(repo, **FLAT_MAP_RULES[Node.Repository])
 
     neo4jConnection = Neo4jConnection()
     driver = neo4jConnection.connect_neo4j()
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_repo_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (r:{Node.Repository.value} {{id: $repo.id}})
@@ -24,7 +27,7 @@ def save_repo_to_neo4j(repo: dict):
             """,
                 repo=cleaned_repo,
                 owner=owner,
-            )
+            ),
         )
     driver.close()
 
@@ -34,7 +37,9 @@ def save_repo_contributors_to_neo4j(contributor: dict, repository_id: str):
     driver = neo4jConnection.connect_neo4j()
 
     with driver.session() as session:
-        session.execute_write(
+        execute_write_with_metrics(
+            session,
+            "save_repo_contributors_to_neo4j",
             lambda tx: tx.run(
                 f"""
                 MERGE (ghu:{Node.GitHubUser.value} {{id: $member.id}})
@@ -47,6 +52,6 @@ def save_repo_contributors_to_neo4j(contributor: dict, repository_id: str):
             """,
                 member=contributor,
                 repository_id=repository_id,
-            )
+            ),
         )
     driver.close()
@@ -0,0 +1,49 @@
+import time
+from typing import Callable
+
+from github.metrics import GitHubETLMetrics
+from neo4j import Result, Session
+
+
+def execute_write_with_metrics(
+    session: Session, operation: str, transaction_function: Callable[..., Result]
+) -> None:
+    """
+    run a write transaction and record its duration and written entities
+
+    Parameters
+    ------------
+    session : neo4j.Session
+        the session to run the transaction in
+    operation : str
+        the name of the write operation to be used as the metrics label
+    transaction_function : Callable[..., Result]
+        the function running the query within the given transaction
+    """
+    metrics = GitHubETLMetrics()
+
+    def consume_transaction(tx):
+        return transaction_function(tx).consume().counters
+
+    start = time.perf_counter()
+    counters = session.execute_write(consume_transaction)
+
+    metrics.observe(
+        "github_neo4j_transaction_seconds",
+        time.perf_counter() - start,
+        operation=operation,
+    )
+    metrics.increment("github_neo4j_transactions_total", operation=operation)
+    metrics.increment(
+        "github_neo4j_nodes_created_total", counters.nodes_created, operation=operation
+    )
+    metrics.increment(
+        "github_neo4j_relationships_created_total",
+        counters.relationships_created,
+        operation=operation,
+    )
+    metrics.increment(
+        "github_neo4j_properties_set_total",
+        counters.properties_set,
+        operation=operation,
+    )
@@ -1,3 +1,6 @@
+from .neo4j_enums import Node
+
+
 def remove_nested_collections(data):
     """
     Removes any nested dictionaries or lists from the input dictionary.
@@ -19,15 +22,30 @@ def remove_nested_collections(data):
     return data
 
 
-def flat_map(obj):
+def flat_map(
+    obj,
+    max_depth: int | None = None,
+    allow_keys: set[str] | None = None,
+    deny_keys: set[str] | None = None,
+    skip_url_templates: bool = False,
+):
     """
     Function to iterate over an object and flat map its values if the value is an object or an array.
 
-    The function works recursively, handling nested dictionaries and lists. For each nested
-    element, it creates a flattened key based on the path to that element.
+    The function walks nested dictionaries and lists iteratively. For each nested
+    element, it creates a flattened key based on the path to that element, where the
+    key prefix of a container is built once and reused for all of its children.
 
     Parameters:
     obj (dict or list): The object to be flattened.
+    max_depth (int | None): The number of nested collection levels to flatten.
+        Collections nested deeper than that are dropped. `0` drops every nested
+        collection and `None` (default) flattens everything.
+    allow_keys (set[str] | None): Dotted paths to keep. A path is kept if it, or one
+        of its parents, is listed. `None` (default) keeps every path.
+    deny_keys (set[str] | None): Dotted paths to drop, together with their children.
+    skip_url_templates (bool): Drop the `*_url` fields holding a URI template
+        (e.g. `https://api.github.com/users/x/following{/other_user}`).
 
     Returns:
     dict: A dictionary with flattened keys and values.
@@ -56,30 +74,98 @@ def flat_map(obj):
     }
     ```
     """
-    if isinstance(obj, dict):
-        # For dictionaries, iterate through each key-value pair
-        flat = {}
-        for key, value in obj.items():
-            # Recursively flat map the value if it's a dictionary or list
-            if isinstance(value, (dict, list)):
-                for inner_key, inner_value in flat_map(value).items():
-                    # Combine the outer key with the inner key
-                    flat[f"{key}.{inner_key}"] = inner_value
-            else:
-                flat[key] = value
-        return flat
-    elif isinstance(obj, list):
-        # For lists, iterate through each element
-        flat = {}
-        for index, value in enumerate(obj):
-            # Recursively flat map the value if it's a dictionary or list
-            if isinstance(value, (dict, list)):
-                for inner_key, inner_value in flat_map(value).items():
-                    # Use the index as the key
-                    flat[f"{index}.{inner_key}"] = inner_value
-            else:
-                flat[index] = value
-        return flat
-    else:
+    if not isinstance(obj, (dict, list)):
         # If the object is neither a dictionary nor a list, return it as is
         return {0: obj}
+
+    deny_keys = deny_keys or set()
+    # the parents of the allowed paths must be walked to reach them
+    allow_parents: set[str] = set()
+    if allow_keys is not None:
+        for key in allow_keys:
+            parts = key.split(".")
+            for i in range(1, len(parts)):
+                allow_parents.add(".".join(parts[:i]))
+
+    flat = {}
+    # each entry is (items iterator, key prefix, depth, whether the path is allowed)
+    stack = [(_collection_items(obj), "", 0, allow_keys is None)]
+    while stack:
+        items, prefix, depth, allowed = stack[-1]
+        for key, value in items:
+            # top level list indices are kept as integers
+            path = f"{prefix}{key}" if prefix else key
+            if path in deny_keys:
+                continue
+
+            is_allowed = allowed or path in allow_keys
+            is_collection = isinstance(value, (dict, list))
+            if not is_allowed and not (is_collection and path in allow_parents):
+                continue
+
+            if is_collection:
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                stack.append(
+                    (_collection_items(value), f"{path}.", depth + 1, is_allowed)
+                )
+                # continue with the nested collection, then come back to this one
+                break
+
+            if (
+                skip_url_templates
+                and isinstance(value, str)
+                and str(key).endswith("url")
+                and "{" in value
+            ):
+                continue
+
+            flat[path] = value
+        else:
+            stack.pop()
+
+    return flat
+
+
+def _collection_items(obj):
+    """
+    iterate over (key, value) pairs of a dictionary or (index, value) pairs of a list
+    """
+    if isinstance(obj, dict):
+        return iter(obj.items())
+    return enumerate(obj)
+
+
+# The flattening rules of the nodes saved using `flat_map`
+# the keys are the dotted paths of the flattened properties
+FLAT_MAP_RULES: dict[Node, dict] = {
+    Node.Commit: {
+        # the `parents.0.html_url` is used as the commit url in hivemind
+        "allow_keys": {
+            "sha",
+            "node_id",
+            "url",
+            "html_url",
+            "comments_url",
+            "commit",
+            "parents.0.html_url",
+        },
+        "deny_keys": {"commit.tree"},
+        "max_depth": 2,
+        "skip_url_templates": True,
+    },
+    Node.Comment: {
+        "deny_keys": {"reactions.url", "performed_via_github_app"},
+        "max_depth": 1,
+        "skip_url_templates": True,
+    },
+    Node.ReviewComment: {
+        "deny_keys": {"reactions.url", "_links"},
+        "max_depth": 1,
+        "skip_url_templates": True,
+    },
+    Node.Repository: {
+        "max_depth": 1,
+        "skip_url_templates": True,
+    },
+}
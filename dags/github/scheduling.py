@@ -0,0 +1,81 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from dateutil import parser
+
+
+def get_repo_expected_work(repo: dict, now: datetime | None = None) -> float:
+    """
+    estimate the relative extraction work of a repo using its metadata
+
+    the open issues count (that includes open PRs) estimates the PRs,
+    the repo size estimates the commits volume, and the repos pushed
+    recently are expected to have more new data
+
+    Parameters
+    ------------
+    repo : dict
+        the repo object returned from the github api
+    now : datetime | None
+        the time to compute the repo activity recency from
+        default is the current time
+
+    Returns
+    ---------
+    expected_work : float
+        a non-negative score, higher means more work
+    """
+    now = now or datetime.now(tz=timezone.utc)
+
+    open_items = repo.get("open_issues_count") or 0
+    size = repo.get("size") or 0
+
+    days_since_push = 365.0
+    if repo.get("pushed_at"):
+        pushed_at = parser.parse(repo["pushed_at"])
+        days_since_push = max((now - pushed_at).total_seconds() / 86400, 0)
+
+    # the recently pushed repos have their weight doubled at most
+    recency = 1 + 1 / (1 + days_since_push / 7)
+    return (1 + math.log1p(open_items)) * (1 + math.log1p(size)) * recency
+
+
+def order_repos_by_expected_work(
+    repos: list[dict], now: datetime | None = None
+) -> list[dict]:
+    """
+    order the repos so the heaviest ones would start first while
+    the repos of different organizations are interleaved, so one large
+    organization would not take all the first mapped task slots
+
+    Parameters
+    ------------
+    repos : list[dict]
+        the data of the repos, each having the `repo` and `organization_basic` keys
+    now : datetime | None
+        the time to compute the repos activity recency from
+
+    Returns
+    ---------
+    ordered_repos : list[dict]
+        the same repos data, in the order to be processed
+    """
+    org_repos: dict[str, list[tuple[float, dict]]] = defaultdict(list)
+    for data in repos:
+        org_name = data["organization_basic"]["name"]
+        org_repos[org_name].append((get_repo_expected_work(data["repo"], now), data))
+
+    for items in org_repos.values():
+        items.sort(key=lambda item: item[0], reverse=True)
+
+    # round-robin over the organizations, the org having the heavier next repo first
+    ordered_repos = []
+    queues = list(org_repos.values())
+    while queues:
+        queues.sort(key=lambda items: items[0][0], reverse=True)
+        for items in queues:
+            ordered_repos.append(items.pop(0)[1])
+        queues = [items for items in queues if items]
+
+    return ordered_repos
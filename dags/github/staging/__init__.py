@@ -0,0 +1,7 @@
+# flake8: noqa
+from .xcom_staging import (
+    cleanup_staged_runs,
+    is_xcom_staging_enabled,
+    resolve_staged_data,
+    stage_task_output,
+)
@@ -0,0 +1,192 @@
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Sequence
+
+from dotenv import load_dotenv
+
+# the key marking a staged reference within the xcom values
+STAGED_KEY = "__staged__"
+
+
+class StagedDict(dict):
+    """
+    a dict loaded from a staged reference, keeping the staged location of its
+    lists, so the lists passed through unchanged are not written again
+    a location is the `[path, key]` of the value within a staged file
+    """
+
+    def __init__(self, data: dict, staged_paths: dict[str, list[str]]) -> None:
+        super().__init__(data)
+        self.staged_paths = staged_paths
+
+
+def is_xcom_staging_enabled() -> bool:
+    """
+    check whether the `GITHUB_XCOM_STAGING` env variable is enabled
+    """
+    load_dotenv()
+    return os.getenv("GITHUB_XCOM_STAGING", "false").lower() == "true"
+
+
+def get_staging_dir() -> str:
+    """
+    get the root directory of staged files from `GITHUB_XCOM_STAGING_DIR` env
+
+    Returns
+    ---------
+    staging_dir : str
+        the directory to stage the task outputs in
+    """
+    load_dotenv()
+    staging_dir = os.getenv("GITHUB_XCOM_STAGING_DIR")
+    if not staging_dir:
+        raise ValueError("GITHUB_XCOM_STAGING_DIR is not given in env")
+    return staging_dir
+
+
+def stage_task_output(output, inputs: list, run_dir: str, prefix: str):
+    """
+    write the task output into files and return a small reference to be
+    passed through xcom. the non-scalar values of a dict are written once
+    into one file, and the scalar values are kept within the reference.
+    lists of the inputs that are passed through to the output as they are,
+    would keep their already staged location
+
+    Note: the staged values are treated as immutable, a task changing a value
+    should return a new object instead of updating it in place
+
+    Parameters
+    ------------
+    output : Any
+        the output of a task. dicts and lists of dicts are staged and
+        the other types are returned as they are
+    inputs : list
+        the resolved inputs of the task
+    run_dir : str
+        the directory of the dag run within the staging directory
+    prefix : str
+        a unique prefix for the files of the task instance
+
+    Returns
+    ---------
+    reference : Any
+        the reference to the staged output
+    """
+    known_paths: dict[int, list[str]] = {}
+    for value in inputs:
+        for staged in value if _is_sequence(value) else [value]:
+            if isinstance(staged, StagedDict):
+                for key, location in staged.staged_paths.items():
+                    known_paths[id(staged[key])] = location
+
+    if isinstance(output, dict):
+        return _stage_dict(output, known_paths, run_dir, prefix)
+    elif _is_sequence(output) and all(isinstance(item, dict) for item in output):
+        return [
+            _stage_dict(item, known_paths, run_dir, f"{prefix}.{idx}")
+            for idx, item in enumerate(output)
+        ]
+    else:
+        return output
+
+
+def resolve_staged_data(value):
+    """
+    load the staged data of a reference
+
+    Parameters
+    ------------
+    value : Any
+        a staged reference, a sequence of them or any other value
+        e.g. the `LazyXComAccess` of the mapped tasks outputs
+
+    Returns
+    ---------
+    data : Any
+        the loaded data of the references. other values are returned as they are
+    """
+    if _is_sequence(value):
+        return [resolve_staged_data(item) for item in value]
+    elif isinstance(value, dict) and STAGED_KEY in value:
+        staging_dir = get_staging_dir()
+        staged = value[STAGED_KEY]
+
+        files: dict[str, dict] = {}
+        data = dict(staged["values"])
+        for key, (path, file_key) in staged["paths"].items():
+            if path not in files:
+                with gzip.open(os.path.join(staging_dir, path), "rt") as file:
+                    files[path] = json.load(file)
+            data[key] = files[path][file_key]
+
+        staged_paths = {
+            key: location
+            for key, location in staged["paths"].items()
+            if isinstance(data[key], list)
+        }
+        return StagedDict(data, staged_paths=staged_paths)
+    else:
+        return value
+
+
+def cleanup_staged_runs(retention_days: int) -> None:
+    """
+    remove the staged files of the dag runs older than the retention days
+
+    Parameters
+    ------------
+    retention_days : int
+        the days to keep the staged files of a run
+    """
+    staging_dir = get_staging_dir()
+    if not os.path.exists(staging_dir):
+        return
+
+    threshold = time.time() - retention_days * 24 * 3600
+    for run_dir in os.listdir(staging_dir):
+        path = os.path.join(staging_dir, run_dir)
+        if os.path.isdir(path) and os.path.getmtime(path) < threshold:
+            logging.info(f"Removing staged files of run: {run_dir}")
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _is_sequence(value) -> bool:
+    """
+    whether the value is a list-like sequence, not a string
+    """
+    return isinstance(value, Sequence) and not isinstance(
+        value, (str, bytes, bytearray)
+    )
+
+
+def _stage_dict(
+    data: dict, known_paths: dict[int, list[str]], run_dir: str, prefix: str
+) -> dict:
+    values = {}
+    paths = {}
+    new_values = {}
+    for key, value in data.items():
+        if value is None or isinstance(value, (str, int, float, bool)):
+            values[key] = value
+        elif id(value) in known_paths:
+            paths[key] = known_paths[id(value)]
+        else:
+            new_values[key] = value
+
+    if new_values:
+        staging_dir = get_staging_dir()
+        os.makedirs(os.path.join(staging_dir, run_dir), exist_ok=True)
+
+        path = os.path.join(run_dir, f"{prefix}.json.gz")
+        with gzip.open(os.path.join(staging_dir, path), "wt") as file:
+            json.dump(new_values, file)
+        for key, value in new_values.items():
+            paths[key] = [path, key]
+            if isinstance(value, list):
+                known_paths[id(value)] = [path, key]
+
+    return {STAGED_KEY: {"values": values, "paths": paths}}
@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from github.neo4j_storage import BulkImportStager, prepare_admin_import
+
+
+class TestBulkImportStager(unittest.TestCase):
+    def setUp(self):
+        self.import_dir = tempfile.TemporaryDirectory()
+        self.env_patch = patch.dict(
+            os.environ, {"NEO4J_IMPORT_DIR": self.import_dir.name}
+        )
+        self.env_patch.start()
+
+    def tearDown(self):
+        self.env_patch.stop()
+        self.import_dir.cleanup()
+
+    def read_rows(self, file_name: str) -> list[dict]:
+        path = os.path.join(self.import_dir.name, "run1", file_name)
+        with open(path, newline="", encoding="utf-8") as file:
+            return list(csv.DictReader(file))
+
+    def test_stage_commit_files_changes(self):
+        stager = BulkImportStager(run_dir="run1", prefix="task_0")
+        stager.stage_commit_files_changes(
+            commit_sha="abc",
+            repository_id=1,
+            file_changes=[
+                {"sha": "f1", "filename": "a.py", "patch": 'say "hi" \\'},
+                {"sha": None, "filename": "b.py"},
+            ],
+        )
+        stager.close()
+
+        nodes = self.read_rows("nodes.GitHubFile.task_0.csv")
+        self.assertEqual(len(nodes), 1)
+        self.assertEqual(json.loads(nodes[0]["key"]), {"sha": "f1", "filename": "a.py"})
+        self.assertEqual(json.loads(nodes[0]["properties"])["patch"], 'say "hi" \\')
+        # no escaped quotes that could break the neo4j csv reader
+        self.assertNotIn('\\"', nodes[0]["properties"])
+
+        changed = self.read_rows("rels.CHANGED.GitHubCommit.GitHubFile.task_0.csv")
+        self.assertEqual(json.loads(changed[0]["start"]), {"sha": "abc"})
+        self.assertEqual(
+            json.loads(changed[0]["end"]), {"sha": "f1", "filename": "a.py"}
+        )
+
+        is_on = self.read_rows("rels.IS_ON.GitHubFile.GitHubRepository.task_0.csv")
+        self.assertEqual(json.loads(is_on[0]["end"]), {"id": 1})
+
+    def test_stage_commit(self):
+        stager = BulkImportStager(run_dir="run1", prefix="task_1")
+        stager.stage_commit(
+            commit={
+                "sha": "abc",
+                "commit": {"message": "msg"},
+                "author": {"id": 10, "login": "author"},
+                "committer": None,
+            },
+            repository_id=1,
+        )
+        stager.close()
+
+        commits = self.read_rows("nodes.GitHubCommit.task_1.csv")
+        self.assertEqual(
+            json.loads(commits[0]["properties"]),
+            {"sha": "abc", "commit.message": "msg", "repository_id": 1},
+        )
+        users = self.read_rows("nodes.GitHubUser.task_1.csv")
+        self.assertEqual(len(users), 1)
+        authored = self.read_rows("rels.AUTHORED_BY.GitHubUser.GitHubCommit.task_1.csv")
+        self.assertEqual(json.loads(authored[0]["start"]), {"id": 10})
+
+    def test_prepare_admin_import(self):
+        stager = BulkImportStager(run_dir="run1", prefix="task_2")
+        stager.stage_review(pr_id=5, review={"user": {"id": 10}, "state": "APPROVED"})
+        stager.stage_review(pr_id=6, review={"user": {"id": 10}, "state": "COMMENTED"})
+        stager.close()
+
+        command = prepare_admin_import(run_dir="run1")
+        self.assertTrue(command.startswith("neo4j-admin database import full"))
+
+        users = self.read_rows("admin/nodes.GitHubUser.csv")
+        # the duplicate users are merged
+        self.assertEqual(
+            users,
+            [
+                {
+                    "importId:ID(GitHubUser)": "10",
+                    ":LABEL": "GitHubUser",
+                    "id:long": "10",
+                }
+            ],
+        )
+        reviews = self.read_rows(
+            "admin/rels.REVIEWED.GitHubUser.GitHubPullRequest.task_2.csv"
+        )
+        self.assertEqual(len(reviews), 2)
+        self.assertEqual(reviews[0]["state:string"], "APPROVED")
@@ -0,0 +1,112 @@
+import unittest
+
+from github.neo4j_storage.neo4j_enums import Node
+from github.neo4j_storage.utils import FLAT_MAP_RULES, flat_map
+
+
+class TestFlatMap(unittest.TestCase):
+    def test_flat_map_nested(self):
+        data = {
+            "name": "John",
+            "address": {"street": "Main St", "city": "Springfield"},
+            "phones": ["123-456-7890", "987-654-3210"],
+        }
+        flat = flat_map(data)
+        self.assertEqual(
+            flat,
+            {
+                "name": "John",
+                "address.street": "Main St",
+                "address.city": "Springfield",
+                "phones.0": "123-456-7890",
+                "phones.1": "987-654-3210",
+            },
+        )
+
+    def test_flat_map_list_and_scalar(self):
+        self.assertEqual(flat_map(["a", {"b": 1}]), {0: "a", "1.b": 1})
+        self.assertEqual(flat_map("value"), {0: "value"})
+
+    def test_flat_map_keeps_order(self):
+        data = {"a": 1, "b": {"c": 2, "d": {"e": 3}}, "f": 4}
+        self.assertEqual(list(flat_map(data).keys()), ["a", "b.c", "b.d.e", "f"])
+
+    def test_flat_map_max_depth(self):
+        data = {"a": 1, "b": {"c": 2, "d": {"e": 3}}, "f": [1, 2]}
+        self.assertEqual(flat_map(data, max_depth=0), {"a": 1})
+        self.assertEqual(
+            flat_map(data, max_depth=1), {"a": 1, "b.c": 2, "f.0": 1, "f.1": 2}
+        )
+
+    def test_flat_map_deny_keys(self):
+        data = {"a": 1, "b": {"c": 2, "d": {"e": 3}}}
+        self.assertEqual(flat_map(data, deny_keys={"b.d"}), {"a": 1, "b.c": 2})
+
+    def test_flat_map_allow_keys(self):
+        data = {
+            "sha": "abc",
+            "parents": [
+                {"sha": "p0", "html_url": "https://github.com/p0"},
+                {"sha": "p1", "html_url": "https://github.com/p1"},
+            ],
+            "commit": {"message": "msg", "author": {"name": "x"}},
+        }
+        flat = flat_map(data, allow_keys={"sha", "commit", "parents.0.html_url"})
+        self.assertEqual(
+            flat,
+            {
+                "sha": "abc",
+                "parents.0.html_url": "https://github.com/p0",
+                "commit.message": "msg",
+                "commit.author.name": "x",
+            },
+        )
+
+    def test_flat_map_skip_url_templates(self):
+        data = {
+            "url": "https://api.github.com/users/x",
+            "following_url": "https://api.github.com/users/x/following{/other_user}",
+            "description": "curly {braces}",
+        }
+        self.assertEqual(
+            flat_map(data, skip_url_templates=True),
+            {
+                "url": "https://api.github.com/users/x",
+                "description": "curly {braces}",
+            },
+        )
+
+    def test_flat_map_commit_rules(self):
+        commit = {
+            "sha": "abc",
+            "node_id": "node",
+            "url": "https://api.github.com/repos/o/r/commits/abc",
+            "commit": {
+                "author": {"name": "x", "date": "2024-01-01T00:00:00Z"},
+                "message": "msg",
+                "tree": {"sha": "tree", "url": "https://api.github.com/tree"},
+                "verification": {"verified": False, "reason": "unsigned"},
+            },
+            "parents": [
+                {
+                    "sha": "p0",
+                    "url": "https://api.github.com/repos/o/r/commits/p0",
+                    "html_url": "https://github.com/o/r/commit/p0",
+                }
+            ],
+        }
+        flat = flat_map(commit, **FLAT_MAP_RULES[Node.Commit])
+        self.assertEqual(
+            flat,
+            {
+                "sha": "abc",
+                "node_id": "node",
+                "url": "https://api.github.com/repos/o/r/commits/abc",
+                "commit.author.name": "x",
+                "commit.author.date": "2024-01-01T00:00:00Z",
+                "commit.message": "msg",
+                "commit.verification.verified": False,
+                "commit.verification.reason": "unsigned",
+                "parents.0.html_url": "https://github.com/o/r/commit/p0",
+            },
+        )
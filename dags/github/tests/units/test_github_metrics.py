@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from github.metrics import (
+    GitHubETLMetrics,
+    estimate_percentile,
+    export_metrics,
+    normalize_endpoint,
+    summarize_run_metrics,
+    to_prometheus_text,
+)
+from github.neo4j_storage.transactions import execute_write_with_metrics
+
+
+class TestGitHubETLMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = GitHubETLMetrics()
+        self.metrics.reset()
+
+    def test_normalize_endpoint(self):
+        self.assertEqual(
+            normalize_endpoint("https://api.github.com/repos/org/repo/pulls/12/files"),
+            "/repos/{owner}/{repo}/pulls/{id}/files",
+        )
+        self.assertEqual(
+            normalize_endpoint(
+                "https://api.github.com/repos/org/repo/commits/"
+                "0123456789abcdef0123456789abcdef01234567/pulls"
+            ),
+            "/repos/{owner}/{repo}/commits/{sha}/pulls",
+        )
+        self.assertEqual(
+            normalize_endpoint("https://api.github.com/orgs/org/members?page=2"),
+            "/orgs/{name}/members",
+        )
+
+    def test_counters_and_histograms_with_context(self):
+        self.metrics.set_context(task="extract_commits", repo="org/repo")
+        self.metrics.increment("github_api_requests_total", endpoint="/a", status=200)
+        self.metrics.increment("github_api_requests_total", endpoint="/a", status=200)
+        self.metrics.observe("github_api_request_seconds", 0.2, endpoint="/a")
+        self.metrics.observe("github_api_request_seconds", 100, endpoint="/a")
+
+        metrics = self.metrics.to_dict()
+        self.assertEqual(
+            metrics["counters"],
+            [
+                {
+                    "name": "github_api_requests_total",
+                    "labels": {
+                        "endpoint": "/a",
+                        "repo": "org/repo",
+                        "status": "200",
+                        "task": "extract_commits",
+                    },
+                    "value": 2,
+                }
+            ],
+        )
+        buckets = metrics["histograms"][0]["buckets"]
+        self.assertEqual(sum(buckets), 2)
+        self.assertEqual(buckets[2], 1)
+        self.assertEqual(buckets[-1], 1)
+
+        text = to_prometheus_text(metrics)
+        self.assertIn(
+            'github_api_request_seconds_bucket{endpoint="/a",repo="org/repo",'
+            'task="extract_commits",le="+Inf"} 2',
+            text,
+        )
+
+    def test_estimate_percentile(self):
+        # 9 values within 0.1s and one more than all buckets
+        buckets = [0, 9, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+        self.assertEqual(estimate_percentile(buckets, 50), 0.1)
+        self.assertEqual(estimate_percentile(buckets, 99), float("inf"))
+        self.assertEqual(estimate_percentile([0] * 11, 50), 0.0)
+
+    def test_export_and_summarize(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            with patch.dict(os.environ, {"GITHUB_METRICS_DIR": metrics_dir}):
+                # two mapped instances of the same task
+                for map_index, transactions in enumerate([3, 1]):
+                    self.metrics.reset()
+                    self.metrics.set_context(task="load_commits")
+                    self.metrics.increment(
+                        "github_neo4j_transactions_total", transactions
+                    )
+                    self.metrics.observe("github_neo4j_transaction_seconds", 0.3)
+                    export_metrics(run_dir="run1", prefix=f"load_commits_{map_index}")
+
+                self.assertTrue(
+                    os.path.exists(
+                        os.path.join(metrics_dir, "run1", "load_commits_1.prom")
+                    )
+                )
+                summary = summarize_run_metrics(run_dir="run1")
+
+        self.assertEqual(summary["load_commits"]["github_neo4j_transactions_total"], 4)
+        self.assertEqual(
+            summary["load_commits"]["github_neo4j_transaction_seconds"]["p50"], 0.5
+        )
+
+    def test_execute_write_with_metrics(self):
+        counters = MagicMock(
+            nodes_created=2, relationships_created=1, properties_set=10
+        )
+        session = MagicMock()
+        session.execute_write.side_effect = lambda function: function(MagicMock())
+        transaction_function = MagicMock()
+        transaction_function.return_value.consume.return_value.counters = counters
+
+        execute_write_with_metrics(session, "save_label_to_neo4j", transaction_function)
+
+        values = {
+            counter["name"]: counter["value"]
+            for counter in self.metrics.to_dict()["counters"]
+        }
+        self.assertEqual(values["github_neo4j_transactions_total"], 1)
+        self.assertEqual(values["github_neo4j_nodes_created_total"], 2)
+        self.assertEqual(values["github_neo4j_relationships_created_total"], 1)
+        self.assertEqual(values["github_neo4j_properties_set_total"], 10)
@@ -0,0 +1,58 @@
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from github.github_api_helpers import map_in_threads, raise_failed_results
+
+
+class TestMapInThreads(unittest.TestCase):
+    def test_results_keep_items_order(self):
+        def slow_square(item: int) -> int:
+            # the first items finish last
+            time.sleep((5 - item) * 0.01)
+            return item * item
+
+        results = map_in_threads(slow_square, [1, 2, 3, 4], description="numbers")
+
+        self.assertEqual([result.item for result in results], [1, 2, 3, 4])
+        self.assertEqual([result.value for result in results], [1, 4, 9, 16])
+        self.assertTrue(all(result.error is None for result in results))
+
+    def test_failed_items_do_not_stop_the_others(self):
+        def check(item: int) -> int:
+            if item == 2:
+                raise ValueError("bad item")
+            return item
+
+        results = map_in_threads(check, [1, 2, 3])
+
+        self.assertEqual([result.value for result in results], [1, None, 3])
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertIsNone(results[2].error)
+
+    def test_empty_items(self):
+        self.assertEqual(map_in_threads(lambda item: item, []), [])
+
+    def test_raise_failed_results(self):
+        def check(item: int) -> int:
+            if item == 2:
+                raise ValueError("bad item")
+            return item
+
+        results = map_in_threads(check, [1, 2, 3, 4], description="numbers")
+        with patch.dict(os.environ, {"GITHUB_MAX_FAILED_ITEMS_RATIO": ""}):
+            with self.assertRaises(RuntimeError) as context:
+                raise_failed_results(results, description="numbers")
+        self.assertIn("1/4 numbers failed", str(context.exception))
+        self.assertIsInstance(context.exception.__cause__, ValueError)
+
+        # failures within the allowed ratio
+        with patch.dict(os.environ, {"GITHUB_MAX_FAILED_ITEMS_RATIO": "0.25"}):
+            raise_failed_results(results, description="numbers")
+
+    def test_raise_no_failed_results(self):
+        results = map_in_threads(lambda item: item, [1, 2])
+        raise_failed_results(results)
+        raise_failed_results([])
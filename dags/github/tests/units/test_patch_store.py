@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from github.neo4j_storage import (
+    FileSystemPatchStore,
+    PostgresPatchStore,
+    get_patch_store,
+    offload_file_changes_patches,
+)
+
+
+class TestPatchStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_filesystem_store_roundtrip(self):
+        store = FileSystemPatchStore(self.directory.name)
+        store.save_patches([("abc", "src/a.py", "@@ -1 +1 @@\n-a\n+b")])
+
+        self.assertEqual(store.load_patch("abc", "src/a.py"), "@@ -1 +1 @@\n-a\n+b")
+        self.assertIsNone(store.load_patch("abc", "src/b.py"))
+
+    def test_offload_file_changes_patches(self):
+        store = FileSystemPatchStore(self.directory.name)
+        file_changes = [
+            {
+                "sha": "abc",
+                "filename": "a.py",
+                "status": "modified",
+                "additions": 1,
+                "deletions": 1,
+                "changes": 2,
+                "blob_url": "https://github.com/o/r/blob/abc/a.py",
+                "patch": "@@ -1 +1 @@",
+            },
+            {"sha": "def", "filename": "b.bin", "status": "added"},
+        ]
+        stats = offload_file_changes_patches(file_changes, store)
+
+        self.assertEqual(
+            stats,
+            [
+                {
+                    "sha": "abc",
+                    "filename": "a.py",
+                    "status": "modified",
+                    "additions": 1,
+                    "deletions": 1,
+                    "changes": 2,
+                },
+                {"sha": "def", "filename": "b.bin", "status": "added"},
+            ],
+        )
+        self.assertEqual(store.load_patch("abc", "a.py"), "@@ -1 +1 @@")
+
+    def test_offload_without_store(self):
+        file_changes = [{"sha": "abc", "filename": "a.py", "patch": "@@ -1 +1 @@"}]
+        self.assertEqual(offload_file_changes_patches(file_changes, None), file_changes)
+
+    def test_get_patch_store(self):
+        with patch.dict(os.environ, {"GITHUB_PATCH_STORE": ""}):
+            self.assertIsNone(get_patch_store())
+
+        with patch.dict(
+            os.environ,
+            {
+                "GITHUB_PATCH_STORE": "filesystem",
+                "GITHUB_PATCH_STORE_DIR": self.directory.name,
+            },
+        ):
+            self.assertIsInstance(get_patch_store(), FileSystemPatchStore)
+
+        with patch.dict(
+            os.environ,
+            {"GITHUB_PATCH_STORE": "postgres", "GITHUB_PATCH_STORE_DB": "github"},
+        ):
+            self.assertIsInstance(get_patch_store(), PostgresPatchStore)
+
+        with patch.dict(os.environ, {"GITHUB_PATCH_STORE": "s3"}):
+            with self.assertRaises(ValueError):
+                get_patch_store()
@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime, timezone
+
+from github.scheduling import get_repo_expected_work, order_repos_by_expected_work
+
+
+class TestReposScheduling(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2024, 1, 31, tzinfo=timezone.utc)
+
+    def prepare_repo(self, org: str, name: str, open_issues: int, size: int) -> dict:
+        return {
+            "organization_basic": {"name": org},
+            "repo": {
+                "name": name,
+                "open_issues_count": open_issues,
+                "size": size,
+                "pushed_at": "2024-01-01T00:00:00Z",
+            },
+        }
+
+    def test_expected_work_of_active_repo(self):
+        idle = {"open_issues_count": 5, "size": 1000, "pushed_at": "2020-01-01T00:00Z"}
+        active = {**idle, "pushed_at": "2024-01-30T00:00:00Z"}
+        busy = {**idle, "open_issues_count": 500}
+
+        self.assertGreater(
+            get_repo_expected_work(active, self.now),
+            get_repo_expected_work(idle, self.now),
+        )
+        self.assertGreater(
+            get_repo_expected_work(busy, self.now),
+            get_repo_expected_work(idle, self.now),
+        )
+        self.assertGreater(get_repo_expected_work({}, self.now), 0)
+
+    def test_order_repos(self):
+        repos = [
+            self.prepare_repo("org1", "small", open_issues=0, size=10),
+            self.prepare_repo("org1", "large", open_issues=200, size=100000),
+            self.prepare_repo("org1", "medium", open_issues=20, size=5000),
+            self.prepare_repo("org2", "only", open_issues=10, size=1000),
+        ]
+        ordered = order_repos_by_expected_work(repos, now=self.now)
+
+        self.assertEqual(
+            [data["repo"]["name"] for data in ordered],
+            ["large", "only", "medium", "small"],
+        )
+
+    def test_order_empty_repos(self):
+        self.assertEqual(order_repos_by_expected_work([]), [])
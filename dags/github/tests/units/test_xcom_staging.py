@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+from collections.abc import Sequence
+from unittest.mock import patch
+
+from github.staging import resolve_staged_data, stage_task_output
+
+
+class LazySequence(Sequence):
+    """
+    a sequence not being a list, like airflow `LazyXComAccess`
+    """
+
+    def __init__(self, items: list) -> None:
+        self.items = items
+
+    def __getitem__(self, idx):
+        return self.items[idx]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class TestXComStaging(unittest.TestCase):
+    def setUp(self):
+        self.staging_dir = tempfile.TemporaryDirectory()
+        self.env_patch = patch.dict(
+            os.environ, {"GITHUB_XCOM_STAGING_DIR": self.staging_dir.name}
+        )
+        self.env_patch.start()
+
+    def tearDown(self):
+        self.env_patch.stop()
+        self.staging_dir.cleanup()
+
+    def list_staged_files(self) -> list[str]:
+        return sorted(os.listdir(os.path.join(self.staging_dir.name, "run1")))
+
+    def test_stage_and_resolve(self):
+        data = {"id": 1, "name": "repo", "owner": {"id": 2}, "prs": [{"id": 3}]}
+        reference = stage_task_output(
+            data, inputs=[], run_dir="run1", prefix="extract_0"
+        )
+
+        path = os.path.join("run1", "extract_0.json.gz")
+        self.assertEqual(
+            reference,
+            {
+                "__staged__": {
+                    "values": {"id": 1, "name": "repo"},
+                    "paths": {"owner": [path, "owner"], "prs": [path, "prs"]},
+                }
+            },
+        )
+        # one file for the whole output
+        self.assertEqual(self.list_staged_files(), ["extract_0.json.gz"])
+        self.assertEqual(resolve_staged_data(reference), data)
+
+    def test_scalars_not_staged(self):
+        reference = stage_task_output(
+            {"id": 1, "name": "repo", "archived": False, "description": None},
+            inputs=[],
+            run_dir="run1",
+            prefix="extract_0",
+        )
+
+        self.assertEqual(reference["__staged__"]["paths"], {})
+        self.assertFalse(os.path.exists(os.path.join(self.staging_dir.name, "run1")))
+        self.assertEqual(
+            resolve_staged_data(reference),
+            {"id": 1, "name": "repo", "archived": False, "description": None},
+        )
+
+    def test_passed_through_lists_are_not_staged_again(self):
+        reference = stage_task_output(
+            {"id": 1, "prs": [{"id": 2}]},
+            inputs=[],
+            run_dir="run1",
+            prefix="extract_0",
+        )
+        data = resolve_staged_data(reference)
+
+        new_reference = stage_task_output(
+            {"issues": [{"id": 3}], "pull_requests": data["prs"], "id": data["id"]},
+            inputs=[data],
+            run_dir="run1",
+            prefix="extract_issues_0",
+        )
+
+        self.assertEqual(
+            new_reference["__staged__"]["paths"]["pull_requests"],
+            reference["__staged__"]["paths"]["prs"],
+        )
+        self.assertEqual(
+            self.list_staged_files(),
+            ["extract_0.json.gz", "extract_issues_0.json.gz"],
+        )
+        self.assertEqual(
+            resolve_staged_data(new_reference),
+            {"issues": [{"id": 3}], "pull_requests": [{"id": 2}], "id": 1},
+        )
+
+    def test_stage_list_output(self):
+        references = stage_task_output(
+            [{"repo": {"id": 1}}, {"repo": {"id": 2}}],
+            inputs=[],
+            run_dir="run1",
+            prefix="repos",
+        )
+
+        self.assertEqual(len(references), 2)
+        self.assertEqual(
+            resolve_staged_data(references), [{"repo": {"id": 1}}, {"repo": {"id": 2}}]
+        )
+
+    def test_resolve_non_list_sequence(self):
+        references = stage_task_output(
+            [{"organization_basic": [{"id": 1}]}, {"organization_basic": [{"id": 2}]}],
+            inputs=[],
+            run_dir="run1",
+            prefix="orgs",
+        )
+        organizations = resolve_staged_data(LazySequence(references))
+
+        self.assertEqual(
+            [org["organization_basic"] for org in organizations],
+            [[{"id": 1}], [{"id": 2}]],
+        )
+
+        # the resolved values of the sequence are not staged again
+        new_reference = stage_task_output(
+            {"org": organizations[0]["organization_basic"]},
+            inputs=[LazySequence(organizations)],
+            run_dir="run1",
+            prefix="repos",
+        )
+        self.assertEqual(
+            new_reference["__staged__"]["paths"]["org"],
+            references[0]["__staged__"]["paths"]["organization_basic"],
+        )
+
+    def test_not_staged_values(self):
+        self.assertEqual(
+            stage_task_output("value", inputs=[], run_dir="run1", prefix="task"),
+            "value",
+        )
+        self.assertEqual(resolve_staged_data({"id": 1}), {"id": 1})
@@ -8,14 +8,20 @@ from hivemind_etl_helpers.src.db.discord.find_guild_id import (
     find_guild_id_by_platform_id,
 )
 from hivemind_etl_helpers.src.document_node_parser import configure_node_parser
-from hivemind_etl_helpers.src.utils.sort_summary_docs import sort_summaries_daily
+from hivemind_etl_helpers.src.utils.embedding_cache import (
+    flush_embedding_cache,
+    get_embed_model,
+)
+from hivemind_etl_helpers.src.utils.metadata_columns import (
+    get_metadata_column,
+    has_promoted_columns,
+)
+from hivemind_etl_helpers.src.utils.vector_loader import PipelinedVectorLoader
+from hivemind_etl_helpers.src.utils.watermarks import Watermark
 from llama_index.core import Settings
 from llama_index.core.response_synthesizers import get_response_synthesizer
 from llama_index.llms.openai import OpenAI
-from tc_hivemind_backend.db.pg_db_utils import setup_db
 from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
-from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
-from tc_hivemind_backend.pg_vector_access import PGVectorAccess
 from traceloop.sdk import Traceloop
 
 
@@ -25,6 +31,7 @@ def process_discord_summaries(
     selected_channels: list[str],
     default_from_date: datetime,
     verbose: bool = False,
+    insert_method: str | None = None,
 ) -> None:
     """
     prepare the discord data by grouping it into thread, channel and day
@@ -46,6 +53,9 @@ def process_discord_summaries(
         verbose the process of summarization or not
         if `True` the summarization process will be printed out
         default is `False`
+    insert_method : str | None
+        either `insert` or `copy` (binary `COPY`) to insert the rows
+        default is `None` meaning the `VECTOR_INSERT_METHOD` env variable
     """
     load_dotenv()
     otel_endpoint = os.getenv("TRACELOOP_BASE_URL")
@@ -57,22 +67,33 @@ def process_discord_summaries(
     table_name = "discord_summary"
     dbname = f"community_{community_id}"
 
+    # the json metadata is queried until the table is migrated out of band
+    promoted = has_promoted_columns(dbname=dbname, table_name=table_name)
+    date_column = get_metadata_column(table_name, "date", promoted)
     latest_date_query = f"""
-            SELECT (metadata_->> 'date')::timestamp
+            SELECT {date_column}
             AS latest_date
             FROM data_{table_name}
-            WHERE  (metadata_ ->> 'channel' IS NULL AND metadata_ ->> 'thread' IS NULL)
-            ORDER BY (metadata_->>'date')::timestamp DESC
+            WHERE {date_column} IS NOT NULL
+            AND (metadata_ ->> 'channel' IS NULL AND metadata_ ->> 'thread' IS NULL)
+            ORDER BY {date_column} DESC
             LIMIT 1;
     """
-    from_date = setup_db(
+    # just the daily summaries move the watermark
+    watermark = Watermark(
+        platform="discord",
+        table_name=table_name,
+        metadata_key="date",
+        null_keys=["channel", "thread"],
+    )
+    from_date = watermark.load(
         community_id=community_id, dbname=dbname, latest_date_query=latest_date_query
     )
     if from_date is not None:
         # deleting any in-complete saved summaries (meaning for threads or channels)
         deletion_query = f"""
             DELETE FROM data_{table_name}
-            WHERE (metadata_ ->> 'date')::timestamp > '{from_date.strftime("%Y-%m-%d")}';
+            WHERE {date_column} > '{from_date.strftime("%Y-%m-%d")}';
         """
         from_date += timedelta(days=1)
     else:
@@ -87,40 +108,49 @@ def process_discord_summaries(
         verbose=verbose,
     )
 
-    (
-        thread_summaries_documents,
-        channel_summary_documenets,
-        daily_summary_documenets,
-    ) = discord_summary.prepare_summaries(
-        guild_id=guild_id,
-        selected_channels=selected_channels,
-        from_date=from_date,
-        summarization_prefix="Please make a concise summary based only on the provided text from this",
-    )
-
-    logging.info("Getting the summaries embedding and saving within database!")
-
-    # sorting the summaries per date
-    # this is to assure in case of server break, we could continue from the previous date
-    docs_daily_sorted = sort_summaries_daily(
-        level1_docs=thread_summaries_documents,
-        level2_docs=channel_summary_documenets,
-        daily_docs=daily_summary_documenets,
-    )
-
     node_parser = configure_node_parser(chunk_size=chunk_size)
-    pg_vector = PGVectorAccess(table_name=table_name, dbname=dbname)
+    embed_model = get_embed_model()
+    vector_loader = PipelinedVectorLoader(
+        table_name=table_name,
+        dbname=dbname,
+        embed_model=embed_model,
+        batch_size=100,
+        insert_method=insert_method,
+        watermark=watermark,
+    )
 
     Settings.node_parser = node_parser
-    Settings.embed_model = CohereEmbedding()
+    Settings.embed_model = embed_model
     Settings.chunk_size = chunk_size
     Settings.llm = OpenAI(model="gpt-3.5-turbo")
 
-    pg_vector.save_documents_in_batches(
-        community_id=community_id,
-        documents=docs_daily_sorted,
-        batch_size=100,
-        max_request_per_minute=None,
-        request_per_minute=10000,
-        deletion_query=deletion_query,
+    if deletion_query:
+        # removing the incomplete summaries of the last run before summarizing again
+        vector_loader.save_documents(
+            community_id=community_id,
+            documents=[],
+            deletion_query=deletion_query,
+        )
+
+    # each day is summarized and saved before the next one
+    # the daily summary document is saved last, being the watermark of the
+    # completed days, so a failure would just lose the work of the current day
+    daily_documents = discord_summary.iterate_daily_summaries(
+        guild_id=guild_id,
+        selected_channels=selected_channels,
+        from_date=from_date,
+        summarization_prefix="Please make a concise summary based only on the provided text from this",
     )
+    try:
+        for date, documents in daily_documents:
+            logging.info(
+                f"Getting the summaries embedding of date {date} "
+                "and saving within database!"
+            )
+            vector_loader.save_documents(
+                community_id=community_id,
+                documents=documents,
+            )
+    finally:
+        vector_loader.close()
+    flush_embedding_cache(embed_model)
@@ -2,18 +2,26 @@ import logging
 from datetime import datetime, timedelta
 
 from hivemind_etl_helpers.src.db.discord.discord_raw_message_to_document import (
-    discord_raw_to_documents,
+    discord_raw_to_documents_batches,
 )
 from hivemind_etl_helpers.src.db.discord.find_guild_id import (
     find_guild_id_by_platform_id,
 )
 from hivemind_etl_helpers.src.document_node_parser import configure_node_parser
+from hivemind_etl_helpers.src.utils.embedding_cache import (
+    flush_embedding_cache,
+    get_embed_model,
+)
+from hivemind_etl_helpers.src.utils.metadata_columns import (
+    get_metadata_column,
+    has_promoted_columns,
+)
+from hivemind_etl_helpers.src.utils.prefetch import prefetch
+from hivemind_etl_helpers.src.utils.vector_loader import PipelinedVectorLoader
+from hivemind_etl_helpers.src.utils.watermarks import Watermark
 from llama_index.core import Settings
 from llama_index.llms.openai import OpenAI
-from tc_hivemind_backend.db.pg_db_utils import setup_db
 from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
-from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
-from tc_hivemind_backend.pg_vector_access import PGVectorAccess
 
 
 def process_discord_guild_mongo(
@@ -21,6 +29,7 @@ def process_discord_guild_mongo(
     platform_id: str,
     selected_channels: list[str],
     default_from_date: datetime,
+    insert_method: str | None = None,
 ) -> None:
     """
     process the discord guild messages from mongodb
@@ -36,6 +45,9 @@ def process_discord_guild_mongo(
         a list of channels to start processing the data
     default_from_date : datetime
         the default from_date set in db
+    insert_method : str | None
+        either `insert` or `copy` (binary `COPY`) to insert the rows
+        default is `None` meaning the `VECTOR_INSERT_METHOD` env variable
     """
     chunk_size, _ = load_model_hyperparams()
     guild_id = find_guild_id_by_platform_id(platform_id)
@@ -43,14 +55,21 @@ def process_discord_guild_mongo(
     table_name = "discord"
     dbname = f"community_{community_id}"
 
+    # the json metadata is queried until the table is migrated out of band
+    promoted = has_promoted_columns(dbname=dbname, table_name=table_name)
+    date_column = get_metadata_column(table_name, "date", promoted)
     latest_date_query = f"""
-            SELECT (metadata_->> 'date')::timestamp
+            SELECT {date_column}
             AS latest_date
             FROM data_{table_name}
-            ORDER BY (metadata_->>'date')::timestamp DESC
+            WHERE {date_column} IS NOT NULL
+            ORDER BY {date_column} DESC
             LIMIT 1;
     """
-    from_date = setup_db(
+    watermark = Watermark(
+        platform="discord", table_name=table_name, metadata_key="date"
+    )
+    from_date = watermark.load(
         community_id=community_id, dbname=dbname, latest_date_query=latest_date_query
     )
 
@@ -65,24 +84,36 @@ def process_discord_guild_mongo(
     if from_date is None:
         from_date = default_from_date
 
-    documents = discord_raw_to_documents(
-        guild_id=guild_id,
-        from_date=from_date,
-        selected_channels=selected_channels,
-    )
     node_parser = configure_node_parser(chunk_size=chunk_size)
-    pg_vector = PGVectorAccess(table_name=table_name, dbname=dbname)
+    embed_model = get_embed_model()
+    vector_loader = PipelinedVectorLoader(
+        table_name=table_name,
+        dbname=dbname,
+        embed_model=embed_model,
+        batch_size=100,
+        insert_method=insert_method,
+        watermark=watermark,
+    )
 
     Settings.node_parser = node_parser
-    Settings.embed_model = CohereEmbedding()
+    Settings.embed_model = embed_model
     Settings.chunk_size = chunk_size
     Settings.llm = OpenAI(model="gpt-3.5-turbo")
 
-    pg_vector.save_documents_in_batches(
-        community_id=community_id,
-        documents=documents,
-        batch_size=100,
-        node_parser=node_parser,
-        max_request_per_minute=None,
-        request_per_minute=10000,
+    # the next messages are fetched and transformed while saving a batch
+    documents_batches = discord_raw_to_documents_batches(
+        guild_id=guild_id,
+        from_date=from_date,
+        selected_channels=selected_channels,
+        batch_size=1000,
     )
+    try:
+        for documents in prefetch(documents_batches, max_prefetch=1):
+            vector_loader.save_documents(
+                community_id=community_id,
+                documents=documents,
+                node_parser=node_parser,
+            )
+    finally:
+        vector_loader.close()
+    flush_embedding_cache(embed_model)
@@ -9,19 +9,29 @@ from hivemind_etl_helpers.src.db.discourse.summary.prepare_summary import (
 )
 from hivemind_etl_helpers.src.db.discourse.utils.get_forums import get_forum_uuid
 from hivemind_etl_helpers.src.document_node_parser import configure_node_parser
+from hivemind_etl_helpers.src.utils.embedding_cache import (
+    flush_embedding_cache,
+    get_embed_model,
+)
+from hivemind_etl_helpers.src.utils.metadata_columns import (
+    get_metadata_column,
+    has_promoted_columns,
+)
 from hivemind_etl_helpers.src.utils.sort_summary_docs import sort_summaries_daily
+from hivemind_etl_helpers.src.utils.vector_loader import PipelinedVectorLoader
+from hivemind_etl_helpers.src.utils.watermarks import Watermark
 from llama_index.core import Document, Settings
 from llama_index.core.response_synthesizers import get_response_synthesizer
 from llama_index.llms.openai import OpenAI
 from neo4j._data import Record
-from tc_hivemind_backend.db.pg_db_utils import setup_db
 from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
-from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
-from tc_hivemind_backend.pg_vector_access import PGVectorAccess
 
 
 def process_discourse_summary(
-    community_id: str, forum_endpoint: str, from_starting_date: datetime
+    community_id: str,
+    forum_endpoint: str,
+    from_starting_date: datetime,
+    insert_method: str | None = None,
 ) -> None:
     """
     process discourse messages and save the per-channel/per-topic/daily
@@ -35,6 +45,9 @@ def process_discourse_summary(
         the forum endpoint that is related to a community
     from_starting_date : datetime
         the starting date of the ETL
+    insert_method : str | None
+        either `insert` or `copy` (binary `COPY`) to insert the rows
+        default is `None` meaning the `VECTOR_INSERT_METHOD` env variable
     """
     dbname = f"community_{community_id}"
     prefix = f"COMMUNITYID: {community_id} "
@@ -57,6 +70,7 @@ def process_discourse_summary(
         log_prefix=f"{prefix}ForumId: {forum_id}",
         forum_endpoint=forum_endpoint,
         from_starting_date=from_starting_date,
+        insert_method=insert_method,
     )
 
 
@@ -67,6 +81,7 @@ def process_forum(
     log_prefix: str,
     forum_endpoint: str,
     from_starting_date: datetime,
+    insert_method: str | None = None,
 ):
     """
     process forum data
@@ -86,20 +101,36 @@ def process_forum(
         the DiscourseForum endpoint for document checking
     from_starting_date : datetime
         the time to start processing documents
+    insert_method : str | None
+        either `insert` or `copy` (binary `COPY`) to insert the rows
+        default is `None` meaning the `VECTOR_INSERT_METHOD` env variable
     """
     chunk_size, embedding_dim = load_model_hyperparams()
     table_name = "discourse_summary"
 
+    # the json metadata is queried until the table is migrated out of band
+    promoted = has_promoted_columns(dbname=dbname, table_name=table_name)
+    date_column = get_metadata_column(table_name, "date", promoted)
+    endpoint_column = get_metadata_column(table_name, "forum_endpoint", promoted)
     # getting the query of latest date
     latest_date_query = f"""
-        SELECT (metadata_->> 'date')::timestamp AS latest_date
+        SELECT {date_column} AS latest_date
         FROM data_{table_name}
-        WHERE (metadata_ ->> 'forum_endpoint') = '{forum_endpoint}'
+        WHERE {endpoint_column} = '{forum_endpoint}'
+        AND {date_column} IS NOT NULL
         AND (metadata_ ->> 'channel' IS NULL AND metadata_ ->> 'thread' IS NULL)
-        ORDER BY (metadata_->>'date')::timestamp DESC
+        ORDER BY {date_column} DESC
         LIMIT 1;
     """
-    from_date = setup_db(
+    # just the daily summaries move the watermark
+    watermark = Watermark(
+        platform="discourse",
+        table_name=table_name,
+        metadata_key="date",
+        scope=forum_endpoint,
+        null_keys=["topic", "category"],
+    )
+    from_date = watermark.load(
         community_id=community_id, dbname=dbname, latest_date_query=latest_date_query
     )
 
@@ -107,8 +138,8 @@ def process_forum(
         # deleting any in-complete saved summaries
         deletion_query = f"""
             DELETE FROM data_{table_name}
-            WHERE (metadata_ ->> 'forum_endpoint') = '{forum_endpoint}'
-            AND (metadata_ ->> 'date')::timestamp > '{from_date.strftime("%Y-%m-%d")}';
+            WHERE {endpoint_column} = '{forum_endpoint}'
+            AND {date_column} > '{from_date.strftime("%Y-%m-%d")}';
         """
         # increasing 1 day since we've saved the summaries of the last day
         from_date += timedelta(days=1)
@@ -133,7 +164,16 @@ def process_forum(
         )
 
         node_parser = configure_node_parser(chunk_size=chunk_size)
-        pg_vector = PGVectorAccess(table_name=table_name, dbname=dbname)
+        embed_model = get_embed_model()
+        vector_loader = PipelinedVectorLoader(
+            table_name=table_name,
+            dbname=dbname,
+            embed_model=embed_model,
+            batch_size=100,
+            embed_dim=embedding_dim,
+            insert_method=insert_method,
+            watermark=watermark,
+        )
 
         sorted_daily_docs = sort_summaries_daily(
             level1_docs=topic_summary_documents,
@@ -146,19 +186,19 @@ def process_forum(
         )
 
         Settings.node_parser = node_parser
-        Settings.embed_model = CohereEmbedding()
+        Settings.embed_model = embed_model
         Settings.chunk_size = chunk_size
         Settings.llm = OpenAI(model="gpt-3.5-turbo")
 
-        pg_vector.save_documents_in_batches(
-            community_id=community_id,
-            documents=sorted_daily_docs,
-            batch_size=100,
-            max_request_per_minute=None,
-            embed_dim=embedding_dim,
-            request_per_minute=10000,
-            deletion_query=deletion_query,
-        )
+        try:
+            vector_loader.save_documents(
+                community_id=community_id,
+                documents=sorted_daily_docs,
+                deletion_query=deletion_query,
+            )
+        finally:
+            vector_loader.close()
+        flush_embedding_cache(embed_model)
     else:
         logging.info(f"No data to process. from_date: {from_date}")
 
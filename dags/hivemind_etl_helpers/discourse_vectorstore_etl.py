@@ -7,16 +7,26 @@ from hivemind_etl_helpers.src.db.discourse.raw_post_to_documents import (
 from hivemind_etl_helpers.src.db.discourse.utils.get_forums import get_forum_uuid
 from hivemind_etl_helpers.src.document_node_parser import configure_node_parser
 from hivemind_etl_helpers.src.utils.check_documents import check_documents
+from hivemind_etl_helpers.src.utils.embedding_cache import (
+    flush_embedding_cache,
+    get_embed_model,
+)
+from hivemind_etl_helpers.src.utils.metadata_columns import (
+    get_metadata_column,
+    has_promoted_columns,
+)
+from hivemind_etl_helpers.src.utils.vector_loader import PipelinedVectorLoader
+from hivemind_etl_helpers.src.utils.watermarks import Watermark
 from llama_index.core import Settings
 from llama_index.llms.openai import OpenAI
-from tc_hivemind_backend.db.pg_db_utils import setup_db
 from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
-from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
-from tc_hivemind_backend.pg_vector_access import PGVectorAccess
 
 
 def process_discourse_vectorstore(
-    community_id: str, forum_endpoint: str, from_starting_date: datetime
+    community_id: str,
+    forum_endpoint: str,
+    from_starting_date: datetime,
+    insert_method: str | None = None,
 ) -> None:
     """
     process discourse messages and save them in postgresql
@@ -29,6 +39,9 @@ def process_discourse_vectorstore(
         the forum endpoint that is related to a community
     from_starting_date : datetime
         the starting date of the ETL
+    insert_method : str | None
+        either `insert` or `copy` (binary `COPY`) to insert the rows
+        default is `None` meaning the `VECTOR_INSERT_METHOD` env variable
     """
     dbname = f"community_{community_id}"
     prefix = f"COMMUNITYID: {community_id} "
@@ -51,6 +64,7 @@ def process_discourse_vectorstore(
         log_prefix=f"{prefix}ForumId: {forum_id}",
         forum_endpoint=forum_endpoint,
         from_starting_date=from_starting_date,
+        insert_method=insert_method,
     )
 
 
@@ -61,6 +75,7 @@ def process_forum(
     log_prefix: str,
     forum_endpoint: str,
     from_starting_date: datetime,
+    insert_method: str | None = None,
 ):
     """
     process the discourse forum data
@@ -81,19 +96,34 @@ def process_forum(
         the DiscourseForum endpoint for document checking
     from_starting_date : datetime
         the time to start processing documents
+    insert_method : str | None
+        either `insert` or `copy` (binary `COPY`) to insert the rows
+        default is `None` meaning the `VECTOR_INSERT_METHOD` env variable
     """
     chunk_size, embedding_dim = load_model_hyperparams()
     table_name = "discourse"
 
+    # the json metadata is queried until the table is migrated out of band
+    promoted = has_promoted_columns(dbname=dbname, table_name=table_name)
+    date_column = get_metadata_column(table_name, "updatedAt", promoted)
+    endpoint_column = get_metadata_column(table_name, "forum_endpoint", promoted)
+    id_column = get_metadata_column(table_name, "postId", promoted)
     latest_date_query = f"""
-        SELECT (metadata_->> 'updatedAt')::timestamp
+        SELECT {date_column}
         AS latest_date
         FROM data_discourse
-        WHERE (metadata_ ->> 'forum_endpoint') = '{forum_endpoint}'
-        ORDER BY (metadata_->>'updatedAt')::timestamp DESC
+        WHERE {endpoint_column} = '{forum_endpoint}'
+        AND {date_column} IS NOT NULL
+        ORDER BY {date_column} DESC
         LIMIT 1;
     """
-    from_last_saved_date = setup_db(
+    watermark = Watermark(
+        platform="discourse",
+        table_name=table_name,
+        metadata_key="updatedAt",
+        scope=forum_endpoint,
+    )
+    from_last_saved_date = watermark.load(
         community_id=community_id, dbname=dbname, latest_date_query=latest_date_query
     )
 
@@ -109,7 +139,16 @@ def process_forum(
     documents = fetch_discourse_documents(forum_id=forum_id, from_date=from_date)
 
     node_parser = configure_node_parser(chunk_size=chunk_size)
-    pg_vector = PGVectorAccess(table_name=table_name, dbname=dbname)
+    embed_model = get_embed_model()
+    vector_loader = PipelinedVectorLoader(
+        table_name=table_name,
+        dbname=dbname,
+        embed_model=embed_model,
+        batch_size=100,
+        embed_dim=embedding_dim,
+        insert_method=insert_method,
+        watermark=watermark,
+    )
 
     documents, doc_file_ids_to_delete = check_documents(
         documents,
@@ -123,22 +162,24 @@ def process_forum(
 
     deletion_query: str = ""
     if len(doc_file_ids_to_delete) != 0:
-        deletion_ids = tuple([float(item) for item in doc_file_ids_to_delete])
+        deletion_ids = ", ".join([str(float(item)) for item in doc_file_ids_to_delete])
         deletion_query = f"""
             DELETE FROM data_discourse
-            WHERE (metadata_->>'postId')::float IN {deletion_ids};
+            WHERE {endpoint_column} = '{forum_endpoint}'
+            AND {id_column} IN ({deletion_ids});
         """
 
     Settings.node_parser = node_parser
-    Settings.embed_model = CohereEmbedding()
+    Settings.embed_model = embed_model
     Settings.chunk_size = chunk_size
     Settings.llm = OpenAI(model="gpt-3.5-turbo")
 
-    pg_vector.save_documents_in_batches(
-        community_id=community_id,
-        documents=documents,
-        batch_size=100,
-        max_request_per_minute=None,
-        embed_dim=embedding_dim,
-        doc_file_ids_to_delete=deletion_query,
-    )
+    try:
+        vector_loader.save_documents(
+            community_id=community_id,
+            documents=documents,
+            deletion_query=deletion_query,
+        )
+    finally:
+        vector_loader.close()
+    flush_embedding_cache(embed_model)
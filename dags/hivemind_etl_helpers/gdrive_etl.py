@@ -8,8 +8,11 @@ from hivemind_etl_helpers.src.db.gdrive.retrieve_documents import (
 )
 from hivemind_etl_helpers.src.document_node_parser import configure_node_parser
 from hivemind_etl_helpers.src.utils.check_documents import check_documents
+from hivemind_etl_helpers.src.utils.embedding_cache import (
+    flush_embedding_cache,
+    get_embed_model,
+)
 from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
-from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
 from tc_hivemind_backend.pg_vector_access import PGVectorAccess
 
 
@@ -54,7 +57,10 @@ def process_gdrive(
         logging.info(f"No documents retrieved from gdrive! exp: {exp}")
 
     node_parser = configure_node_parser(chunk_size=chunk_size)
-    pg_vector = PGVectorAccess(table_name=table_name, dbname=dbname)
+    embed_model = get_embed_model()
+    pg_vector = PGVectorAccess(
+        table_name=table_name, dbname=dbname, embed_model=embed_model
+    )
 
     documents, doc_file_ids_to_delete = check_documents(
         documents,
@@ -68,8 +74,6 @@ def process_gdrive(
 
     # TODO: Delete the files with id `doc_file_ids_to_delete`
 
-    embed_model = CohereEmbedding()
-
     pg_vector.save_documents_in_batches(
         community_id=community_id,
         documents=documents,
@@ -79,6 +83,7 @@ def process_gdrive(
         embed_model=embed_model,
         embed_dim=embedding_dim,
     )
+    flush_embedding_cache(embed_model)
 
 
 if __name__ == "__main__":
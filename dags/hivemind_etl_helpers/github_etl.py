@@ -15,8 +15,12 @@ from hivemind_etl_helpers.src.db.github.load import (
     load_documents_into_pg_database,
 )
 from hivemind_etl_helpers.src.db.github.transform import GitHubTransformation
+from hivemind_etl_helpers.src.utils.metadata_columns import (
+    get_metadata_column,
+    has_promoted_columns,
+)
+from hivemind_etl_helpers.src.utils.watermarks import Watermark
 from llama_index.core import Document
-from tc_hivemind_backend.db.pg_db_utils import setup_db
 
 
 def process_github_vectorstore(
@@ -47,14 +51,21 @@ def process_github_vectorstore(
     table_name = "github"
 
     logging.info(f"{prefix}Setting up database")
+    # the json metadata is queried until the table is migrated out of band
+    promoted = has_promoted_columns(dbname=dbname, table_name=table_name)
+    date_column = get_metadata_column(table_name, "created_at", promoted)
     latest_date_query = f"""
-            SELECT (metadata_->> 'created_at')::timestamp
+            SELECT {date_column}
             AS latest_date
             FROM data_{table_name}
-            ORDER BY (metadata_->>'created_at')::timestamp DESC
+            WHERE {date_column} IS NOT NULL
+            ORDER BY {date_column} DESC
             LIMIT 1;
     """
-    from_date_saved_data = setup_db(
+    watermark = Watermark(
+        platform="github", table_name=table_name, metadata_key="created_at"
+    )
+    from_date_saved_data = watermark.load(
         community_id=community_id, dbname=dbname, latest_date_query=latest_date_query
     )
     from_date: datetime | None
@@ -104,7 +115,7 @@ def process_github_vectorstore(
     all_documents: list[Document] = docs_commit.copy()
 
     # checking for updates on prs, issues, and comments
-    delete_docs = PrepareDeletion(community_id)
+    delete_docs = PrepareDeletion(community_id, promoted=promoted)
     docs_to_save, deletion_query = delete_docs.prepare(
         pr_documents=docs_prs,
         issue_documents=docs_issue,
@@ -125,4 +136,5 @@ def process_github_vectorstore(
         community_id=community_id,
         table_name=table_name,
         deletion_query=deletion_query,
+        watermark=watermark,
     )
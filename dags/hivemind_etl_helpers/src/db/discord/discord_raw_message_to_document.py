@@ -1,6 +1,11 @@
 from datetime import datetime
+from typing import Iterator
 
-from hivemind_etl_helpers.src.db.discord.fetch_raw_messages import fetch_raw_messages
+from hivemind_etl_helpers.src.db.discord.fetch_raw_messages import (
+    fetch_raw_messages,
+    iterate_raw_messages,
+)
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
 from hivemind_etl_helpers.src.db.discord.utils.transform_discord_raw_messges import (
     transform_discord_raw_messages,
 )
@@ -32,3 +37,46 @@ def discord_raw_to_documents(
     messages_docuemnt = transform_discord_raw_messages(guild_id, raw_mongo_messages)
 
     return messages_docuemnt
+
+
+def discord_raw_to_documents_batches(
+    guild_id: str,
+    selected_channels: list[str],
+    from_date: datetime,
+    batch_size: int = 1000,
+) -> Iterator[list[Document]]:
+    """
+    stream the discord raw messages from db as batches of llama_index Documents
+    so just one batch of messages would be in memory at a time
+
+    Parameters
+    -----------
+    guild_id : str
+        the guild id to fetch their `rawinfos` messages
+    selected_channels : list[str]
+        the selected channels id to process messages on discord
+    from_date : datetime
+        get the raw data from a specific date
+    batch_size : int
+        the count of messages to convert to documents per batch
+
+    Returns
+    ---------
+    documents_batches : Iterator[list[llama_index.Document]]
+        the batches of messages converted to documents, sorted by date
+    """
+    directory = GuildDirectory(guild_id)
+
+    messages: list[dict] = []
+    for message in iterate_raw_messages(
+        guild_id, selected_channels, from_date, batch_size=batch_size
+    ):
+        messages.append(message)
+        if len(messages) == batch_size:
+            yield transform_discord_raw_messages(
+                guild_id, messages, directory=directory
+            )
+            messages = []
+
+    if messages:
+        yield transform_discord_raw_messages(guild_id, messages, directory=directory)
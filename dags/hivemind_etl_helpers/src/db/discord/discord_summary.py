@@ -1,7 +1,9 @@
 import logging
 from datetime import datetime
+from typing import Iterator
 
 from hivemind_etl_helpers.src.db.discord.summary.prepare_grouped_data import (
+    iterate_grouped_data,
     prepare_grouped_data,
 )
 from hivemind_etl_helpers.src.db.discord.summary.prepare_summaries import (
@@ -10,6 +12,8 @@ from hivemind_etl_helpers.src.db.discord.summary.prepare_summaries import (
 from hivemind_etl_helpers.src.db.discord.summary.summary_utils import (
     DiscordSummaryTransformer,
 )
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
+from hivemind_etl_helpers.src.utils.sort_summary_docs import sort_summaries_daily
 from llama_index.core import Document, Settings
 from llama_index.core.response_synthesizers.base import BaseSynthesizer
 
@@ -78,40 +82,14 @@ class DiscordSummary(PrepareSummaries):
         daily_summary_documenets : list[llama_index.Document]
             list of daily summaries converted to llama_index documents
         """
-        summary_prompt_posfix = (
-            ". Organize the output in one or multiple descriptive "
-            "bullet points and include important details"
-        )
         raw_data_grouped = prepare_grouped_data(guild_id, from_date, selected_channels)
         if raw_data_grouped != {}:
-            thread_summaries = self.prepare_thread_summaries(
-                guild_id,
-                raw_data_grouped,
-                (summarization_prefix + " discord thread" + summary_prompt_posfix),
-            )
             (
-                channel_summaries,
                 thread_summary_documenets,
-            ) = self.prepare_channel_summaries(
-                thread_summaries,
-                summarization_prefix
-                + (" selection of discord thread summaries" + summary_prompt_posfix),
-            )
-            (
-                daily_summaries,
                 channel_summary_documenets,
-            ) = self.prepare_daily_summaries(
-                channel_summaries,
-                (
-                    summarization_prefix
-                    + " selection of discord channel summaries"
-                    + summary_prompt_posfix
-                ),
-            )
-            daily_summary_documents = (
-                self.discord_summary_transformer.transform_daily_summary_to_document(
-                    daily_summaries
-                )
+                daily_summary_documents,
+            ) = self._summarize_grouped_data(
+                guild_id, raw_data_grouped, summarization_prefix
             )
         else:
             logging.info(f"No data received after the data: {from_date}")
@@ -124,3 +102,105 @@ class DiscordSummary(PrepareSummaries):
             channel_summary_documenets,
             daily_summary_documents,
         )
+
+    def iterate_daily_summaries(
+        self,
+        guild_id: str,
+        selected_channels: list[str],
+        summarization_prefix: str,
+        from_date: datetime,
+    ) -> Iterator[tuple[str, list[Document]]]:
+        """
+        prepare the summaries of discord messages one day at a time
+        so the summaries of a day could be saved before summarizing the next day
+        Note: This will always process the data until 1 day ago.
+
+        Parameters
+        ------------
+        guild_id : str
+            the guild id to access data
+        selected_channels: list[str]
+            the discord channels to produce summaries
+        summarization_prefix : str
+            the summarization query prefix to do on the LLM
+        from_date : datetime
+            get the raw data from a specific date
+
+        Returns
+        ---------
+        daily_documents : Iterator[tuple[str, list[llama_index.Document]]]
+            ascending sorted days with the thread, channel and daily summary
+            documents of the day, the daily summary document being the last one
+        """
+        # loading the guild members and roles once for all days
+        directory: GuildDirectory | None = None
+        for date, day_data_grouped in iterate_grouped_data(
+            guild_id, from_date, selected_channels
+        ):
+            if directory is None:
+                directory = GuildDirectory(guild_id)
+            (
+                thread_summary_documenets,
+                channel_summary_documenets,
+                daily_summary_documents,
+            ) = self._summarize_grouped_data(
+                guild_id, {date: day_data_grouped}, summarization_prefix, directory
+            )
+            documents = sort_summaries_daily(
+                level1_docs=thread_summary_documenets,
+                level2_docs=channel_summary_documenets,
+                daily_docs=daily_summary_documents,
+            )
+            yield date, documents
+
+    def _summarize_grouped_data(
+        self,
+        guild_id: str,
+        raw_data_grouped: dict[str, dict[str, dict[str | None, list]]],
+        summarization_prefix: str,
+        directory: GuildDirectory | None = None,
+    ) -> tuple[list[Document], list[Document], list[Document]]:
+        """
+        summarize the grouped data into thread, channel and daily summary documents
+        the guild `directory` is loaded if not given
+        """
+        summary_prompt_posfix = (
+            ". Organize the output in one or multiple descriptive "
+            "bullet points and include important details"
+        )
+        thread_summaries = self.prepare_thread_summaries(
+            guild_id,
+            raw_data_grouped,
+            (summarization_prefix + " discord thread" + summary_prompt_posfix),
+            directory=directory,
+        )
+        (
+            channel_summaries,
+            thread_summary_documenets,
+        ) = self.prepare_channel_summaries(
+            thread_summaries,
+            summarization_prefix
+            + (" selection of discord thread summaries" + summary_prompt_posfix),
+        )
+        (
+            daily_summaries,
+            channel_summary_documenets,
+        ) = self.prepare_daily_summaries(
+            channel_summaries,
+            (
+                summarization_prefix
+                + " selection of discord channel summaries"
+                + summary_prompt_posfix
+            ),
+        )
+        daily_summary_documents = (
+            self.discord_summary_transformer.transform_daily_summary_to_document(
+                daily_summaries
+            )
+        )
+
+        return (
+            thread_summary_documenets,
+            channel_summary_documenets,
+            daily_summary_documents,
+        )
@@ -1,7 +1,23 @@
 from datetime import datetime
+from typing import Iterable, Iterator
 
 from hivemind_etl_helpers.src.utils.mongo import MongoSingleton
 
+# the `rawinfos` fields used to convert the messages to documents
+RAW_MESSAGE_PROJECTION = {
+    "_id": 0,
+    "messageId": 1,
+    "author": 1,
+    "content": 1,
+    "createdDate": 1,
+    "channelName": 1,
+    "threadName": 1,
+    "user_mentions": 1,
+    "role_mentions": 1,
+    "replied_user": 1,
+    "reactions": 1,
+}
+
 
 def fetch_raw_messages(
     guild_id: str,
@@ -27,13 +43,13 @@ def fetch_raw_messages(
         a list of raw messages
     """
     client = MongoSingleton.get_instance().get_client()
-    user_ids = get_real_users(guild_id)
+    bot_ids = get_bot_ids(guild_id)
 
     cursor = (
         client[guild_id]["rawinfos"]
         .find(
             {
-                "author": {"$in": user_ids},
+                "author": {"$nin": bot_ids},
                 "type": {"$ne": 18},
                 "createdDate": {"$gte": from_date},
                 "isGeneratedByWebhook": False,
@@ -47,6 +63,58 @@ def fetch_raw_messages(
     return raw_messages
 
 
+def iterate_raw_messages(
+    guild_id: str,
+    selected_channels: list[str],
+    from_date: datetime,
+    batch_size: int = 1000,
+) -> Iterator[dict]:
+    """
+    iterate over the rawinfo messages from mongodb database without loading
+    all of them into memory, having just the fields needed for documents
+
+    Parameters
+    -----------
+    guild_id : str
+        the guild id to fetch their `rawinfos` messages
+    selected_channels : list[str]
+        the selected channels id to process messages on discord
+    from_date : datetime
+        get the raw data from a specific date
+    batch_size : int
+        the count of messages fetched from the database per round trip
+
+    Returns
+    --------
+    raw_messages : Iterator[dict]
+        the raw messages sorted by their creation date
+    """
+    client = MongoSingleton.get_instance().get_client()
+    bot_ids = get_bot_ids(guild_id)
+
+    cursor = (
+        client[guild_id]["rawinfos"]
+        .find(
+            {
+                "author": {"$nin": bot_ids},
+                "type": {"$ne": 18},
+                "createdDate": {"$gte": from_date},
+                "isGeneratedByWebhook": False,
+                "channelId": {"$in": selected_channels},
+            },
+            RAW_MESSAGE_PROJECTION,
+            # the consumer could be slow because of embedding the messages
+            no_cursor_timeout=True,
+        )
+        .sort("createdDate", 1)
+        .batch_size(batch_size)
+    )
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
 def fetch_raw_msg_grouped(
     guild_id: str,
     from_date: datetime,
@@ -85,7 +153,7 @@ def fetch_raw_msg_grouped(
         ```
     """
     client = MongoSingleton.get_instance().client
-    user_ids = get_real_users(guild_id)
+    bot_ids = get_bot_ids(guild_id)
 
     # the pipeline grouping data per day
     pipeline: list[dict] = []
@@ -93,7 +161,7 @@ def fetch_raw_msg_grouped(
     pipeline.append(
         {
             "$match": {
-                "author": {"$in": user_ids},
+                "author": {"$nin": bot_ids},
                 "type": {"$ne": 18},
                 "createdDate": {
                     "$gte": from_date,
@@ -126,12 +194,102 @@ def fetch_raw_msg_grouped(
         }
     )
 
-    cursor = client[guild_id]["rawinfos"].aggregate(pipeline)
+    cursor = client[guild_id]["rawinfos"].aggregate(pipeline, allowDiskUse=True)
     raw_messages_grouped = list(cursor)
 
     return raw_messages_grouped
 
 
+def iterate_raw_msg_per_day(
+    guild_id: str,
+    from_date: datetime,
+    selected_channels: list[str],
+    batch_size: int = 1000,
+) -> Iterator[tuple[str, list[dict]]]:
+    """
+    stream the raw messages grouped by day, until 1 day ago
+    the messages are read from a date sorted cursor and grouped on the client
+    so just the messages of one day would be in memory at a time
+
+    Parameters
+    -----------
+    guild_id : str
+        the guild id to fetch their `rawinfos` messages
+    from_date : datetime
+        get the raw data from a specific date
+    selected_channels : list[str]
+        discord channel ids selected to be processed
+    batch_size : int
+        the count of messages fetched from the database per round trip
+
+    Returns
+    --------
+    daily_messages : Iterator[tuple[str, list[dict]]]
+        ascending sorted days in format of `%Y-%m-%d`
+        with the messages of each day sorted by their creation date
+    """
+    client = MongoSingleton.get_instance().client
+    bot_ids = get_bot_ids(guild_id)
+
+    cursor = (
+        client[guild_id]["rawinfos"]
+        .find(
+            {
+                "author": {"$nin": bot_ids},
+                "type": {"$ne": 18},
+                "createdDate": {
+                    "$gte": from_date,
+                    "$lt": datetime.now().replace(
+                        hour=0, minute=0, second=0, microsecond=0
+                    ),
+                },
+                "isGeneratedByWebhook": False,
+                "channelId": {"$in": selected_channels},
+            },
+            RAW_MESSAGE_PROJECTION,
+            # the consumer could be slow because of summarizing the messages
+            no_cursor_timeout=True,
+        )
+        .sort("createdDate", 1)
+        .batch_size(batch_size)
+    )
+    try:
+        yield from group_messages_per_day(cursor)
+    finally:
+        cursor.close()
+
+
+def group_messages_per_day(
+    messages: Iterable[dict],
+) -> Iterator[tuple[str, list[dict]]]:
+    """
+    group the date sorted messages per day incrementally
+
+    Parameters
+    -----------
+    messages : Iterable[dict]
+        the raw messages sorted by their `createdDate`
+
+    Returns
+    --------
+    daily_messages : Iterator[tuple[str, list[dict]]]
+        the days in format of `%Y-%m-%d` with their messages
+    """
+    date: str | None = None
+    day_messages: list[dict] = []
+    for message in messages:
+        message_date = message["createdDate"].strftime("%Y-%m-%d")
+        if message_date != date:
+            if day_messages:
+                yield date, day_messages
+            date = message_date
+            day_messages = []
+        day_messages.append(message)
+
+    if day_messages:
+        yield date, day_messages
+
+
 def fetch_channels_and_from_date(guild_id: str) -> tuple[list[str], datetime | None]:
     """
     fetch the channels and the `fromDate` to process
@@ -180,31 +338,32 @@ def fetch_channels_and_from_date(guild_id: str) -> tuple[list[str], datetime | N
     return channels, from_date
 
 
-def get_real_users(guild_id: str) -> list[str]:
+def get_bot_ids(guild_id: str) -> list[str]:
     """
-    get the real users id by removing the bots from the list
+    get the id of bots within the guild members
+    excluding the few bots is much lighter for the database than
+    including all the real users of a guild
 
     Parameters
     ------------
     guild_id : str
-        the guild to fetch its members
+        the guild to fetch its bots
 
     Returns
     --------
-    user_ids : list[str]
-        a list of user ids that are not bot
+    bot_ids : list[str]
+        a list of member ids that are bot
     """
     client = MongoSingleton.get_instance().get_client()
 
-    # fetching real users
-    users_cursor = client[guild_id]["guildmembers"].find(
+    bots_cursor = client[guild_id]["guildmembers"].find(
         {
-            "isBot": False,
+            "isBot": True,
         },
         {
             "_id": 0,
             "discordId": 1,
         },
     )
-    user_ids = list(map(lambda x: x["discordId"], users_cursor))
-    return user_ids
+    bot_ids = list(map(lambda x: x["discordId"], bots_cursor))
+    return bot_ids
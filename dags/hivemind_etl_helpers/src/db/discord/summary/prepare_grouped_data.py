@@ -1,6 +1,9 @@
 from datetime import datetime
+from typing import Iterator
 
-from hivemind_etl_helpers.src.db.discord.fetch_raw_messages import fetch_raw_msg_grouped
+from hivemind_etl_helpers.src.db.discord.fetch_raw_messages import (
+    iterate_raw_msg_per_day,
+)
 
 
 def prepare_grouped_data(
@@ -28,19 +31,41 @@ def prepare_grouped_data(
         first level should be representative of day, second level channel
         and third level would be the thread
     """
-    raw_daily_grouped = {}
-    raw_mongo_grouped_messages = fetch_raw_msg_grouped(
-        guild_id, from_date, selected_channels
+    raw_data_grouped = dict(
+        iterate_grouped_data(guild_id, from_date, selected_channels)
     )
 
-    # saving the grouping per day
-    for msg in raw_mongo_grouped_messages:
-        msg_date = msg["_id"]["date"]
-        raw_daily_grouped[msg_date] = msg["messages"]
+    return raw_data_grouped
 
-    raw_data_grouped = group_per_channel_thread(daily_messages=raw_daily_grouped)
 
-    return raw_data_grouped
+def iterate_grouped_data(
+    guild_id: str,
+    from_date: datetime,
+    selected_channels: list[str],
+) -> Iterator[tuple[str, dict[str, dict[str | None, list]]]]:
+    """
+    stream the grouped data day by day
+    so just the messages of one day would be in memory at a time
+
+    Parameters
+    ------------
+    guild_id : str
+        the guild id to prepare its llama_index documents
+    from_date : datetime
+        get the raw data from a specific date
+    selected_channels : list[str]
+        the channel ids selected to be processed
+
+    Returns
+    --------
+    daily_data_grouped : Iterator[tuple[str, dict[str, dict[str | None, list]]]]
+        ascending sorted days with their messages grouped per channel and thread
+    """
+    for date, messages in iterate_raw_msg_per_day(
+        guild_id, from_date, selected_channels
+    ):
+        day_grouped = group_per_channel_thread(daily_messages={date: messages})
+        yield date, day_grouped[date]
 
 
 def group_per_channel_thread(
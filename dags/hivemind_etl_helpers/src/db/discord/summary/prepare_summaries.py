@@ -1,11 +1,18 @@
 import logging
+import os
 
+from dotenv import load_dotenv
 from hivemind_etl_helpers.src.db.discord.summary.summary_utils import (
     DiscordSummaryTransformer,
 )
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
 from hivemind_etl_helpers.src.db.discord.utils.transform_discord_raw_messges import (
     transform_discord_raw_messages,
 )
+from hivemind_etl_helpers.src.utils.summary.packed_summary import (
+    estimate_tokens,
+    pack_by_token_budget,
+)
 from hivemind_etl_helpers.src.utils.summary.summary_base import SummaryBase
 from llama_index.core import Document, Settings
 from llama_index.core.response_synthesizers.base import BaseSynthesizer
@@ -32,6 +39,7 @@ class PrepareSummaries(SummaryBase):
         guild_id: str,
         raw_data_grouped: dict[str, dict[str, dict[str | None, list]]],
         summarization_query: str,
+        directory: GuildDirectory | None = None,
     ) -> dict[str, dict[str, dict[str | None, str]]]:
         """
         prepare the summaries for threads
@@ -44,6 +52,9 @@ class PrepareSummaries(SummaryBase):
             the raw data grouped by date, channel and thread in third nesting level
         summarization_query : str
             the summarization query to do on the LLM
+        directory : GuildDirectory | None
+            the loaded guild members and roles, to be shared between the calls
+            if not given, it would be loaded for the call
 
         Returns
         --------
@@ -54,34 +65,133 @@ class PrepareSummaries(SummaryBase):
         self.prefix = f"GUILDID: {guild_id} "
         logging.info(f"{self.prefix}Preparing the thread summaries")
 
-        total_call_count = 0
-        for date in raw_data_grouped.keys():
-            for channel in raw_data_grouped[date].keys():
-                total_call_count += len(raw_data_grouped[date][channel])
+        # loading the guild members and roles once for all threads
+        if directory is None:
+            directory = GuildDirectory(guild_id)
 
-        idx = 1
-        thread_summaries: dict[str, dict[str, dict[str | None, str]]] = {}
+        # the threads are summarized concurrently and assembled in the same order
+        thread_keys: list[tuple[str, str, str | None]] = []
+        jobs: list[tuple[list[Document], str]] = []
         for date in raw_data_grouped.keys():
             for channel in raw_data_grouped[date].keys():
                 for thread in raw_data_grouped[date][channel].keys():
                     # raw messages of the thread
                     raw_msgs = raw_data_grouped[date][channel][thread]
-                    logging.info(
-                        f"{self.prefix} Summrizing threads {idx}/{total_call_count}"
-                    )
-                    idx += 1
                     messages_document = transform_discord_raw_messages(
-                        guild_id=guild_id, messages=raw_msgs, exclude_metadata=True
-                    )
-                    summary_response = self._get_summary(
-                        messages_document, summarization_query
+                        guild_id=guild_id,
+                        messages=raw_msgs,
+                        exclude_metadata=True,
+                        directory=directory,
                     )
-                    thread_summaries.setdefault(date, {}).setdefault(
-                        channel, {}
-                    ).setdefault(thread, summary_response)
+                    thread_keys.append((date, channel, thread))
+                    jobs.append((messages_document, summarization_query))
+
+        load_dotenv()
+        token_budget = int(os.getenv("SUMMARY_PACK_TOKEN_BUDGET") or "0")
+        if token_budget > 0:
+            summaries = self._get_packed_thread_summaries(
+                thread_keys, jobs, summarization_query, token_budget
+            )
+        else:
+            summaries = self._get_summaries(
+                jobs, log_prefix=f"{self.prefix} Summrizing threads"
+            )
 
+        thread_summaries: dict[str, dict[str, dict[str | None, str]]] = {}
+        for (date, channel, thread), summary_response in zip(thread_keys, summaries):
+            thread_summaries.setdefault(date, {}).setdefault(channel, {}).setdefault(
+                thread, summary_response
+            )
+
+        logging.info(
+            f"{self.prefix}Avoided {self.llm_calls_avoided} LLM calls "
+            "with extractive summaries!"
+        )
         return thread_summaries
 
+    def _get_packed_thread_summaries(
+        self,
+        thread_keys: list[tuple[str, str, str | None]],
+        jobs: list[tuple[list[Document], str]],
+        summarization_query: str,
+        token_budget: int,
+    ) -> list[str]:
+        """
+        summarize the small threads of the same date and channel together
+        within LLM calls of at most `token_budget` tokens
+        the threads not packed, or having their packed response not parsed,
+        are summarized on their own
+
+        a thread is small if its tokens are not more than
+        the `SUMMARY_PACK_MAX_THREAD_TOKENS` env variable
+        default is a quarter of the token budget
+
+        Parameters
+        -----------
+        thread_keys : list[tuple[str, str, str | None]]
+            the date, channel and thread of each job
+        jobs : list[tuple[list[Document], str]]
+            the documents of each thread with their summarization query
+        summarization_query : str
+            the summarization query of the threads
+        token_budget : int
+            the max estimated tokens of the threads packed into one call
+
+        Returns
+        --------
+        summaries : list[str]
+            the summaries in the same order of the given jobs
+        """
+        max_thread_tokens = int(
+            os.getenv("SUMMARY_PACK_MAX_THREAD_TOKENS") or str(token_budget // 4)
+        )
+
+        # the small threads of each date and channel
+        small_threads: dict[tuple[str, str], list[int]] = {}
+        for idx, ((date, channel, _), (documents, _)) in enumerate(
+            zip(thread_keys, jobs)
+        ):
+            # the threads summarized without the LLM are not packed
+            if self._is_extractive(documents) or not documents:
+                continue
+            if estimate_tokens(documents) <= max_thread_tokens:
+                small_threads.setdefault((date, channel), []).append(idx)
+
+        packs: list[list[int]] = []
+        for indices in small_threads.values():
+            tokens = [estimate_tokens(jobs[idx][0]) for idx in indices]
+            for pack in pack_by_token_budget(tokens, token_budget):
+                if len(pack) > 1:
+                    packs.append([indices[pack_idx] for pack_idx in pack])
+
+        packs_summaries = self._map_concurrently(
+            lambda pack: self._get_packed_summaries(
+                [jobs[idx][0] for idx in pack], summarization_query
+            ),
+            packs,
+            log_prefix=f"{self.prefix} Summrizing packed threads",
+        )
+
+        summaries: list[str | None] = [None] * len(jobs)
+        for pack, pack_summaries in zip(packs, packs_summaries):
+            if pack_summaries is not None:
+                for idx, summary in zip(pack, pack_summaries):
+                    summaries[idx] = summary
+
+        remaining = [idx for idx, summary in enumerate(summaries) if summary is None]
+        logging.info(
+            f"{self.prefix}Summarized {len(jobs) - len(remaining)} threads "
+            f"within {len(packs)} packed calls!"
+        )
+        remaining_summaries = self._get_summaries(
+            [jobs[idx] for idx in remaining],
+            log_prefix=f"{self.prefix} Summrizing threads",
+        )
+        for idx, summary in zip(remaining, remaining_summaries):
+            summaries[idx] = summary
+
+        return summaries  # type: ignore
+
     def prepare_channel_summaries(
         self,
         thread_summaries: dict[str, dict[str, dict[str | None, str]]],
@@ -106,14 +216,12 @@ class PrepareSummaries(SummaryBase):
         """
         logging.info(f"{self.prefix}Preparing the channel summaries")
 
-        total_call_count = 0
-        for date in thread_summaries.keys():
-            total_call_count += len(thread_summaries[date].keys())
-
         thread_summary_documenets: list[Document] = []
-        channel_summaries: dict[str, dict[str, str]] = {}
 
-        idx = 1
+        # the channels with just one thread don't need the LLM
+        channel_keys: list[tuple[str, str]] = []
+        channel_texts: list[str | None] = []
+        jobs: list[tuple[list[Document], str]] = []
         for date in thread_summaries.keys():
             for channel in thread_summaries[date].keys():
                 channel_documents: list[Document] = []
@@ -139,24 +247,25 @@ class PrepareSummaries(SummaryBase):
                     )
                     channel_documents.append(thread_doc_modified)
 
-                logging.info(
-                    f"{self.prefix} Summrizing channels {idx}/{total_call_count}"
-                )
-                idx += 1
-
-                channel_summary: str
+                channel_keys.append((date, channel))
                 # if we had multiple documents
                 if len(channel_documents) != 1:
-                    channel_summary = self._get_summary(
-                        channel_documents, summarization_query
-                    )
+                    channel_texts.append(None)
+                    jobs.append((channel_documents, summarization_query))
                 # if just there was one thread
                 else:
-                    channel_summary = channel_documents[0].text
+                    channel_texts.append(channel_documents[0].text)
 
-                channel_summaries.setdefault(date, {}).setdefault(
-                    channel, channel_summary
-                )
+        summaries = iter(
+            self._get_summaries(jobs, log_prefix=f"{self.prefix} Summrizing channels")
+        )
+
+        channel_summaries: dict[str, dict[str, str]] = {}
+        for (date, channel), channel_text in zip(channel_keys, channel_texts):
+            channel_summary = (
+                channel_text if channel_text is not None else next(summaries)
+            )
+            channel_summaries.setdefault(date, {}).setdefault(channel, channel_summary)
 
         return channel_summaries, thread_summary_documenets
 
@@ -186,9 +295,10 @@ class PrepareSummaries(SummaryBase):
         channel_summary_documenets: list[Document] = []
         daily_summaries: dict[str, str] = {}
 
-        total_call_count = len(channel_summaries.keys())
-
-        idx = 1
+        # the days with just one channel don't need the LLM
+        dates: list[str] = []
+        day_texts: list[str | None] = []
+        jobs: list[tuple[list[Document], str]] = []
         for date in channel_summaries.keys():
             daily_documents: list[Document] = []
             for channel in channel_summaries[date].keys():
@@ -200,16 +310,20 @@ class PrepareSummaries(SummaryBase):
                 daily_documents.append(channel_doc)
                 channel_summary_documenets.append(channel_doc)
 
-            logging.info(f"{self.prefix} Summrizing daily {idx}/{total_call_count}")
-            idx += 1
-
-            day_summary: str
+            dates.append(date)
             if len(daily_documents) != 1:
-                day_summary = self._get_summary(daily_documents, summarization_query)
+                day_texts.append(None)
+                jobs.append((daily_documents, summarization_query))
             else:
-                day_summary = daily_documents[0].text
+                day_texts.append(daily_documents[0].text)
 
-            daily_summaries[date] = day_summary
+        summaries = iter(
+            self._get_summaries(jobs, log_prefix=f"{self.prefix} Summrizing daily")
+        )
+        for date, day_text in zip(dates, day_texts):
+            daily_summaries[date] = (
+                day_text if day_text is not None else next(summaries)
+            )
 
         return daily_summaries, channel_summary_documenets
 
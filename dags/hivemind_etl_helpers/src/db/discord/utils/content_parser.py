@@ -1,4 +1,7 @@
 import re
+from functools import lru_cache
+
+ALPHABET_PATTERN = re.compile(r"[a-zA-Z]")
 
 
 def remove_empty_str(data: list[str]):
@@ -33,16 +36,20 @@ def check_no_content_only_links(content: str, link_pattern: str = r"\[URL\d\]")
     no_content : bool
         if `True` then there was no content but the links in the given string
     """
-    pattern = re.compile(link_pattern)
+    pattern = _compile_pattern(link_pattern)
     replacement = ""
 
-    result_string = re.sub(pattern, replacement, content)
+    result_string = pattern.sub(replacement, content)
 
-    alphabet_pattern = re.compile(r"[a-zA-Z]")
-    no_content = not bool(alphabet_pattern.search(result_string))
+    no_content = not bool(ALPHABET_PATTERN.search(result_string))
     return no_content
 
 
+@lru_cache(maxsize=32)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
 def remove_none_from_list(data: list[str | None]) -> list[str]:
     """
     remove the `None` values from a list
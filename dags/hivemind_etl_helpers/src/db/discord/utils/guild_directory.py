@@ -0,0 +1,164 @@
+import logging
+
+from hivemind_etl_helpers.src.db.discord.utils.prepare_reactions_id import (
+    prepare_raction_ids,
+)
+from hivemind_etl_helpers.src.utils.mongo import MongoSingleton
+
+
+class GuildDirectory:
+    def __init__(self, guild_id: str) -> None:
+        """
+        an in-memory directory of the members and roles of a guild
+        the whole directory is loaded with one query per collection at first use
+        and the ids not seen at loading time are fetched lazily
+
+        Parameters
+        -----------
+        guild_id : str
+            the guild to load its members and roles
+        """
+        self.guild_id = guild_id
+        self.client = MongoSingleton.get_instance().client
+
+        # `None` values are the ids not available within the database
+        self.members: dict[str, dict | None] = {}
+        self.roles: dict[str, dict | None] = {}
+        self._loaded = False
+
+    def load(self) -> None:
+        """
+        load all members and roles of the guild
+        """
+        members_cursor = self.client[self.guild_id]["guildmembers"].find(
+            {},
+            {"username": 1, "globalName": 1, "nickname": 1, "discordId": 1, "_id": 0},
+        )
+        self.members.update({member["discordId"]: member for member in members_cursor})
+
+        roles_cursor = self.client[self.guild_id]["roles"].find(
+            {}, {"name": 1, "roleId": 1, "_id": 0}
+        )
+        self.roles.update({role["roleId"]: role for role in roles_cursor})
+
+        self._loaded = True
+        logging.info(
+            f"GUILDID: {self.guild_id} Loaded {len(self.members)} members "
+            f"and {len(self.roles)} roles into the directory!"
+        )
+
+    def get_members(self, ids: list[str]) -> list[dict]:
+        """
+        get the members data of the given ids in the same order
+        the ids not available in the database are skipped
+
+        Parameters
+        -----------
+        ids : list[str]
+            the discord ids of the members
+
+        Returns
+        --------
+        members_data : list[dict]
+            the members data having the `discordId`, `username`,
+            `globalName`, and `nickname` fields
+        """
+        self._fill(
+            ids,
+            cache=self.members,
+            collection="guildmembers",
+            id_key="discordId",
+            projection={"username": 1, "globalName": 1, "nickname": 1},
+        )
+        return [self.members[id] for id in ids if self.members[id] is not None]
+
+    def get_roles(self, ids: list[str]) -> list[dict]:
+        """
+        get the roles data of the given ids in the same order
+        the ids not available in the database are skipped
+
+        Parameters
+        -----------
+        ids : list[str]
+            the ids of the roles
+
+        Returns
+        --------
+        roles_data : list[dict]
+            the roles data having the `roleId` and `name` fields
+        """
+        self._fill(
+            ids,
+            cache=self.roles,
+            collection="roles",
+            id_key="roleId",
+            projection={"name": 1},
+        )
+        return [self.roles[id] for id in ids if self.roles[id] is not None]
+
+    def get_read_only_copy(self, messages: list[dict]) -> "GuildDirectory":
+        """
+        get a copy of the directory having just the members and roles
+        referenced within the given raw messages, to be sent to other processes
+        the copy doesn't query the database and the ids not within it
+        are considered as not available
+
+        Parameters
+        -----------
+        messages : list[dict]
+            the raw messages to have their members and roles within the copy
+
+        Returns
+        --------
+        directory : GuildDirectory
+            the read-only copy of the directory
+        """
+        member_ids: set[str] = set()
+        role_ids: set[str] = set()
+        for message in messages:
+            member_ids.update(message.get("user_mentions") or [])
+            member_ids.update(prepare_raction_ids(message.get("reactions") or []))
+            member_ids.update([message.get("author"), message.get("replied_user")])
+            role_ids.update(message.get("role_mentions") or [])
+        member_ids -= {"", None}
+        role_ids -= {"", None}
+
+        self.get_members(list(member_ids))
+        self.get_roles(list(role_ids))
+
+        directory = GuildDirectory.__new__(GuildDirectory)
+        directory.guild_id = self.guild_id
+        directory.client = None
+        directory.members = {id: self.members[id] for id in member_ids}
+        directory.roles = {id: self.roles[id] for id in role_ids}
+        directory._loaded = True
+        return directory
+
+    def _fill(
+        self,
+        ids: list[str],
+        cache: dict[str, dict | None],
+        collection: str,
+        id_key: str,
+        projection: dict,
+    ) -> None:
+        if self.client is None:
+            # a read-only copy of the directory
+            for id in ids:
+                cache.setdefault(id, None)
+            return
+
+        if not self._loaded:
+            self.load()
+
+        unseen_ids = list({id for id in ids if id not in cache})
+        if not unseen_ids:
+            return
+
+        cursor = self.client[self.guild_id][collection].find(
+            {id_key: {"$in": unseen_ids}}, {**projection, id_key: 1, "_id": 0}
+        )
+        for data in cursor:
+            cache[data[id_key]] = data
+        for id in unseen_ids:
+            cache.setdefault(id, None)
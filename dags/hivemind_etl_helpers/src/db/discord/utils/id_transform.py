@@ -1,9 +1,10 @@
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
 from hivemind_etl_helpers.src.db.discord.utils.sort_based_id import sort_based_on_id
 from hivemind_etl_helpers.src.utils.mongo import MongoSingleton
 
 
 def convert_user_id(
-    guild_id: str, ids: list[str]
+    guild_id: str, ids: list[str], directory: GuildDirectory | None = None
 ) -> tuple[list[str], list[str], list[str]]:
     """
     convert a list of user id to their respective username
@@ -14,6 +15,9 @@ def convert_user_id(
         the guild id that user ids are in
     ids : list[str]
         a list of string each representing the user id
+    directory : GuildDirectory | None
+        the directory of guild members to use instead of querying the database
+        default is `None`, meaning to query the database
 
     Returns
     --------
@@ -24,16 +28,19 @@ def convert_user_id(
     nicknames : list[str]
         the list of nicknames
     """
-    client = MongoSingleton.get_instance().client
+    if directory is not None:
+        members_data_sorted = directory.get_members(ids)
+    else:
+        client = MongoSingleton.get_instance().client
 
-    cursor = client[guild_id]["guildmembers"].find(
-        {"discordId": {"$in": (ids)}},
-        {"username": 1, "globalName": 1, "nickname": 1, "discordId": 1, "_id": 0},
-    )
+        cursor = client[guild_id]["guildmembers"].find(
+            {"discordId": {"$in": (ids)}},
+            {"username": 1, "globalName": 1, "nickname": 1, "discordId": 1, "_id": 0},
+        )
 
-    members_data = list(cursor)
+        members_data = list(cursor)
 
-    members_data_sorted = sort_based_on_id(ids, members_data, "discordId")
+        members_data_sorted = sort_based_on_id(ids, members_data, "discordId")
 
     usernames = [member["username"] for member in members_data_sorted]
     global_names = [member["globalName"] for member in members_data_sorted]
@@ -41,7 +48,9 @@ def convert_user_id(
     return usernames, global_names, nicknames
 
 
-def convert_role_id(guild_id: str, ids: list[str]) -> list[str]:
+def convert_role_id(
+    guild_id: str, ids: list[str], directory: GuildDirectory | None = None
+) -> list[str]:
     """
     convert a list of role id to a list with their respective role name
 
@@ -51,21 +60,27 @@ def convert_role_id(guild_id: str, ids: list[str]) -> list[str]:
         the guild id that user ids are in
     ids : list[str]
         a list of string each representing the role id
+    directory : GuildDirectory | None
+        the directory of guild roles to use instead of querying the database
+        default is `None`, meaning to query the database
 
     Returns
     --------
     usernames : list[str]
         the list of user names
     """
-    client = MongoSingleton.get_instance().client
+    if directory is not None:
+        members_data_sorted = directory.get_roles(ids)
+    else:
+        client = MongoSingleton.get_instance().client
 
-    cursor = client[guild_id]["roles"].find(
-        {"roleId": {"$in": ids}}, {"name": 1, "roleId": 1, "_id": 0}
-    )
+        cursor = client[guild_id]["roles"].find(
+            {"roleId": {"$in": ids}}, {"name": 1, "roleId": 1, "_id": 0}
+        )
 
-    members_data = list(cursor)
+        members_data = list(cursor)
 
-    members_data_sorted = sort_based_on_id(ids, members_data, "roleId")
+        members_data_sorted = sort_based_on_id(ids, members_data, "roleId")
 
     usernames = [member["name"] for member in members_data_sorted]
 
@@ -1,8 +1,11 @@
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
 from hivemind_etl_helpers.src.db.discord.utils.id_transform import convert_user_id
 
 
 def merge_user_ids_and_fetch_names(
-    guild_id: str, *args: list[list[str]]
+    guild_id: str,
+    *args: list[list[str]],
+    directory: GuildDirectory | None = None,
 ) -> tuple[list[str], list[str], list[str]]:
     """
     get multiple list of user ids and fetch the related names for each.
@@ -14,6 +17,8 @@ def merge_user_ids_and_fetch_names(
         the guild id to fetch the users from
     args : list[list[str]]
         should be a list of user id lists
+    directory : GuildDirectory | None
+        the directory of guild members to use instead of querying the database
 
     Returns
     --------
@@ -33,7 +38,7 @@ def merge_user_ids_and_fetch_names(
     num_arrays = len(args)
     split_indices = [len(ids) for ids in args]
 
-    user_names, global_names, nicknames = convert_user_id(guild_id, user_ids)
+    user_names, global_names, nicknames = convert_user_id(guild_id, user_ids, directory)
 
     result_usernames = []
     result_global_names = []
@@ -0,0 +1,93 @@
+import re
+import threading
+
+from urlextract import URLExtract
+
+# the user `<@id>` and role `<@&id>` mentions within a discord message
+MENTION_PATTERN = re.compile(r"<@(&?)([^<>\s]+)>")
+
+
+class MessageRewriter:
+    # loading the TLD list is expensive, so a single extractor is shared
+    _url_extractor: URLExtract | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_url_extractor(cls) -> URLExtract:
+        """
+        get the shared url extractor, creating it on the first call
+        """
+        if cls._url_extractor is None:
+            with cls._lock:
+                if cls._url_extractor is None:
+                    cls._url_extractor = URLExtract()
+        return cls._url_extractor
+
+    def rewrite(
+        self,
+        message: str,
+        roles: dict[str, str],
+        users: dict[str, str],
+    ) -> tuple[str, dict[str, str]]:
+        """
+        convert the role and user mentions of a message to their names and
+        substitute the urls with a reference, all within one pass over the message
+
+        Parameters
+        ------------
+        message : str
+            the raw message content
+        roles : dict[str, str]
+            the roles id and name within dictionary
+            ids are keys and role name are values
+        users : dict[str, str]
+            the user id and name within dictionary
+            ids are keys and username are values
+
+        Returns
+        --------
+        rewritten_message : str
+            the message with mentions converted to names and urls to references
+            the mentions not available in `roles` or `users` are kept as they are
+        references : dict[str, str]
+            the url reference dict that keys are reference name
+            and values are the actual url
+        """
+        # spans are `(start, end, name, url)`
+        # for urls the name is `None` as the reference is set while writing
+        spans: list[tuple[int, int, str | None, str | None]] = []
+        for match in MENTION_PATTERN.finditer(message):
+            is_role, mention_id = match.groups()
+            name = roles.get(mention_id) if is_role else users.get(mention_id)
+            if name is not None:
+                spans.append((match.start(), match.end(), name, None))
+
+        for url, (start, end) in self.get_url_extractor().gen_urls(
+            message, get_indices=True
+        ):
+            spans.append((start, end, None, url))
+
+        spans.sort(key=lambda span: span[0])
+
+        parts: list[str] = []
+        url_references: dict[str, str] = {}
+        position = 0
+        for start, end, name, url in spans:
+            # a mention within a url or the vice versa
+            if start < position:
+                continue
+
+            if url is not None:
+                replacement = url_references.setdefault(
+                    url, f"[URL{len(url_references)}]"
+                )
+            else:
+                replacement = name
+
+            parts.append(message[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(message[position:])
+
+        references = {reference: url for url, reference in url_references.items()}
+        return "".join(parts), references
@@ -1,3 +1,8 @@
+import re
+
+from hivemind_etl_helpers.src.db.discord.utils.message_rewriter import MENTION_PATTERN
+
+
 def prepare_raw_message_ids(
     message: str, roles: dict[str, str], users: dict[str, str]
 ) -> str:
@@ -21,17 +26,12 @@ def prepare_raw_message_ids(
     updated_message : str
         the message that all the ids are updated to names
     """
-    # for initializing
-    updated_message = message
-
-    for role_id in roles.keys():
-        # the role within the message
-        role_in_message = f"<@&{role_id}>"
-        updated_message = updated_message.replace(role_in_message, roles[role_id])
-
-    for user_id in users.keys():
-        # the user id within the message
-        user_in_message = f"<@{user_id}>"
-        updated_message = updated_message.replace(user_in_message, users[user_id])
+
+    def replace_mention(match: re.Match) -> str:
+        is_role, mention_id = match.groups()
+        name = roles.get(mention_id) if is_role else users.get(mention_id)
+        return name if name is not None else match.group(0)
+
+    updated_message = MENTION_PATTERN.sub(replace_mention, message)
 
     return updated_message
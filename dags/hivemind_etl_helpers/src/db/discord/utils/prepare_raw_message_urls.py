@@ -1,4 +1,4 @@
-from urlextract import URLExtract
+from hivemind_etl_helpers.src.db.discord.utils.message_rewriter import MessageRewriter
 
 
 def prepare_raw_message_urls(message: str) -> tuple[str, dict[str, str]]:
@@ -19,7 +19,7 @@ def prepare_raw_message_urls(message: str) -> tuple[str, dict[str, str]]:
         the url reference dict that keys are reference name
         and values are the actual url
     """
-    msg_urls = URLExtract().find_urls(message)
+    msg_urls = MessageRewriter.get_url_extractor().find_urls(message)
 
     references: dict[str, str] = {}
 
@@ -1,21 +1,21 @@
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 
+from dotenv import load_dotenv
 from hivemind_etl_helpers.src.db.discord.utils.content_parser import (
     check_no_content_only_links,
     remove_empty_str,
     remove_none_from_list,
 )
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
 from hivemind_etl_helpers.src.db.discord.utils.id_transform import convert_role_id
 from hivemind_etl_helpers.src.db.discord.utils.merge_user_ids_fetch_names import (
     merge_user_ids_and_fetch_names,
 )
-from hivemind_etl_helpers.src.db.discord.utils.prepare_raw_message_ids import (
-    prepare_raw_message_ids,
-)
-from hivemind_etl_helpers.src.db.discord.utils.prepare_raw_message_urls import (
-    prepare_raw_message_urls,
-)
+from hivemind_etl_helpers.src.db.discord.utils.message_rewriter import MessageRewriter
 from hivemind_etl_helpers.src.db.discord.utils.prepare_reactions_id import (
     prepare_raction_ids,
 )
@@ -27,6 +27,9 @@ def transform_discord_raw_messages(
     guild_id: str,
     messages: list[dict],
     exclude_metadata: bool = False,
+    directory: GuildDirectory | None = None,
+    workers: int | None = None,
+    chunk_size: int | None = None,
 ) -> list[Document]:
     """
     transform the raw messages of discord to llama_index docuemnts
@@ -42,18 +45,83 @@ def transform_discord_raw_messages(
     exclude_metadata : bool
         whether to have all metadata or have nothing
         default is false meaning not to exclude any metadata
+    directory : GuildDirectory | None
+        the directory of guild members and roles to convert the ids to names
+        if not given, a new directory of the guild would be loaded
+    workers : int | None
+        the count of processes to transform the messages with
+        if not given the `DISCORD_TRANSFORM_WORKERS` env variable is used
+        and `1` means to transform within the current process
+    chunk_size : int | None
+        the count of messages sent to a process at a time
+        if not given the `DISCORD_TRANSFORM_CHUNK_SIZE` env variable is used
 
     Returns
     ---------
     messages_docuemnt : list[llama_index.Document]
         list of messages converted to documents
+        in the same order of the given messages
     """
-    documents = []
+    if directory is None:
+        directory = GuildDirectory(guild_id)
+
+    load_dotenv()
+    if workers is None:
+        workers = int(os.getenv("DISCORD_TRANSFORM_WORKERS") or "1")
+    if chunk_size is None:
+        chunk_size = int(os.getenv("DISCORD_TRANSFORM_CHUNK_SIZE") or "500")
+
+    if workers <= 1 or len(messages) <= chunk_size:
+        return _transform_messages(guild_id, messages, exclude_metadata, directory)
+
+    # each process gets its chunk of messages with a read-only directory
+    # of the members and roles that the chunk needs
+    chunks = [
+        messages[idx : idx + chunk_size] for idx in range(0, len(messages), chunk_size)
+    ]
+    chunks_args = [
+        (guild_id, chunk, exclude_metadata, directory.get_read_only_copy(chunk))
+        for chunk in chunks
+    ]
+    logging.info(
+        f"GUILDID: {guild_id} Transforming {len(messages)} messages "
+        f"in {len(chunks)} chunks using {workers} processes!"
+    )
+
+    documents: list[Document] = []
+    # the processes are not forked from the current one, as its other threads
+    # (e.g. the prefetch or the mongodb monitors) could be holding a lock
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("forkserver")
+    ) as executor:
+        # `map` keeps the order of chunks
+        for chunk_documents in executor.map(_transform_chunk, chunks_args):
+            documents.extend(chunk_documents)
+
+    return documents
 
+
+def _transform_chunk(
+    args: tuple[str, list[dict], bool, GuildDirectory]
+) -> list[Document]:
+    guild_id, messages, exclude_metadata, directory = args
+    return _transform_messages(guild_id, messages, exclude_metadata, directory)
+
+
+def _transform_messages(
+    guild_id: str,
+    messages: list[dict],
+    exclude_metadata: bool,
+    directory: GuildDirectory,
+) -> list[Document]:
+    documents = []
     for msg in messages:
         try:
             doc = prepare_document(
-                message=msg, guild_id=guild_id, exclude_metadata=exclude_metadata
+                message=msg,
+                guild_id=guild_id,
+                exclude_metadata=exclude_metadata,
+                directory=directory,
             )
             documents.append(doc)
         except Exception as exp:
@@ -68,6 +136,7 @@ def prepare_document(
     message: dict[str, Any],
     guild_id: str,
     exclude_metadata: bool,
+    directory: GuildDirectory | None = None,
 ) -> Document | None:
     """
     prepare the llama_index.Document based on single discord message
@@ -80,7 +149,9 @@ def prepare_document(
         the guild id to access data
     exclude_metadata : bool
         whether to have all metadata (False) or have nothing (True)
-
+    directory : GuildDirectory | None
+        the directory of guild members and roles to convert the ids to names
+        default is `None`, meaning to query the database for each message
 
     Returns
     --------
@@ -122,7 +193,7 @@ def prepare_document(
                 author_nickname,
             ),
         ) = merge_user_ids_and_fetch_names(
-            guild_id, mention_ids, reaction_ids, [author_id]
+            guild_id, mention_ids, reaction_ids, [author_id], directory=directory
         )
     else:
         (
@@ -145,17 +216,21 @@ def prepare_document(
                 replier_nickname,
             ),
         ) = merge_user_ids_and_fetch_names(
-            guild_id, mention_ids, reaction_ids, [author_id], [replier_id]
+            guild_id,
+            mention_ids,
+            reaction_ids,
+            [author_id],
+            [replier_id],
+            directory=directory,
         )
 
-    role_names = convert_role_id(guild_id, role_ids)
+    role_names = convert_role_id(guild_id, role_ids, directory)
 
-    content = prepare_raw_message_ids(
+    content_url_updated, url_reference = MessageRewriter().rewrite(
         raw_content,
         roles=dict(zip(role_ids, role_names)),
         users=dict(zip(mention_ids, mention_names)),
     )
-    content_url_updated, url_reference = prepare_raw_message_urls(content)
 
     # always has length 1
     assert len(author_name) == 1
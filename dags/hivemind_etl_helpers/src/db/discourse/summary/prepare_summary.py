@@ -76,6 +76,10 @@ class DiscourseSummary(SummaryBase):
                     )
                     topic_summaries[date][category][topic] = summary
 
+        logging.info(
+            f"{self.prefix}Avoided {self.llm_calls_avoided} LLM calls "
+            "with extractive summaries!"
+        )
         return topic_summaries
 
     def prepare_category_summaries(
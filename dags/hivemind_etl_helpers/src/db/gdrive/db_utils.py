@@ -3,6 +3,10 @@ from datetime import datetime, timezone
 
 import psycopg2
 from dateutil import parser
+from hivemind_etl_helpers.src.utils.metadata_columns import (
+    get_promoted_column,
+    has_promoted_columns,
+)
 from tc_hivemind_backend.db.pg_db_utils import convert_tuple_str
 from tc_hivemind_backend.db.postgresql import PostgresSingleton
 
@@ -87,6 +91,14 @@ def fetch_files_date_field(
     if "identifier_type" in kwargs:
         identifier_type = kwargs["identifier_type"]  # type: ignore
 
+    # the promoted metadata columns are used if the table has them
+    id_column: str | None = None
+    condition_column: str | None = None
+    if has_promoted_columns(dbname=f"community_{community_id}", table_name=table_name):
+        id_column = get_promoted_column(table_name, identifier)
+        if condition_identifier is not None:
+            condition_column = get_promoted_column(table_name, condition_identifier)
+
     # initializing
     results: dict[str, datetime]
 
@@ -95,7 +107,14 @@ def fetch_files_date_field(
     connection.autocommit = True
     try:
         # preparing for the database query
-        if "text" in identifier_type:
+        if id_column is not None:
+            # the typed column is compared with the ids as string literals
+            if "integer" in identifier_type:
+                ids_string = convert_tuple_str([str(int(item)) for item in file_ids])
+            else:
+                ids_string = convert_tuple_str([str(item) for item in file_ids])
+            id_filter = f"{id_column} IN {ids_string}"
+        elif "text" in identifier_type:
             ids_string = str(tuple([f"{item}" for item in file_ids]))
         elif "integer" in identifier_type:
             if len(file_ids) != 1:
@@ -107,6 +126,9 @@ def fetch_files_date_field(
         else:
             ids_string = convert_tuple_str(file_ids)
 
+        if id_column is None:
+            id_filter = f"(metadata_->>'{identifier}'){identifier_type} IN {ids_string}"
+
         with connection.cursor() as cursor:
             query = f"""
                 SELECT jsonb_agg(result) as result
@@ -118,10 +140,14 @@ def fetch_files_date_field(
                     FROM
                         data_{table_name}
                     WHERE
-                        (metadata_->>'{identifier}'){identifier_type} IN {ids_string}
+                        {id_filter}
                 """
 
-            if condition_identifier is not None:
+            if condition_column is not None:
+                query += f"""
+                    AND {condition_column} = '{condition_value}'
+                """
+            elif condition_identifier is not None:
                 query += f"""
                     AND metadata_->>'{condition_identifier}' = '{condition_value}'
                 """
@@ -1,9 +1,12 @@
 from hivemind_etl_helpers.src.document_node_parser import configure_node_parser
+from hivemind_etl_helpers.src.utils.embedding_cache import (
+    flush_embedding_cache,
+    get_embed_model,
+)
+from hivemind_etl_helpers.src.utils.vector_loader import PipelinedVectorLoader
 from llama_index.core import Document, Settings
 from llama_index.llms.openai import OpenAI
 from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
-from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
-from tc_hivemind_backend.pg_vector_access import PGVectorAccess
 
 
 def load_documents_into_pg_database(
@@ -32,25 +35,39 @@ def load_documents_into_pg_database(
             for default it is `"community_{community_id}"`
         deletion_query : str
             a query to delete some documents
+        insert_method : str
+            either `insert` or `copy` (binary `COPY`) to insert the rows
+            default is read from `VECTOR_INSERT_METHOD` env variable
+        watermark : Watermark
+            the ETL watermark to move forward with the saved documents
     """
     chunk_size, embedding_dim = load_model_hyperparams()
     dbname = kwargs.get("db_name", f"community_{community_id}")
 
-    pg_vector = PGVectorAccess(table_name=table_name, dbname=dbname)
+    embed_model = get_embed_model()
+    vector_loader = PipelinedVectorLoader(
+        table_name=table_name,
+        dbname=dbname,
+        embed_model=embed_model,
+        batch_size=100,
+        embed_dim=embedding_dim,
+        insert_method=kwargs.get("insert_method"),
+        watermark=kwargs.get("watermark"),
+    )
 
     node_parser = configure_node_parser(chunk_size=chunk_size)
 
     Settings.node_parser = node_parser
-    Settings.embed_model = CohereEmbedding()
+    Settings.embed_model = embed_model
     Settings.chunk_size = chunk_size
     Settings.llm = OpenAI(model="gpt-3.5-turbo")
 
-    pg_vector.save_documents_in_batches(
-        community_id=community_id,
-        documents=documents,
-        batch_size=100,
-        max_request_per_minute=None,
-        embed_dim=embedding_dim,
-        request_per_minute=10000,
-        deletion_query=kwargs.get("deletion_query", ""),
-    )
+    try:
+        vector_loader.save_documents(
+            community_id=community_id,
+            documents=documents,
+            deletion_query=kwargs.get("deletion_query", ""),
+        )
+    finally:
+        vector_loader.close()
+    flush_embedding_cache(embed_model)
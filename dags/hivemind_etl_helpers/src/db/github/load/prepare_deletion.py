@@ -1,4 +1,5 @@
 from hivemind_etl_helpers.src.utils.check_documents import check_documents
+from hivemind_etl_helpers.src.utils.metadata_columns import get_metadata_column
 from llama_index.core import Document
 
 
@@ -6,6 +7,7 @@ class PrepareDeletion:
     def __init__(
         self,
         community_id: str,
+        promoted: bool = False,
     ) -> None:
         """
         delete documents wrapper class for GitHub ETL
@@ -14,8 +16,12 @@ class PrepareDeletion:
         ------------
         community_id : str
             the community database to check data within it
+        promoted : bool
+            whether the `data_github` table has the promoted metadata columns
+            if not, the json metadata is queried. default is `False`
         """
         self.community_id = community_id
+        self.promoted = promoted
 
     def prepare(
         self,
@@ -129,14 +135,15 @@ class PrepareDeletion:
         if len(doc_ids_to_delete) == 0:
             return ""
         if len(doc_ids_to_delete) == 1:
-            deletion_ids = f"({doc_ids_to_delete[0]})"
+            deletion_ids = f"('{doc_ids_to_delete[0]}')"
         else:
             # issues and comments
             deletion_ids = str(tuple([f"{item}" for item in doc_ids_to_delete]))
 
+        id_column = get_metadata_column("github", "id", self.promoted)
         deletion_query = f"""
             DELETE FROM data_github
-            WHERE (metadata_->>'id')::text IN {deletion_ids};
+            WHERE {id_column} IN {deletion_ids};
         """
         return deletion_query
 
@@ -0,0 +1,377 @@
+import hashlib
+import importlib.metadata
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+
+import psycopg2
+from dotenv import load_dotenv
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+from psycopg2.extras import execute_values
+from tc_hivemind_backend.db.credentials import load_postgres_credentials
+from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
+from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
+
+
+def get_embedding_key(model_name: str, embed_dim: int, text: str) -> str:
+    """
+    get the sha256 hex digest of a text embedding using a model and dimension
+    """
+    return hashlib.sha256(
+        f"{model_name}:{embed_dim}:{text}".encode("utf-8")
+    ).hexdigest()
+
+
+def get_model_name(embed_model: BaseEmbedding) -> str:
+    """
+    get the name of an embedding model to use in the cache keys
+    the `CohereEmbedding` of `tc_hivemind_backend` keeps its model within its code,
+    so the version of the package defining the model class is included too,
+    to not reuse the cached embeddings once the package changes its model
+
+    Parameters
+    ------------
+    embed_model : BaseEmbedding
+        the embedding model to name
+
+    Returns
+    ---------
+    model_name : str
+        the model class path, its `model_name`, and its package version
+    """
+    model_class = type(embed_model)
+    package = model_class.__module__.split(".")[0]
+    try:
+        version = importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+
+    return (
+        f"{model_class.__module__}.{model_class.__qualname__}"
+        f":{embed_model.model_name}:{package}=={version}"
+    )
+
+
+def _to_bytes(embedding: list[float]) -> bytes:
+    # the pgvector columns are float4, so no precision is lost in float32
+    return array("f", embedding).tobytes()
+
+
+def _from_bytes(data: bytes) -> list[float]:
+    embedding = array("f")
+    embedding.frombytes(data)
+    return embedding.tolist()
+
+
+class SqliteEmbeddingCache:
+    def __init__(self, path: str) -> None:
+        """
+        keep the embeddings within a local sqlite database
+
+        Parameters
+        ------------
+        path : str
+            the sqlite database file path
+        """
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL
+                );
+                """
+            )
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """
+        get the embeddings of the keys available within the cache
+        """
+        results: dict[str, list[float]] = {}
+        with self._lock:
+            # keeping within the sqlite max variables count
+            for idx in range(0, len(keys), 500):
+                batch = keys[idx : idx + 500]
+                cursor = self.connection.execute(
+                    "SELECT key, embedding FROM embedding_cache "
+                    f"WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+                results.update({key: _from_bytes(data) for key, data in cursor})
+        return results
+
+    def set_many(self, embeddings: dict[str, list[float]]) -> None:
+        """
+        save the embeddings of keys
+        """
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, embedding) VALUES (?, ?)",
+                [(key, _to_bytes(value)) for key, value in embeddings.items()],
+            )
+
+
+class PostgresEmbeddingCache:
+    def __init__(self, dbname: str) -> None:
+        """
+        keep the embeddings within a postgresql table
+        so they are shared between the workers and communities
+
+        Parameters
+        ------------
+        dbname : str
+            the database to save the embeddings in
+        """
+        self.dbname = dbname
+        self._lock = threading.Lock()
+
+        creds = load_postgres_credentials()
+        self.connection = psycopg2.connect(
+            dbname=self.dbname,
+            user=creds["user"],
+            password=creds["password"],
+            host=creds["host"],
+            port=creds["port"],
+        )
+        with self._lock, self.connection.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    embedding BYTEA NOT NULL
+                );
+                """
+            )
+            self.connection.commit()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """
+        get the embeddings of the keys available within the cache
+        """
+        with self._lock, self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT key, embedding FROM embedding_cache WHERE key = ANY(%s)",
+                (keys,),
+            )
+            results = {key: _from_bytes(bytes(data)) for key, data in cursor}
+            self.connection.commit()
+        return results
+
+    def set_many(self, embeddings: dict[str, list[float]]) -> None:
+        """
+        save the embeddings of keys
+        """
+        with self._lock, self.connection.cursor() as cursor:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO embedding_cache (key, embedding) VALUES %s
+                ON CONFLICT (key) DO NOTHING
+                """,
+                [
+                    (key, psycopg2.Binary(_to_bytes(value)))
+                    for key, value in embeddings.items()
+                ],
+            )
+            self.connection.commit()
+
+
+class CachedEmbedding(BaseEmbedding):
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: SqliteEmbeddingCache | PostgresEmbeddingCache = PrivateAttr()
+    _embed_dim: int = PrivateAttr()
+    _write_batch_size: int = PrivateAttr()
+    _pending: dict[str, list[float]] = PrivateAttr()
+    _hits: int = PrivateAttr()
+    _misses: int = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr()
+
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,
+        cache: SqliteEmbeddingCache | PostgresEmbeddingCache,
+        embed_dim: int,
+        write_batch_size: int = 100,
+        model_name: str | None = None,
+    ) -> None:
+        """
+        an embedding model looking up the text embeddings within a cache
+        before calling the wrapped embedding model
+        the missed embeddings are written to the cache in batches
+
+        Parameters
+        ------------
+        embed_model : BaseEmbedding
+            the embedding model to call for the texts not in the cache
+        cache : SqliteEmbeddingCache | PostgresEmbeddingCache
+            the cache of embeddings
+        embed_dim : int
+            the embedding dimension, used in cache keys
+        write_batch_size : int
+            the count of missed embeddings to write to the cache at once
+        model_name : str | None
+            the model name of the wrapped embedding model, used in cache keys
+            default is `None` meaning it is derived from the wrapped model
+        """
+        super().__init__(
+            model_name=model_name or get_model_name(embed_model),
+            embed_batch_size=embed_model.embed_batch_size,
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+        self._embed_dim = embed_dim
+        self._write_batch_size = write_batch_size
+        self._pending = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        """
+        the count of texts found within the cache
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        the count of texts embedded with the wrapped model
+        """
+        return self._misses
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        the ratio of the texts found within the cache
+        """
+        total = self._hits + self._misses
+        return self._hits / total if total else 0.0
+
+    def flush(self) -> None:
+        """
+        write the pending missed embeddings to the cache
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        if pending:
+            self._cache.set_many(pending)
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        keys = [get_embedding_key(self.model_name, self._embed_dim, t) for t in texts]
+        with self._lock:
+            # the embeddings not written to the cache yet
+            found = {key: self._pending[key] for key in keys if key in self._pending}
+        found.update(self._cache.get_many([key for key in keys if key not in found]))
+
+        # the texts are embedded once even if repeated
+        missed: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missed.setdefault(key, text)
+        if missed:
+            embeddings = self._embed_model.get_text_embedding_batch(
+                list(missed.values())
+            )
+            found.update(zip(missed.keys(), embeddings))
+
+        with self._lock:
+            self._hits += len(texts) - len(missed)
+            self._misses += len(missed)
+            self._pending.update({key: found[key] for key in missed})
+            should_flush = len(self._pending) >= self._write_batch_size
+        if should_flush:
+            self.flush()
+
+        return [found[key] for key in keys]
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._embed_model.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        return await self._embed_model.aget_query_embedding(query)
+
+
+def get_embedding_cache() -> SqliteEmbeddingCache | PostgresEmbeddingCache | None:
+    """
+    get the embedding cache configured with the `EMBEDDING_CACHE` env variable
+
+    - `sqlite`: embeddings are saved within the `EMBEDDING_CACHE_PATH` file
+    - `postgres`: embeddings are saved within `EMBEDDING_CACHE_DB` database
+    - not set: embeddings are not cached
+
+    Returns
+    ---------
+    cache : SqliteEmbeddingCache | PostgresEmbeddingCache | None
+        `None` if embeddings should not be cached
+    """
+    load_dotenv()
+    cache_type = os.getenv("EMBEDDING_CACHE", "").lower()
+
+    if cache_type == "":
+        return None
+    elif cache_type == "sqlite":
+        path = os.getenv("EMBEDDING_CACHE_PATH")
+        if not path:
+            raise ValueError("EMBEDDING_CACHE_PATH is not given in env")
+        logging.info(f"Caching the embeddings within {path}")
+        return SqliteEmbeddingCache(path)
+    elif cache_type == "postgres":
+        dbname = os.getenv("EMBEDDING_CACHE_DB")
+        if not dbname:
+            raise ValueError("EMBEDDING_CACHE_DB is not given in env")
+        logging.info(f"Caching the embeddings within {dbname} database")
+        return PostgresEmbeddingCache(dbname)
+    else:
+        raise ValueError(f"Not supported EMBEDDING_CACHE: {cache_type}")
+
+
+def get_embed_model() -> BaseEmbedding:
+    """
+    get the embedding model of the hivemind pipelines
+    which is `CohereEmbedding` wrapped with the cache if it is configured
+    the missed embeddings are written to the cache in batches of
+    `EMBEDDING_CACHE_WRITE_BATCH_SIZE` env variable
+
+    Returns
+    ---------
+    embed_model : BaseEmbedding
+        the embedding model to use
+    """
+    embed_model = CohereEmbedding()
+    cache = get_embedding_cache()
+    if cache is None:
+        return embed_model
+
+    _, embed_dim = load_model_hyperparams()
+    write_batch_size = int(os.getenv("EMBEDDING_CACHE_WRITE_BATCH_SIZE") or "100")
+    return CachedEmbedding(
+        embed_model,
+        cache,
+        embed_dim=embed_dim,
+        write_batch_size=write_batch_size,
+    )
+
+
+def flush_embedding_cache(embed_model: BaseEmbedding) -> None:
+    """
+    write the pending embeddings of the model to the cache and log its hit ratio
+    nothing is done if the model is not cached
+    """
+    if isinstance(embed_model, CachedEmbedding):
+        embed_model.flush()
+        logging.info(
+            f"Embedding cache hits: {embed_model.hits}, "
+            f"misses: {embed_model.misses}, "
+            f"hit ratio: {embed_model.hit_ratio:.2f}"
+        )
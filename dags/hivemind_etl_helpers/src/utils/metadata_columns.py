@@ -0,0 +1,319 @@
+import argparse
+import logging
+import threading
+
+import psycopg2
+from tc_hivemind_backend.db.credentials import load_postgres_credentials
+
+# the metadata keys promoted to typed generated columns per table
+# in the format of `{table_name: {metadata_key: (column, type)}}`
+PROMOTED_COLUMNS: dict[str, dict[str, tuple[str, str]]] = {
+    "discord": {
+        "date": ("metadata_date", "timestamp"),
+    },
+    "discord_summary": {
+        "date": ("metadata_date", "timestamp"),
+    },
+    "discourse": {
+        "postId": ("metadata_id", "double precision"),
+        "updatedAt": ("metadata_updated_at", "timestamp"),
+        "forum_endpoint": ("metadata_forum_endpoint", "text"),
+    },
+    "discourse_summary": {
+        "date": ("metadata_date", "timestamp"),
+        "forum_endpoint": ("metadata_forum_endpoint", "text"),
+    },
+    "github": {
+        "id": ("metadata_id", "text"),
+        "created_at": ("metadata_date", "timestamp"),
+        "updated_at": ("metadata_updated_at", "timestamp"),
+    },
+    "gdrive": {
+        "file id": ("metadata_id", "text"),
+        "modified at": ("metadata_updated_at", "timestamp"),
+    },
+}
+
+# the btree indexes of the promoted columns per table
+PROMOTED_INDEXES: dict[str, list[tuple[str, ...]]] = {
+    "discord": [("metadata_date",)],
+    "discord_summary": [("metadata_date",)],
+    "discourse": [
+        ("metadata_id",),
+        ("metadata_forum_endpoint", "metadata_updated_at"),
+    ],
+    "discourse_summary": [("metadata_forum_endpoint", "metadata_date")],
+    "github": [("metadata_id",), ("metadata_date",)],
+    "gdrive": [("metadata_id",)],
+}
+
+# generated columns need immutable expressions, so the values are parsed in
+# a fixed format, i.e. the ISO 8601 dates and the decimal numbers
+# the values not in the format are `NULL` within the columns
+CAST_FUNCTIONS: dict[str, str] = {
+    "timestamp": "hivemind_to_timestamp",
+    "double precision": "hivemind_to_float",
+}
+CAST_FUNCTION_QUERIES: dict[str, str] = {
+    "timestamp": r"""
+        CREATE OR REPLACE FUNCTION hivemind_to_timestamp(value text)
+        RETURNS timestamp LANGUAGE sql IMMUTABLE STRICT AS $$
+            SELECT make_timestamp(
+                parts[1]::int,
+                parts[2]::int,
+                parts[3]::int,
+                coalesce(parts[4], '0')::int,
+                coalesce(parts[5], '0')::int,
+                coalesce(parts[6], '0')::double precision
+            )
+            FROM (
+                SELECT regexp_match(
+                    value,
+                    '^(\d{4})-(\d{2})-(\d{2})'
+                    '(?:[T ](\d{2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?)?'
+                ) AS parts
+            ) AS matched;
+        $$;
+    """,
+    "double precision": r"""
+        CREATE OR REPLACE FUNCTION hivemind_to_float(value text)
+        RETURNS double precision LANGUAGE sql IMMUTABLE STRICT AS $$
+            SELECT CASE
+                WHEN value ~ '^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$'
+                THEN value::double precision
+            END;
+        $$;
+    """,
+}
+
+_promoted_tables: set[tuple[str, str]] = set()
+_promoted_tables_lock = threading.Lock()
+
+
+def get_promoted_column(table_name: str, metadata_key: str) -> str | None:
+    """
+    get the generated column of a metadata key within the `data_{table_name}`
+
+    Parameters
+    ------------
+    table_name : str
+        the table name without the `data_` prefix, e.g. `discourse`
+    metadata_key : str
+        the key of the metadata, e.g. `postId`
+
+    Returns
+    ---------
+    column : str | None
+        the column name, `None` if the key is not promoted
+    """
+    column = PROMOTED_COLUMNS.get(table_name, {}).get(metadata_key)
+    return column[0] if column is not None else None
+
+
+def get_metadata_column(table_name: str, metadata_key: str, promoted: bool) -> str:
+    """
+    get the sql expression of a promoted metadata key within `data_{table_name}`
+
+    Parameters
+    ------------
+    table_name : str
+        the table name without the `data_` prefix, e.g. `discourse`
+    metadata_key : str
+        the key of the metadata, e.g. `postId`
+    promoted : bool
+        whether the table has the promoted columns
+        if not, the json metadata is casted to the column type
+
+    Returns
+    ---------
+    expression : str
+        the column name or the json cast of the metadata key
+    """
+    column, column_type = PROMOTED_COLUMNS[table_name][metadata_key]
+    if promoted:
+        return column
+    return f"(metadata_->>'{metadata_key}')::{column_type}"
+
+
+def has_promoted_columns(dbname: str, table_name: str) -> bool:
+    """
+    check whether the `data_{table_name}` table has the promoted columns
+    the ETLs query the json metadata until the table is migrated
+
+    Parameters
+    ------------
+    dbname : str
+        the database of the table
+    table_name : str
+        the table name without the `data_` prefix, e.g. `discourse`
+
+    Returns
+    ---------
+    promoted : bool
+        whether the table has all of the promoted columns
+    """
+    if table_name not in PROMOTED_COLUMNS:
+        return False
+
+    with _promoted_tables_lock:
+        if (dbname, table_name) in _promoted_tables:
+            return True
+
+    try:
+        connection = _connect(dbname)
+    except psycopg2.OperationalError as exp:
+        logging.warning(f"Could not connect to database {dbname}, exp: {exp}")
+        return False
+
+    try:
+        with connection.cursor() as cursor:
+            existing_columns = _get_columns(cursor, f"data_{table_name}")
+        connection.commit()
+    finally:
+        connection.close()
+
+    promoted = all(
+        column in existing_columns
+        for column, _ in PROMOTED_COLUMNS[table_name].values()
+    )
+    if promoted:
+        with _promoted_tables_lock:
+            _promoted_tables.add((dbname, table_name))
+    return promoted
+
+
+def promote_metadata_columns(dbname: str, table_name: str) -> bool:
+    """
+    migrate the `data_{table_name}` table to have its hot metadata keys
+    as typed generated columns with btree indexes, so the incremental queries
+    would not cast the json metadata of all rows
+
+    the columns and indexes are added once, adding them rewrites the table
+    holding an `ACCESS EXCLUSIVE` lock, so the existing tables are migrated
+    out of band running this module, i.e.
+    `python -m hivemind_etl_helpers.src.utils.metadata_columns <community_id>`
+    nothing is done if the database or the table is not created yet
+
+    Parameters
+    ------------
+    dbname : str
+        the database of the table
+    table_name : str
+        the table name without the `data_` prefix, e.g. `discourse`
+
+    Returns
+    ---------
+    promoted : bool
+        whether the table has the promoted columns
+    """
+    if table_name not in PROMOTED_COLUMNS:
+        return False
+
+    with _promoted_tables_lock:
+        if (dbname, table_name) in _promoted_tables:
+            return True
+
+    try:
+        connection = _connect(dbname)
+    except psycopg2.OperationalError as exp:
+        logging.warning(f"Could not connect to database {dbname}, exp: {exp}")
+        return False
+
+    try:
+        with connection.cursor() as cursor:
+            promoted = _migrate_table(cursor, f"data_{table_name}", table_name)
+        connection.commit()
+    finally:
+        connection.close()
+
+    if promoted:
+        with _promoted_tables_lock:
+            _promoted_tables.add((dbname, table_name))
+    return promoted
+
+
+def _migrate_table(cursor, table: str, table_name: str) -> bool:
+    existing_columns = _get_columns(cursor, table)
+    if "metadata_" not in existing_columns:
+        logging.info(f"No table {table} to promote its metadata columns!")
+        return False
+
+    missing_columns = [
+        (key, column, column_type)
+        for key, (column, column_type) in PROMOTED_COLUMNS[table_name].items()
+        if column not in existing_columns
+    ]
+    if missing_columns:
+        logging.info(
+            f"Promoting the metadata columns of {table}: "
+            f"{[column for _, column, _ in missing_columns]}"
+        )
+        # the concurrent migrations of a database wait for each other
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('metadata_columns'));")
+        _create_cast_functions(cursor)
+
+        additions = []
+        for key, column, column_type in missing_columns:
+            expression = f"metadata_->>'{key}'"
+            if column_type in CAST_FUNCTIONS:
+                expression = f"{CAST_FUNCTIONS[column_type]}({expression})"
+            additions.append(
+                f"ADD COLUMN IF NOT EXISTS {column} {column_type} "
+                f"GENERATED ALWAYS AS ({expression}) STORED"
+            )
+        cursor.execute(f"ALTER TABLE {table} {', '.join(additions)};")
+
+    for columns in PROMOTED_INDEXES[table_name]:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {_get_index_name(table, columns)} "
+            f"ON {table} ({', '.join(columns)});"
+        )
+
+    return True
+
+
+def _get_columns(cursor, table: str) -> set[str]:
+    cursor.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+        """,
+        (table,),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _connect(dbname: str):
+    creds = load_postgres_credentials()
+    return psycopg2.connect(
+        dbname=dbname,
+        user=creds["user"],
+        password=creds["password"],
+        host=creds["host"],
+        port=creds["port"],
+    )
+
+
+def _get_index_name(table: str, columns: tuple[str, ...]) -> str:
+    names = [column.removeprefix("metadata_") for column in columns]
+    return f"{table}_{'_'.join(names)}_idx"
+
+
+def _create_cast_functions(cursor) -> None:
+    for query in CAST_FUNCTION_QUERIES.values():
+        cursor.execute(query)
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="promote the metadata columns of a community tables"
+    )
+    parser.add_argument("community_id", help="the community to migrate its tables")
+    args = parser.parse_args()
+
+    for table_name in PROMOTED_COLUMNS.keys():
+        promote_metadata_columns(
+            dbname=f"community_{args.community_id}", table_name=table_name
+        )
@@ -0,0 +1,63 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# marks the end of the produced items
+_DONE = object()
+
+
+def prefetch(items: Iterable[T], max_prefetch: int = 1) -> Iterator[T]:
+    """
+    iterate over the items while the next ones are being produced in a
+    background thread, so producing and consuming the items would overlap
+
+    Parameters
+    ------------
+    items : Iterable[T]
+        the items to produce in background, e.g. a generator fetching data
+    max_prefetch : int
+        the maximum count of items produced and not yet consumed
+
+    Returns
+    ---------
+    items : Iterator[T]
+        the same items in the same order
+        an exception of the producer is raised in the consumer
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max_prefetch)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # not blocking forever if the consumer has stopped
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_DONE)
+        except Exception as exp:
+            put(exp)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
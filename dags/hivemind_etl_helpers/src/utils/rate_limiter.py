@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatStartEvent,
+    LLMCompletionStartEvent,
+)
+
+_llm_rate_limiter: "RateLimiter | None" = None
+_llm_rate_limiter_lock = threading.Lock()
+_embedding_rate_limiter: "RateLimiter | None" = None
+_embedding_rate_limiter_lock = threading.Lock()
+_llm_rate_limit_handler: "LLMRateLimitEventHandler | None" = None
+_llm_rate_limit_handler_lock = threading.Lock()
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_period: int = 0,
+        tokens_per_period: int = 0,
+        period: float = 60.0,
+    ) -> None:
+        """
+        a thread-safe sliding window limiter of requests and tokens
+
+        Parameters
+        -----------
+        requests_per_period : int
+            the max count of requests within a period
+            `0` means no limit on the requests
+        tokens_per_period : int
+            the max count of tokens within a period
+            `0` means no limit on the tokens
+        period : float
+            the period length in seconds, default is a minute
+        """
+        self.requests_per_period = requests_per_period
+        self.tokens_per_period = tokens_per_period
+        self.period = period
+
+        # the `(time, tokens)` of the requests within the last period
+        self._requests: deque[tuple[float, int]] = deque()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> None:
+        """
+        block until a request with the given tokens is allowed
+        a request having more tokens than the limit is allowed when it is alone
+
+        Parameters
+        -----------
+        tokens : int
+            the estimated tokens of the request
+        """
+        if not self.requests_per_period and not self.tokens_per_period:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._requests and now - self._requests[0][0] >= self.period:
+                    _, request_tokens = self._requests.popleft()
+                    self._tokens -= request_tokens
+
+                requests_allowed = (
+                    not self.requests_per_period
+                    or len(self._requests) < self.requests_per_period
+                )
+                tokens_allowed = (
+                    not self.tokens_per_period
+                    or not self._requests
+                    or self._tokens + tokens <= self.tokens_per_period
+                )
+                if requests_allowed and tokens_allowed:
+                    self._requests.append((now, tokens))
+                    self._tokens += tokens
+                    return
+
+                wait_time = self.period - (now - self._requests[0][0])
+
+            time.sleep(wait_time)
+
+
+def get_llm_rate_limiter() -> RateLimiter:
+    """
+    get the rate limiter shared between the LLM calls of a process
+    configured with the `LLM_REQUESTS_PER_MINUTE` and `LLM_TOKENS_PER_MINUTE`
+    env variables, not setting them means no limit
+    """
+    global _llm_rate_limiter
+
+    with _llm_rate_limiter_lock:
+        if _llm_rate_limiter is None:
+            load_dotenv()
+            _llm_rate_limiter = RateLimiter(
+                requests_per_period=int(os.getenv("LLM_REQUESTS_PER_MINUTE") or "0"),
+                tokens_per_period=int(os.getenv("LLM_TOKENS_PER_MINUTE") or "0"),
+            )
+        return _llm_rate_limiter
+
+
+class LLMRateLimitEventHandler(BaseEventHandler):
+    """
+    acquire the LLM rate limiter before each of the LLM calls
+    the prompt tokens are estimated as four characters per token
+
+    Note: the LLMs doing their chat calls through `complete` (i.e. `CustomLLM`)
+    acquire twice for a chat call, being limited more than needed.
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMRateLimitEventHandler"
+
+    def handle(self, event: BaseEvent, **kwargs) -> None:
+        if isinstance(event, LLMCompletionStartEvent):
+            characters = len(event.prompt)
+        elif isinstance(event, LLMChatStartEvent):
+            characters = sum(len(message.content or "") for message in event.messages)
+        else:
+            return
+
+        get_llm_rate_limiter().acquire(characters // 4)
+
+
+def register_llm_rate_limiter() -> None:
+    """
+    apply the LLM rate limiter to every LLM call of the process
+    a response synthesizer can make many calls for one summary
+    (i.e. `tree_summarize`), so the limiter is applied per call
+    using the llama_index instrumentation events, calling it again does nothing
+    """
+    global _llm_rate_limit_handler
+
+    with _llm_rate_limit_handler_lock:
+        if _llm_rate_limit_handler is None:
+            _llm_rate_limit_handler = LLMRateLimitEventHandler()
+            get_dispatcher().add_event_handler(_llm_rate_limit_handler)
+
+
+def get_embedding_rate_limiter() -> RateLimiter:
+    """
+    get the rate limiter shared between the embedding batch requests of a process
+    configured with the `EMBEDDING_REQUESTS_PER_MINUTE` env variable,
+    not setting it means no limit
+    """
+    global _embedding_rate_limiter
+
+    with _embedding_rate_limiter_lock:
+        if _embedding_rate_limiter is None:
+            load_dotenv()
+            _embedding_rate_limiter = RateLimiter(
+                requests_per_period=int(
+                    os.getenv("EMBEDDING_REQUESTS_PER_MINUTE") or "0"
+                ),
+            )
+        return _embedding_rate_limiter
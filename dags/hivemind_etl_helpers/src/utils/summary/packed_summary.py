@@ -0,0 +1,138 @@
+import json
+import re
+
+from llama_index.core import Document
+from llama_index.core.schema import MetadataMode
+
+# the json object within the LLM response, possibly wrapped in a code block
+JSON_OBJECT_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def estimate_tokens(documents: list[Document]) -> int:
+    """
+    a rough estimate of the tokens of documents, having 4 characters per token
+    """
+    return sum(len(doc.text) for doc in documents) // 4
+
+
+def prepare_extractive_summary(documents: list[Document]) -> str:
+    """
+    a deterministic summary of small documents
+    having each document text as a bullet point within one line
+
+    Parameters
+    -----------
+    documents : list[Document]
+        the documents to summarize
+
+    Returns
+    --------
+    summary : str
+        the bullet points of documents text
+    """
+    lines = [" ".join(doc.text.split()) for doc in documents]
+    summary = "\n".join(f"- {line}" for line in lines if line != "")
+    return summary
+
+
+def pack_by_token_budget(tokens: list[int], token_budget: int) -> list[list[int]]:
+    """
+    pack the items into groups having their tokens sum within the budget
+    keeping the order of items
+
+    Parameters
+    -----------
+    tokens : list[int]
+        the estimated tokens of each item
+    token_budget : int
+        the max tokens of a pack
+        an item having more tokens than the budget would be a pack on its own
+
+    Returns
+    --------
+    packs : list[list[int]]
+        the index of items within each pack
+    """
+    packs: list[list[int]] = []
+    pack_tokens = 0
+    for idx, item_tokens in enumerate(tokens):
+        if packs and pack_tokens + item_tokens <= token_budget:
+            packs[-1].append(idx)
+            pack_tokens += item_tokens
+        else:
+            packs.append([idx])
+            pack_tokens = item_tokens
+    return packs
+
+
+def prepare_packed_prompt(documents_groups: list[list[Document]], query: str) -> str:
+    """
+    prepare one prompt to summarize multiple groups of documents separately
+    each group is labeled as `T1`, `T2`, etc
+
+    Parameters
+    -----------
+    documents_groups : list[list[Document]]
+        the groups of documents, each to be summarized on its own
+    query : str
+        the summarization query
+
+    Returns
+    --------
+    prompt : str
+        the prompt asking for a json object of the summaries per label
+    """
+    labels = ", ".join(
+        f'"T{idx}": "..."' for idx in range(1, len(documents_groups) + 1)
+    )
+    prompt = (
+        f"{query}\n"
+        f"Below are {len(documents_groups)} separate discussions, "
+        "each starting with its label like [T1]. "
+        "Summarize each discussion separately and answer just with a JSON object "
+        f"having the labels as keys and the summaries as values: {{{labels}}}\n"
+    )
+    for idx, documents in enumerate(documents_groups, start=1):
+        texts = [doc.get_content(metadata_mode=MetadataMode.LLM) for doc in documents]
+        prompt += f"\n[T{idx}]\n" + "\n".join(texts) + "\n"
+    return prompt
+
+
+def parse_packed_summaries(response: str, count: int) -> list[str] | None:
+    """
+    parse the summaries of a packed prompt from the LLM response
+
+    Parameters
+    -----------
+    response : str
+        the LLM response to the packed prompt
+    count : int
+        the count of groups within the packed prompt
+
+    Returns
+    --------
+    summaries : list[str] | None
+        the summaries in the order of groups
+        `None` if the response was not valid for all groups
+    """
+    match = JSON_OBJECT_PATTERN.search(response)
+    if match is None:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    summaries: list[str] = []
+    for idx in range(1, count + 1):
+        summary = data.get(f"T{idx}")
+        # bullet points might be given as a list
+        if isinstance(summary, list) and all(isinstance(s, str) for s in summary):
+            summary = "\n".join(summary)
+        if not isinstance(summary, str) or summary.strip() == "":
+            return None
+        summaries.append(summary)
+
+    return summaries
@@ -1,3 +1,21 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from dotenv import load_dotenv
+from hivemind_etl_helpers.src.utils.rate_limiter import register_llm_rate_limiter
+from hivemind_etl_helpers.src.utils.summary.packed_summary import (
+    estimate_tokens,
+    parse_packed_summaries,
+    prepare_extractive_summary,
+    prepare_packed_prompt,
+)
+from hivemind_etl_helpers.src.utils.summary.summary_memo import (
+    get_summary_key,
+    get_summary_memo,
+)
 from llama_index.core import Document, SummaryIndex
 from llama_index.core.llms import LLM
 from llama_index.core.response_synthesizers.base import BaseSynthesizer
@@ -25,10 +43,24 @@ class SummaryBase:
             if nothing passed, it would use the default `llama_index.core.Setting.llm`
 
         Note: `chunk_size` is read from `llama_index.core.Setting.chunk_size`.
+        Note: the summaries are memoized if the `SUMMARY_MEMO` env is set.
+        Note: the documents having estimated tokens not more than
+        the `SUMMARY_EXTRACTIVE_MAX_TOKENS` env are summarized without the LLM.
         """
         self.llm = llm
         self.response_synthesizer = response_synthesizer
         self.verbose = verbose
+        self.summary_memo = get_summary_memo()
+        # limiting each of the LLM calls, including the response synthesizer ones
+        register_llm_rate_limiter()
+
+        load_dotenv()
+        self.extractive_max_tokens = int(
+            os.getenv("SUMMARY_EXTRACTIVE_MAX_TOKENS") or "0"
+        )
+        # the count of LLM calls avoided by the extractive summaries
+        self.llm_calls_avoided = 0
+        self._llm_calls_avoided_lock = threading.Lock()
 
     def _get_summary(
         self, messages_document: list[Document], summarization_query: str
@@ -36,14 +68,152 @@ class SummaryBase:
         """
         a simple wrapper to get the summaries of multiple documents
         """
+        if self._is_extractive(messages_document):
+            with self._llm_calls_avoided_lock:
+                self.llm_calls_avoided += 1
+            return prepare_extractive_summary(messages_document)
+
+        memo_key: str | None = None
+        if self.summary_memo is not None:
+            memo_key = get_summary_key(
+                messages_document,
+                summarization_query,
+                self.llm,
+                self.response_synthesizer,
+            )
+            summary = self.summary_memo.get(memo_key)
+            if summary is not None:
+                return summary
+
         summary_index = SummaryIndex.from_documents(
             documents=messages_document,
             response_synthesizer=self.response_synthesizer,
             show_progress=self.verbose,
         )
         summary_response = self.retrieve_summary(summary_index, summarization_query)
+
+        if self.summary_memo is not None and memo_key is not None:
+            self.summary_memo.set(memo_key, summary_response)
         return summary_response
 
+    def _is_extractive(self, documents: list[Document]) -> bool:
+        """
+        whether the documents are small enough to be summarized without the LLM
+        """
+        return (
+            self.extractive_max_tokens > 0
+            and len(documents) > 0
+            and estimate_tokens(documents) <= self.extractive_max_tokens
+        )
+
+    def _get_summaries(
+        self,
+        jobs: list[tuple[list[Document], str]],
+        log_prefix: str = "Summarizing",
+    ) -> list[str]:
+        """
+        get the summaries of multiple groups of documents concurrently
+        the count of concurrent LLM calls is configured with
+        the `SUMMARY_MAX_CONCURRENCY` env variable
+
+        Parameters
+        -----------
+        jobs : list[tuple[list[Document], str]]
+            the documents to summarize with their summarization query
+        log_prefix : str
+            the prefix of the progress logs
+
+        Returns
+        --------
+        summaries : list[str]
+            the summaries in the same order of the given jobs
+        """
+        summaries = self._map_concurrently(
+            lambda job: self._get_summary(*job), jobs, log_prefix
+        )
+        return summaries
+
+    def _get_packed_summaries(
+        self, documents_groups: list[list[Document]], summarization_query: str
+    ) -> list[str] | None:
+        """
+        summarize multiple small groups of documents with one LLM call
+
+        Parameters
+        -----------
+        documents_groups : list[list[Document]]
+            the groups of documents, each to be summarized on its own
+        summarization_query : str
+            the summarization query of each group
+
+        Returns
+        --------
+        summaries : list[str] | None
+            the summaries in the order of groups
+            `None` if the LLM response could not be parsed
+        """
+        prompt = prepare_packed_prompt(documents_groups, summarization_query)
+        response = self.llm.complete(prompt)
+        summaries = parse_packed_summaries(response.text, len(documents_groups))
+        if summaries is None:
+            logging.warning(
+                f"Could not parse the summaries of {len(documents_groups)} packed groups!"
+            )
+        return summaries
+
+    def _map_concurrently(
+        self,
+        function: Callable[[Any], Any],
+        items: list,
+        log_prefix: str = "Summarizing",
+    ) -> list:
+        """
+        call the function for each of the items concurrently
+        the count of concurrent calls is configured with
+        the `SUMMARY_MAX_CONCURRENCY` env variable
+
+        Parameters
+        -----------
+        function : Callable[[Any], Any]
+            the function doing the LLM call
+        items : list
+            the items to call the function with
+        log_prefix : str
+            the prefix of the progress logs
+
+        Returns
+        --------
+        results : list
+            the function results in the same order of the given items
+        """
+        load_dotenv()
+        max_concurrency = int(os.getenv("SUMMARY_MAX_CONCURRENCY") or "1")
+
+        total_count = len(items)
+        done_count = 0
+        done_lock = threading.Lock()
+
+        def call(item: Any) -> Any:
+            nonlocal done_count
+
+            result = function(item)
+            with done_lock:
+                done_count += 1
+                logging.info(f"{log_prefix} {done_count}/{total_count}")
+            return result
+
+        if max_concurrency <= 1 or total_count <= 1:
+            return [call(item) for item in items]
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_concurrency, total_count),
+            thread_name_prefix="summary",
+        ) as executor:
+            # `map` keeps the order of the items
+            results = list(executor.map(call, items))
+
+        return results
+
     def retrieve_summary(
         self,
         doc_summary_index: SummaryIndex,
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+from llama_index.core import Document
+from llama_index.core.llms import LLM
+from llama_index.core.prompts import BasePromptTemplate
+from llama_index.core.prompts.default_prompt_selectors import (
+    DEFAULT_TREE_SUMMARIZE_PROMPT_SEL,
+)
+from llama_index.core.response_synthesizers.base import BaseSynthesizer
+from llama_index.core.schema import MetadataMode
+from tc_hivemind_backend.db.credentials import load_postgres_credentials
+
+# the llm parameters not changing the summaries, i.e. the client settings
+_LLM_IGNORED_PARAMS = {
+    "api_key",
+    "api_base",
+    "api_version",
+    "max_retries",
+    "timeout",
+    "reuse_client",
+    "default_headers",
+}
+
+
+def get_summary_key(
+    documents: list[Document],
+    query: str,
+    llm: LLM,
+    response_synthesizer: BaseSynthesizer | None = None,
+) -> str:
+    """
+    get the hash of a summarization call, the documents are hashed
+    with the metadata that is given to the LLM, and the call is hashed
+    with the LLM parameters (e.g. the temperature) and the prompt templates
+
+    Parameters
+    -----------
+    documents : list[Document]
+        the documents to summarize
+    query : str
+        the summarization query
+    llm : LLM
+        the llm doing the summarization
+    response_synthesizer : BaseSynthesizer | None
+        the response synthesizer summarizing the documents with its own llm
+        default is `None` meaning the `tree_summarize` one using the `llm`
+
+    Returns
+    --------
+    key : str
+        the sha256 hex digest of the call
+    """
+    prompts: dict[str, BasePromptTemplate]
+    if response_synthesizer is not None:
+        llm = getattr(response_synthesizer, "_llm", llm)
+        prompts = response_synthesizer.get_prompts()
+    else:
+        prompts = {"summary_template": DEFAULT_TREE_SUMMARIZE_PROMPT_SEL}
+
+    llm_params = {
+        key: value
+        for key, value in llm.to_dict().items()
+        if key not in _LLM_IGNORED_PARAMS
+    }
+
+    sha = hashlib.sha256()
+    sha.update(f"{type(llm).__name__}:{llm.metadata.model_name}".encode("utf-8"))
+    sha.update(b"\x00")
+    sha.update(json.dumps(llm_params, sort_keys=True, default=str).encode("utf-8"))
+    for name in sorted(prompts.keys()):
+        sha.update(b"\x00")
+        sha.update(f"{name}:{prompts[name].get_template(llm=llm)}".encode("utf-8"))
+    sha.update(b"\x00")
+    sha.update(query.encode("utf-8"))
+    for document in documents:
+        sha.update(b"\x00")
+        sha.update(document.get_content(metadata_mode=MetadataMode.LLM).encode("utf-8"))
+    return sha.hexdigest()
+
+
+class SqliteSummaryMemo:
+    def __init__(
+        self, path: str, max_entries: int = 100000, max_age_days: int = 30
+    ) -> None:
+        """
+        keep the summaries within a local sqlite database
+        the entries older than `max_age_days` and the least recently used entries
+        more than `max_entries` are evicted once when the memo is opened
+
+        Parameters
+        ------------
+        path : str
+            the sqlite database file path
+        max_entries : int
+            the max count of summaries to keep
+        max_age_days : int
+            the max days to keep a summary
+        """
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS summary_memo (
+                    key TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                );
+                """
+            )
+            self._evict()
+
+    def get(self, key: str) -> str | None:
+        """
+        get the summary of a key, `None` if it was not saved
+        """
+        with self._lock, self.connection:
+            result = self.connection.execute(
+                "SELECT summary FROM summary_memo WHERE key = ?", (key,)
+            ).fetchone()
+            if result is not None:
+                self.connection.execute(
+                    "UPDATE summary_memo SET used_at = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+        return result[0] if result is not None else None
+
+    def set(self, key: str, summary: str) -> None:
+        """
+        save the summary of a key
+        """
+        now = time.time()
+        with self._lock, self.connection:
+            self.connection.execute(
+                """
+                INSERT OR REPLACE INTO summary_memo (key, summary, created_at, used_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (key, summary, now, now),
+            )
+
+    def _evict(self) -> None:
+        self.connection.execute(
+            "DELETE FROM summary_memo WHERE created_at < ?",
+            (time.time() - self.max_age_days * 86400,),
+        )
+        self.connection.execute(
+            """
+            DELETE FROM summary_memo WHERE key NOT IN (
+                SELECT key FROM summary_memo ORDER BY used_at DESC LIMIT ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+
+class PostgresSummaryMemo:
+    def __init__(
+        self, dbname: str, max_entries: int = 100000, max_age_days: int = 30
+    ) -> None:
+        """
+        keep the summaries within a postgresql table, shared between the workers
+        the entries older than `max_age_days` and the least recently used entries
+        more than `max_entries` are evicted once when the memo is opened
+
+        Parameters
+        ------------
+        dbname : str
+            the database to save the summaries in
+        max_entries : int
+            the max count of summaries to keep
+        max_age_days : int
+            the max days to keep a summary
+        """
+        self.dbname = dbname
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS summary_memo (
+                        key TEXT PRIMARY KEY,
+                        summary TEXT NOT NULL,
+                        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                        used_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                    );
+                    """
+                )
+                cursor.execute(
+                    "DELETE FROM summary_memo WHERE created_at < NOW() - %s::interval",
+                    (f"{self.max_age_days} days",),
+                )
+                cursor.execute(
+                    """
+                    DELETE FROM summary_memo WHERE key NOT IN (
+                        SELECT key FROM summary_memo ORDER BY used_at DESC LIMIT %s
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def get(self, key: str) -> str | None:
+        """
+        get the summary of a key, `None` if it was not saved
+        """
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE summary_memo SET used_at = NOW() WHERE key = %s
+                    RETURNING summary
+                    """,
+                    (key,),
+                )
+                result = cursor.fetchone()
+            connection.commit()
+        finally:
+            connection.close()
+        return result[0] if result is not None else None
+
+    def set(self, key: str, summary: str) -> None:
+        """
+        save the summary of a key
+        """
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO summary_memo (key, summary) VALUES (%s, %s)
+                    ON CONFLICT (key) DO UPDATE
+                    SET summary = EXCLUDED.summary, used_at = NOW()
+                    """,
+                    (key, summary),
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _connect(self):
+        creds = load_postgres_credentials()
+        return psycopg2.connect(
+            dbname=self.dbname,
+            user=creds["user"],
+            password=creds["password"],
+            host=creds["host"],
+            port=creds["port"],
+        )
+
+
+def get_summary_memo() -> SqliteSummaryMemo | PostgresSummaryMemo | None:
+    """
+    get the summary memo configured with the `SUMMARY_MEMO` env variable
+
+    - `sqlite`: summaries are saved within the `SUMMARY_MEMO_PATH` file
+    - `postgres`: summaries are saved within `SUMMARY_MEMO_DB` database
+    - not set: summaries are not memoized
+
+    the eviction is configured with `SUMMARY_MEMO_MAX_ENTRIES`
+    and `SUMMARY_MEMO_MAX_AGE_DAYS` env variables
+
+    Returns
+    ---------
+    summary_memo : SqliteSummaryMemo | PostgresSummaryMemo | None
+        `None` if summaries should not be memoized
+    """
+    load_dotenv()
+    memo_type = os.getenv("SUMMARY_MEMO", "").lower()
+    max_entries = int(os.getenv("SUMMARY_MEMO_MAX_ENTRIES") or "100000")
+    max_age_days = int(os.getenv("SUMMARY_MEMO_MAX_AGE_DAYS") or "30")
+
+    if memo_type == "":
+        return None
+    elif memo_type == "sqlite":
+        path = os.getenv("SUMMARY_MEMO_PATH")
+        if not path:
+            raise ValueError("SUMMARY_MEMO_PATH is not given in env")
+        logging.info(f"Memoizing the summaries within {path}")
+        return SqliteSummaryMemo(path, max_entries, max_age_days)
+    elif memo_type == "postgres":
+        dbname = os.getenv("SUMMARY_MEMO_DB")
+        if not dbname:
+            raise ValueError("SUMMARY_MEMO_DB is not given in env")
+        logging.info(f"Memoizing the summaries within {dbname} database")
+        return PostgresSummaryMemo(dbname, max_entries, max_age_days)
+    else:
+        raise ValueError(f"Not supported SUMMARY_MEMO: {memo_type}")
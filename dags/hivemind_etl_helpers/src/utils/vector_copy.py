@@ -0,0 +1,384 @@
+import io
+import json
+import logging
+import re
+import struct
+
+import psycopg2
+from hivemind_etl_helpers.src.utils.metadata_columns import promote_metadata_columns
+from hivemind_etl_helpers.src.utils.vector_indexes import (
+    get_vector_index_name,
+    manage_vector_index,
+)
+from hivemind_etl_helpers.src.utils.watermarks import Watermark
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from psycopg2.extras import execute_values
+from tc_hivemind_backend.db.credentials import load_postgres_credentials
+
+# the binary COPY format header, having no flags and no header extension
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+# the columns filled of the llama-index pgvector tables, `id` is a serial
+COPY_COLUMNS = ("text", "metadata_", "node_id", "embedding")
+
+# the definitions of the indexes dropped during a load, kept until they are
+# created again so they would not be lost if the load was stopped
+DEFERRED_INDEXES_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS vector_deferred_indexes (
+        table_name TEXT NOT NULL,
+        index_name TEXT NOT NULL,
+        definition TEXT NOT NULL,
+        PRIMARY KEY (table_name, index_name)
+    );
+"""
+
+
+def to_concurrent_definition(definition: str) -> str:
+    """
+    rewrite an index definition of `pg_indexes` to be created concurrently
+    e.g. `CREATE INDEX name ON ...` to `CREATE INDEX CONCURRENTLY name ON ...`
+    """
+    return re.sub(
+        r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY ", definition
+    )
+
+
+def node_to_row(node: BaseNode) -> tuple[str, str, str, list[float]]:
+    """
+    get the values of `COPY_COLUMNS` for a node
+    the same as llama-index PGVectorStore saves them
+    """
+    metadata = node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+    return (
+        node.get_content(metadata_mode=MetadataMode.NONE),
+        json.dumps(metadata),
+        node.node_id,
+        node.get_embedding(),
+    )
+
+
+def encode_vector(embedding: list[float]) -> bytes:
+    """
+    encode an embedding in the pgvector binary format
+    which is the dimension, an unused int16 and the big-endian float4 values
+    """
+    return struct.pack(f"!hh{len(embedding)}f", len(embedding), 0, *embedding)
+
+
+def encode_copy_rows(nodes: list[BaseNode], jsonb: bool = False) -> bytes:
+    """
+    encode the nodes as the rows of a binary COPY into a pgvector table
+
+    Parameters
+    ------------
+    nodes : list[BaseNode]
+        the embedded nodes
+    jsonb : bool
+        whether the `metadata_` column is `jsonb` or `json`
+
+    Returns
+    ---------
+    data : bytes
+        the binary COPY data of the `COPY_COLUMNS`
+    """
+    buffer = io.BytesIO()
+    buffer.write(COPY_HEADER)
+    for node in nodes:
+        text, metadata_json, node_id, embedding = node_to_row(node)
+        metadata = metadata_json.encode("utf-8")
+        fields = (
+            text.encode("utf-8"),
+            # the jsonb binary format is the version number and the json text
+            b"\x01" + metadata if jsonb else metadata,
+            node_id.encode("utf-8"),
+            encode_vector(embedding),
+        )
+        buffer.write(struct.pack("!h", len(fields)))
+        for field in fields:
+            buffer.write(struct.pack("!i", len(field)))
+            buffer.write(field)
+    buffer.write(COPY_TRAILER)
+    return buffer.getvalue()
+
+
+class PGVectorCopyWriter:
+    def __init__(
+        self,
+        table_name: str,
+        dbname: str,
+        embed_dim: int,
+        watermark: Watermark | None = None,
+    ) -> None:
+        """
+        insert the embedded nodes into the `data_{table_name}` table
+        using binary `COPY` within one connection, a transaction per batch
+
+        Parameters
+        ------------
+        table_name : str
+            the table name to save the data, it would be saved in `data_{table_name}`
+        dbname : str
+            the database to save the data under
+        embed_dim : int
+            the embedding dimension, used if the table is not created yet
+        watermark : Watermark | None
+            the ETL watermark to move forward within the transaction of each batch
+        """
+        self.table_name = f"data_{table_name}"
+        self.dbname = dbname
+        self.embed_dim = embed_dim
+        self.watermark = watermark
+        self._deferred = False
+        self._deferred_vector_index = False
+
+        creds = load_postgres_credentials()
+        self.connection = psycopg2.connect(
+            dbname=self.dbname,
+            user=creds["user"],
+            password=creds["password"],
+            host=creds["host"],
+            port=creds["port"],
+        )
+        if self._create_table(embed_dim):
+            # migrating an empty table does not lock it for a rewrite
+            promote_metadata_columns(dbname=self.dbname, table_name=table_name)
+        self.jsonb = self._is_metadata_jsonb()
+        # the indexes of a stopped load, including its vector index
+        self._restore_indexes(include_vector_index=True)
+
+    def add(self, nodes: list[BaseNode]) -> list[str]:
+        """
+        insert the embedded nodes and move the watermark within one transaction
+
+        Returns
+        ---------
+        ids : list[str]
+            the node ids inserted
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                self._write_rows(cursor, nodes)
+                if self.watermark is not None:
+                    latest_date = self.watermark.get_latest(nodes)
+                    if latest_date is not None:
+                        self.watermark.set(cursor, latest_date)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return [node.node_id for node in nodes]
+
+    def _write_rows(self, cursor, nodes: list[BaseNode]) -> None:
+        data = io.BytesIO(encode_copy_rows(nodes, jsonb=self.jsonb))
+        cursor.copy_expert(
+            f"COPY {self.table_name} ({', '.join(COPY_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT binary)",
+            data,
+        )
+
+    def close(self) -> None:
+        """
+        create the deferred indexes again and close the connection
+        """
+        try:
+            self.connection.rollback()
+            if self._deferred:
+                self._restore_indexes(include_vector_index=False)
+                self._deferred = False
+
+            if self._deferred_vector_index:
+                self._deferred_vector_index = False
+                manage_vector_index(
+                    dbname=self.dbname,
+                    table_name=self.table_name.removeprefix("data_"),
+                    embed_dim=self.embed_dim,
+                    rebuild=True,
+                )
+                # the vector index is available again, sized to the loaded table
+                self._forget_deferred_index(self._get_vector_index_name())
+        finally:
+            self.connection.close()
+
+    def _create_table(self, embed_dim: int) -> bool:
+        """
+        create the same table `llama_index` PGVectorStore creates
+        returns whether the table was created
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s);", (f"public.{self.table_name}",))
+            (existing_table,) = cursor.fetchone()
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table_name} (
+                    id BIGSERIAL PRIMARY KEY,
+                    text VARCHAR NOT NULL,
+                    metadata_ JSON,
+                    node_id VARCHAR,
+                    embedding VECTOR({embed_dim})
+                );
+                """
+            )
+        self.connection.commit()
+        return existing_table is None
+
+    def _is_metadata_jsonb(self) -> bool:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT data_type FROM information_schema.columns
+                WHERE table_name = %s AND column_name = 'metadata_'
+                """,
+                (self.table_name,),
+            )
+            result = cursor.fetchone()
+        self.connection.commit()
+        return result is not None and result[0] == "jsonb"
+
+    def defer_indexes(self) -> None:
+        """
+        drop the table indexes (except the primary key) to avoid updating them
+        per row, they are created again on `close`
+        the vector index is built again sized to the loaded table
+
+        the definitions are saved before dropping, so the indexes of a stopped
+        load are created again once a writer of the table is started.
+        the indexes are dropped and created concurrently, not to block
+        the other ETLs and the queries of the table
+        """
+        if self._deferred:
+            return
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(DEFERRED_INDEXES_TABLE_QUERY)
+            # the indexes not backing a constraint of the table, e.g. the primary key
+            cursor.execute(
+                """
+                SELECT i.indexname, i.indexdef FROM pg_indexes i
+                WHERE i.schemaname = 'public' AND i.tablename = %s AND NOT EXISTS (
+                    SELECT 1 FROM pg_constraint c
+                    WHERE c.conname = i.indexname
+                    AND c.conrelid = format('%%I.%%I', i.schemaname, i.tablename)::regclass
+                )
+                """,
+                (self.table_name,),
+            )
+            indexes = cursor.fetchall()
+            for name, definition in indexes:
+                cursor.execute(
+                    """
+                    INSERT INTO vector_deferred_indexes
+                        (table_name, index_name, definition)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (table_name, index_name) DO NOTHING;
+                    """,
+                    (self.table_name, name, definition),
+                )
+        # the definitions are saved before any index is dropped
+        self.connection.commit()
+
+        vector_index_name = self._get_vector_index_name()
+        for name, _ in indexes:
+            logging.info(f"Deferring the index {name} until the load is done!")
+            if name == vector_index_name:
+                self._deferred_vector_index = True
+            self._run_concurrently([f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";'])
+        self._deferred = True
+
+    def _restore_indexes(self, include_vector_index: bool) -> None:
+        """
+        create the deferred indexes of the table again, concurrently
+
+        Parameters
+        ------------
+        include_vector_index : bool
+            whether to create the deferred vector index from its saved definition
+            or leave it to be built sized to the loaded table
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(DEFERRED_INDEXES_TABLE_QUERY)
+            cursor.execute(
+                """
+                SELECT index_name, definition FROM vector_deferred_indexes
+                WHERE table_name = %s;
+                """,
+                (self.table_name,),
+            )
+            indexes = cursor.fetchall()
+        self.connection.commit()
+
+        vector_index_name = self._get_vector_index_name()
+        for name, definition in indexes:
+            if name == vector_index_name and not include_vector_index:
+                continue
+
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT i.indisvalid FROM pg_index i
+                    WHERE i.indexrelid = to_regclass(%s);
+                    """,
+                    (f'public."{name}"',),
+                )
+                existing_index = cursor.fetchone()
+            self.connection.commit()
+
+            if existing_index is None or not existing_index[0]:
+                logging.info(f"Creating the deferred index {name}!")
+                self._run_concurrently(
+                    [
+                        # an invalid index is left by a stopped concurrent build
+                        f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";',
+                        to_concurrent_definition(definition),
+                    ]
+                )
+            # forgotten once it is created, so a stopped restore is retried
+            self._forget_deferred_index(name)
+
+    def _forget_deferred_index(self, name: str) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM vector_deferred_indexes
+                WHERE table_name = %s AND index_name = %s;
+                """,
+                (self.table_name, name),
+            )
+        self.connection.commit()
+
+    def _run_concurrently(self, queries: list[str]) -> None:
+        """
+        run the queries outside of a transaction, as needed by `CONCURRENTLY`
+        """
+        self.connection.commit()
+        self.connection.autocommit = True
+        try:
+            with self.connection.cursor() as cursor:
+                for query in queries:
+                    cursor.execute(query)
+        finally:
+            self.connection.autocommit = False
+
+    def _get_vector_index_name(self) -> str:
+        return get_vector_index_name(self.table_name.removeprefix("data_"))
+
+
+class PGVectorInsertWriter(PGVectorCopyWriter):
+    """
+    insert the embedded nodes into the `data_{table_name}` table
+    using multi-row `INSERT` statements, a transaction per batch
+    """
+
+    def _write_rows(self, cursor, nodes: list[BaseNode]) -> None:
+        rows = []
+        for node in nodes:
+            text, metadata, node_id, embedding = node_to_row(node)
+            rows.append((text, metadata, node_id, str(embedding)))
+        execute_values(
+            cursor,
+            f"INSERT INTO {self.table_name} ({', '.join(COPY_COLUMNS)}) VALUES %s",
+            rows,
+            template="(%s, %s, %s, %s::vector)",
+        )
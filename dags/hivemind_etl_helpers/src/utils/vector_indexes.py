@@ -0,0 +1,305 @@
+import argparse
+import json
+import logging
+import math
+import os
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+from tc_hivemind_backend.db.credentials import load_postgres_credentials
+from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
+
+# the pgvector tables of the hivemind ETLs, without the `data_` prefix
+VECTOR_INDEX_TABLES = ["discord", "discord_summary", "discourse", "github", "gdrive"]
+VECTOR_INDEX_METHODS = ["hnsw", "ivfflat"]
+
+# pgvector indexes `vector` columns of at most this dimension
+MAX_INDEX_DIM = 2000
+
+# llama-index PGVectorStore queries the nodes by cosine distance
+OPERATOR_CLASS = "vector_cosine_ops"
+
+
+def get_vector_index_name(table_name: str) -> str:
+    """
+    get the name of the ANN index of the `data_{table_name}` table
+    """
+    return f"data_{table_name}_embedding_idx"
+
+
+def get_vector_index_params(method: str, row_count: int) -> dict[str, int]:
+    """
+    get the build parameters of an ANN index sized to the rows of the table
+
+    Parameters
+    ------------
+    method : str
+        either `hnsw` or `ivfflat`
+    row_count : int
+        the count of rows within the table
+
+    Returns
+    ---------
+    params : dict[str, int]
+        the index storage parameters
+        `m` and `ef_construction` for `hnsw`, and `lists` for `ivfflat`
+    """
+    if method == "hnsw":
+        # more links per node keep the recall of the larger graphs
+        m = 16 if row_count < 1_000_000 else 24
+        return {"m": m, "ef_construction": 4 * m}
+    elif method == "ivfflat":
+        # the pgvector recommendation of rows / 1000 lists up to 1M rows
+        # and the square root of rows after that
+        if row_count <= 1_000_000:
+            lists = max(row_count // 1000, 1)
+        else:
+            lists = int(math.sqrt(row_count))
+        return {"lists": lists}
+    else:
+        raise ValueError(f"Not supported vector index method: {method}")
+
+
+def manage_vector_index(dbname: str, table_name: str, **kwargs) -> dict | None:
+    """
+    create the ANN index of the `data_{table_name}` embeddings once the table
+    has enough rows, and build it again once the table has grown enough since
+    `ivfflat` indexes are sized by the rows they were built with
+    and `hnsw` indexes are bloated by the ETLs deleting and inserting rows again
+
+    the indexes are built concurrently, so the table is not locked for the ETLs
+
+    Parameters
+    ------------
+    dbname : str
+        the database of the table
+    table_name : str
+        the table name without the `data_` prefix, e.g. `discourse`
+    **kwargs :
+        embed_dim : int
+            the embedding dimension
+            default is read from `load_model_hyperparams`
+        method : str
+            either `hnsw` or `ivfflat`
+            default is read from `VECTOR_INDEX_METHOD` env variable
+        rebuild : bool
+            build the index again regardless of the table growth
+            i.e. after a bulk load, default is `False`
+
+    Returns
+    ---------
+    report : dict | None
+        the index name, method, build params, row count, action, build seconds
+        and size in bytes. `None` if the table does not have an index
+    """
+    load_dotenv()
+    method: str = kwargs.get("method") or os.getenv("VECTOR_INDEX_METHOD") or "hnsw"
+    if method not in VECTOR_INDEX_METHODS:
+        raise ValueError(f"Not supported vector index method: {method}")
+    embed_dim: int = kwargs.get("embed_dim") or load_model_hyperparams()[1]
+    rebuild: bool = kwargs.get("rebuild", False)
+
+    if embed_dim > MAX_INDEX_DIM:
+        logging.warning(
+            f"Embedding dimension {embed_dim} is more than {MAX_INDEX_DIM}, "
+            f"skipping the vector index of data_{table_name}!"
+        )
+        return None
+
+    creds = load_postgres_credentials()
+    try:
+        connection = psycopg2.connect(
+            dbname=dbname,
+            user=creds["user"],
+            password=creds["password"],
+            host=creds["host"],
+            port=creds["port"],
+        )
+    except psycopg2.OperationalError as exp:
+        logging.warning(f"Could not connect to database {dbname}, exp: {exp}")
+        return None
+
+    # the concurrent index builds cannot be run within a transaction
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            maintenance_work_mem = os.getenv("VECTOR_INDEX_MAINTENANCE_WORK_MEM")
+            if maintenance_work_mem:
+                cursor.execute(
+                    "SET maintenance_work_mem = %s;", (maintenance_work_mem,)
+                )
+            report = _manage_index(cursor, table_name, method, rebuild)
+    finally:
+        connection.close()
+
+    if report is not None:
+        build_time = (
+            f"{report['build_seconds']:.1f}s"
+            if report["build_seconds"] is not None
+            else "-"
+        )
+        logging.info(
+            f"Vector index {report['index']} {report['action']}! "
+            f"method: {report['method']}, params: {report['params']}, "
+            f"rows: {report['rows']}, size: {report['size'] / 1024 ** 2:.1f} MB, "
+            f"build time: {build_time}"
+        )
+    return report
+
+
+def _manage_index(cursor, table_name: str, method: str, rebuild: bool) -> dict | None:
+    table = f"data_{table_name}"
+    index_name = get_vector_index_name(table_name)
+    min_rows = int(os.getenv("VECTOR_INDEX_MIN_ROWS") or "10000")
+    rebuild_growth = float(os.getenv("VECTOR_INDEX_REBUILD_GROWTH") or "2")
+
+    row_count = _get_row_count(cursor, table, analyze=rebuild)
+    if row_count is None:
+        logging.info(f"No table {table} to create its vector index!")
+        return None
+
+    index = _get_index(cursor, index_name)
+    if index is not None and not index["valid"]:
+        # the leftover of a failed concurrent build
+        logging.info(f"Dropping the invalid vector index {index_name}!")
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+        index = None
+
+    params = get_vector_index_params(method, row_count)
+    if index is None:
+        if row_count < min_rows:
+            # the exact scan of a small table is fast enough
+            return None
+        action = "created"
+    elif (
+        rebuild
+        or index["method"] != method
+        or row_count >= index["rows"] * rebuild_growth
+    ):
+        if index["method"] == method and index["params"] == params:
+            action = "reindexed"
+        else:
+            action = "rebuilt"
+    else:
+        action = "unchanged"
+
+    build_seconds: float | None = None
+    if action != "unchanged":
+        start = time.perf_counter()
+        if action == "created":
+            _create_index(cursor, table, index_name, method, params)
+        elif action == "reindexed":
+            cursor.execute(f"REINDEX INDEX CONCURRENTLY {index_name};")
+        else:
+            # swapping the indexes so the table is never left without one
+            new_index_name = f"{index_name}_new"
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {new_index_name};")
+            _create_index(cursor, table, new_index_name, method, params)
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+            cursor.execute(f"ALTER INDEX {new_index_name} RENAME TO {index_name};")
+        build_seconds = time.perf_counter() - start
+
+        comment = json.dumps({"method": method, "params": params, "rows": row_count})
+        cursor.execute(f"COMMENT ON INDEX {index_name} IS %s;", (comment,))
+    else:
+        method = index["method"]
+        params = index["params"]
+
+    cursor.execute("SELECT pg_relation_size(%s::regclass);", (index_name,))
+    (size,) = cursor.fetchone()
+
+    return {
+        "index": index_name,
+        "method": method,
+        "params": params,
+        "rows": row_count,
+        "action": action,
+        "build_seconds": build_seconds,
+        "size": size,
+    }
+
+
+def _get_row_count(cursor, table: str, analyze: bool = False) -> int | None:
+    """
+    get the estimated row count of the table, `None` if it does not exist
+    """
+    query = """
+        SELECT c.reltuples::bigint FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relname = %s AND c.relkind = 'r';
+    """
+    cursor.execute(query, (table,))
+    result = cursor.fetchone()
+    if result is None:
+        return None
+
+    # the table was never analyzed (`-1`) or was just bulk loaded
+    if result[0] < 0 or analyze:
+        cursor.execute(f"ANALYZE {table};")
+        cursor.execute(query, (table,))
+        result = cursor.fetchone()
+    return max(result[0], 0)
+
+
+def _get_index(cursor, index_name: str) -> dict | None:
+    """
+    get the validity and the build details saved as the comment of the index
+    """
+    cursor.execute(
+        """
+        SELECT i.indisvalid, obj_description(i.indexrelid, 'pg_class')
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relname = %s;
+        """,
+        (index_name,),
+    )
+    result = cursor.fetchone()
+    if result is None:
+        return None
+
+    valid, comment = result
+    details = json.loads(comment) if comment else {}
+    return {
+        "valid": valid,
+        "method": details.get("method"),
+        "params": details.get("params"),
+        "rows": details.get("rows", 0),
+    }
+
+
+def _create_index(
+    cursor, table: str, index_name: str, method: str, params: dict[str, int]
+) -> None:
+    storage_params = ", ".join(f"{key} = {value}" for key, value in params.items())
+    logging.info(f"Creating the vector index {index_name} using {method}!")
+    cursor.execute(
+        f"CREATE INDEX CONCURRENTLY {index_name} ON {table} "
+        f"USING {method} (embedding {OPERATOR_CLASS}) WITH ({storage_params});"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="create or rebuild the vector indexes of a community tables"
+    )
+    parser.add_argument("community_id", help="the community to index its tables")
+    parser.add_argument(
+        "--method", choices=VECTOR_INDEX_METHODS, help="the vector index method"
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="build the existing indexes again"
+    )
+    args = parser.parse_args()
+
+    for table_name in VECTOR_INDEX_TABLES:
+        manage_vector_index(
+            dbname=f"community_{args.community_id}",
+            table_name=table_name,
+            method=args.method,
+            rebuild=args.rebuild,
+        )
@@ -0,0 +1,283 @@
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator
+
+from dotenv import load_dotenv
+from hivemind_etl_helpers.src.utils.rate_limiter import get_embedding_rate_limiter
+from hivemind_etl_helpers.src.utils.vector_copy import (
+    PGVectorCopyWriter,
+    PGVectorInsertWriter,
+)
+from hivemind_etl_helpers.src.utils.vector_indexes import manage_vector_index
+from hivemind_etl_helpers.src.utils.watermarks import Watermark
+from llama_index.core import Document, Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.node_parser.interface import NodeParser
+from llama_index.core.schema import BaseNode
+from tc_hivemind_backend.db.utils.delete_data import delete_data
+from tc_hivemind_backend.db.utils.model_hyperparams import load_model_hyperparams
+
+# marks the end of the embedded batches
+_DONE = object()
+
+
+class PipelinedVectorLoader:
+    def __init__(
+        self,
+        table_name: str,
+        dbname: str,
+        embed_model: BaseEmbedding,
+        batch_size: int = 100,
+        **kwargs,
+    ) -> None:
+        """
+        embed the nodes of documents and save them within the pgvector table
+        while multiple batches are being embedded, the embedded batches are
+        inserted in order within a separate database connection
+
+        Parameters
+        -----------
+        table_name : str
+            the table name to save the data, it would be saved in `data_{table_name}`
+        dbname : str
+            the database to save the data under
+        embed_model : BaseEmbedding
+            the embedding model to use
+        batch_size : int
+            the count of nodes to embed and insert at once
+        **kwargs :
+            embed_dim : int
+                the embedding dimension
+                default is read from `load_model_hyperparams`
+            max_inflight : int
+                the max count of batches being embedded at the same time
+                default is read from `EMBEDDING_MAX_INFLIGHT_BATCHES` env variable
+            max_pending_inserts : int
+                the max count of embedded batches waiting to be inserted
+                embedding is paused when reached
+                default is read from `VECTOR_INSERT_MAX_PENDING_BATCHES` env variable
+            insert_method : str
+                either `insert` to insert the rows using `INSERT` statements
+                or `copy` to insert them using binary `COPY`
+                default is read from `VECTOR_INSERT_METHOD` env variable
+            defer_index_min_documents : int
+                with the `copy` method, the table indexes are dropped once this
+                count of documents are saved across the `save_documents` calls
+                and created again on `close`
+                default is read from `VECTOR_COPY_DEFER_INDEX_MIN_DOCUMENTS` env
+            watermark : Watermark | None
+                the ETL watermark to move forward with each inserted batch
+                within the same transaction, default is `None`
+        """
+        load_dotenv()
+        self.table_name = table_name
+        self.dbname = dbname
+        self.embed_model = embed_model
+        self.batch_size = batch_size
+
+        self.embed_dim: int = kwargs.get("embed_dim") or load_model_hyperparams()[1]
+        self.max_inflight: int = kwargs.get("max_inflight") or int(
+            os.getenv("EMBEDDING_MAX_INFLIGHT_BATCHES") or "2"
+        )
+        self.max_pending_inserts: int = kwargs.get("max_pending_inserts") or int(
+            os.getenv("VECTOR_INSERT_MAX_PENDING_BATCHES") or "2"
+        )
+        self.insert_method: str = kwargs.get("insert_method") or (
+            os.getenv("VECTOR_INSERT_METHOD") or "insert"
+        )
+        self.defer_index_min_documents: int = kwargs.get(
+            "defer_index_min_documents"
+        ) or int(os.getenv("VECTOR_COPY_DEFER_INDEX_MIN_DOCUMENTS") or "10000")
+
+        self.watermark: Watermark | None = kwargs.get("watermark")
+
+        self._vector_store: PGVectorCopyWriter | None = None
+        self._saved_documents_count = 0
+
+        if self.insert_method not in ["insert", "copy"]:
+            raise ValueError(f"Not supported insert_method: {self.insert_method}")
+
+    def save_documents(
+        self,
+        community_id: str,
+        documents: list[Document],
+        node_parser: NodeParser | None = None,
+        deletion_query: str = "",
+    ) -> None:
+        """
+        save the documents within the database
+        the loader keeps its database connection between the calls
+        and `close` should be called once all documents are saved
+
+        Parameters
+        -----------
+        community_id : str
+            the community id for the logging
+        documents : list[llama_index.Document]
+            the documents to save
+        node_parser : NodeParser | None
+            the node parser to chunk the documents
+            default is `llama_index.core.Settings.node_parser`
+        deletion_query : str
+            the query to delete some documents before inserting the new ones
+        """
+        msg = f"COMMUNITYID: {community_id} "
+        logging.info(f"{msg}Starting embedding and saving pipeline")
+
+        if deletion_query:
+            logging.info(f"{msg}Deleting some previous data in database!")
+            delete_data(deletion_query=deletion_query, dbname=self.dbname)
+
+        if len(documents) == 0:
+            return
+
+        if self._vector_store is None:
+            self._vector_store = self._get_vector_store()
+        vector_store = self._vector_store
+
+        # the backfills save their documents through many calls
+        self._saved_documents_count += len(documents)
+        if (
+            self.insert_method == "copy"
+            and self._saved_documents_count >= self.defer_index_min_documents
+        ):
+            vector_store.defer_indexes()
+
+        insert_queue: queue.Queue = queue.Queue(maxsize=self.max_pending_inserts)
+        stopped = threading.Event()
+        insert_errors: list[Exception] = []
+
+        def insert() -> None:
+            try:
+                inserted_count = 0
+                while not stopped.is_set():
+                    try:
+                        nodes = insert_queue.get(timeout=1)
+                    except queue.Empty:
+                        continue
+                    if nodes is _DONE:
+                        break
+                    vector_store.add(nodes)
+                    inserted_count += len(nodes)
+                    logging.info(f"{msg}Inserted {inserted_count} nodes")
+            except Exception as exp:
+                insert_errors.append(exp)
+                stopped.set()
+
+        inserter = threading.Thread(target=insert, daemon=True)
+        inserter.start()
+
+        def put(item) -> None:
+            # not blocking forever if the inserter has stopped
+            while not stopped.is_set():
+                try:
+                    insert_queue.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+            raise insert_errors[0]
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.max_inflight, thread_name_prefix="embedding"
+            ) as executor:
+                inflight: deque[Future] = deque()
+                node_batches = self._iterate_node_batches(
+                    documents, node_parser or Settings.node_parser
+                )
+                for nodes in node_batches:
+                    inflight.append(executor.submit(self._embed_nodes, nodes))
+                    # the batches are inserted in the order they were produced
+                    if len(inflight) >= self.max_inflight:
+                        put(inflight.popleft().result())
+                while inflight:
+                    put(inflight.popleft().result())
+            put(_DONE)
+        except BaseException:
+            stopped.set()
+            raise
+        finally:
+            inserter.join()
+
+        if insert_errors:
+            raise insert_errors[0]
+
+    def close(self) -> None:
+        """
+        create the deferred indexes and close the database connection
+        """
+        if self._vector_store is None:
+            return
+
+        try:
+            self._vector_store.close()
+        finally:
+            self._vector_store = None
+            self._saved_documents_count = 0
+
+        # creating the vector index once the table is large enough
+        # or building it again once the table has grown enough
+        manage_vector_index(
+            dbname=self.dbname, table_name=self.table_name, embed_dim=self.embed_dim
+        )
+
+    def _iterate_node_batches(
+        self, documents: list[Document], node_parser: NodeParser
+    ) -> Iterator[list[BaseNode]]:
+        """
+        chunk the documents into nodes lazily and yield them in batches
+        """
+        nodes: list[BaseNode] = []
+        for idx in range(0, len(documents), self.batch_size):
+            nodes.extend(
+                node_parser.get_nodes_from_documents(
+                    documents[idx : idx + self.batch_size]
+                )
+            )
+            while len(nodes) >= self.batch_size:
+                yield nodes[: self.batch_size]
+                nodes = nodes[self.batch_size :]
+        if nodes:
+            yield nodes
+
+    def _embed_nodes(self, nodes: list[BaseNode]) -> list[BaseNode]:
+        """
+        compute the embeddings of the nodes (assigning to their property)
+        """
+        texts = [node.text for node in nodes]
+        # the embedding model sends one request per `embed_batch_size` texts
+        request_size = self.embed_model.embed_batch_size
+        embeddings: list[list[float]] = []
+        for idx in range(0, len(texts), request_size):
+            get_embedding_rate_limiter().acquire()
+            embeddings.extend(
+                self.embed_model.get_text_embedding_batch(
+                    texts[idx : idx + request_size]
+                )
+            )
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        return nodes
+
+    def _get_vector_store(self) -> PGVectorCopyWriter:
+        """
+        get a writer having its own database connection
+        """
+        if self.insert_method == "copy":
+            return PGVectorCopyWriter(
+                table_name=self.table_name,
+                dbname=self.dbname,
+                embed_dim=self.embed_dim,
+                watermark=self.watermark,
+            )
+
+        return PGVectorInsertWriter(
+            table_name=self.table_name,
+            dbname=self.dbname,
+            embed_dim=self.embed_dim,
+            watermark=self.watermark,
+        )
@@ -0,0 +1,275 @@
+import argparse
+import logging
+from datetime import datetime
+
+import psycopg2
+from dateutil import parser
+from llama_index.core.schema import BaseNode
+from tc_hivemind_backend.db.credentials import load_postgres_credentials
+from tc_hivemind_backend.db.pg_db_utils import setup_db
+
+WATERMARKS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS etl_watermarks (
+        platform TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        scope TEXT NOT NULL DEFAULT '',
+        watermark TIMESTAMP NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (platform, table_name, scope)
+    );
+"""
+
+
+class Watermark:
+    def __init__(
+        self,
+        platform: str,
+        table_name: str,
+        metadata_key: str,
+        scope: str = "",
+        null_keys: list[str] | None = None,
+    ) -> None:
+        """
+        the resume point of an ETL, which is the latest date of its saved data
+        kept within the `etl_watermarks` table of the community database
+
+        Parameters
+        ------------
+        platform : str
+            the platform of the ETL, e.g. `discourse`
+        table_name : str
+            the table name the ETL saves its data in, without the `data_` prefix
+        metadata_key : str
+            the date key of the saved nodes metadata
+        scope : str
+            the scope of the data within the table, e.g. the forum endpoint
+            default is an empty string meaning the whole table
+        null_keys : list[str] | None
+            the metadata keys that must be null for a node to move the watermark
+            e.g. the `channel` and `thread` of discord summaries,
+            so only the daily summaries would move it
+        """
+        self.platform = platform
+        self.table_name = table_name
+        self.metadata_key = metadata_key
+        self.scope = scope
+        self.null_keys = null_keys or []
+
+    def get_latest(self, nodes: list[BaseNode]) -> datetime | None:
+        """
+        get the latest date of the nodes, `None` if no node has a date
+        """
+        dates: list[datetime] = []
+        for node in nodes:
+            if any(node.metadata.get(key) is not None for key in self.null_keys):
+                continue
+            date = to_timestamp(node.metadata.get(self.metadata_key))
+            if date is not None:
+                dates.append(date)
+        return max(dates, default=None)
+
+    def set(self, cursor, value: datetime) -> None:
+        """
+        move the watermark forward within the transaction of the given cursor
+        the `etl_watermarks` table is created on `load`
+        """
+        cursor.execute(
+            """
+            INSERT INTO etl_watermarks (platform, table_name, scope, watermark)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (platform, table_name, scope) DO UPDATE
+            SET watermark = GREATEST(etl_watermarks.watermark, EXCLUDED.watermark),
+                updated_at = NOW();
+            """,
+            (self.platform, self.table_name, self.scope, value),
+        )
+
+    def load(
+        self, community_id: str, dbname: str, latest_date_query: str
+    ) -> datetime | None:
+        """
+        load the watermark of the ETL
+        if it was not saved yet, the `latest_date_query` would be used once
+        to get the latest date of the saved data and save it as the watermark
+
+        Parameters
+        ------------
+        community_id : str
+            the community id for the case of logging
+        dbname : str
+            the community database
+        latest_date_query : str
+            the query to get the latest date of the saved data
+
+        Returns
+        ---------
+        watermark : datetime | None
+            `None` if no data was saved
+        """
+        msg = f"COMMUNITYID: {community_id} "
+        watermark = self._fetch(dbname)
+        if watermark is not None:
+            logging.info(f"{msg}Latest processed date (watermark): {watermark}")
+            return watermark
+
+        from_date = setup_db(
+            community_id=community_id,
+            dbname=dbname,
+            latest_date_query=latest_date_query,
+        )
+        # the database is available after `setup_db`
+        # and the table is created once here for the next `set` calls
+        connection = _connect(dbname)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(WATERMARKS_TABLE_QUERY)
+                if from_date is not None:
+                    logging.info(
+                        f"{msg}Saving the latest processed date as the watermark"
+                    )
+                    self.set(cursor, from_date)
+            connection.commit()
+        finally:
+            connection.close()
+        return from_date
+
+    def _fetch(self, dbname: str) -> datetime | None:
+        try:
+            connection = _connect(dbname)
+        except psycopg2.OperationalError:
+            # the database is not created yet
+            return None
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT watermark FROM etl_watermarks
+                    WHERE platform = %s AND table_name = %s AND scope = %s;
+                    """,
+                    (self.platform, self.table_name, self.scope),
+                )
+                result = cursor.fetchone()
+        except psycopg2.errors.UndefinedTable:
+            # the table is not created yet
+            return None
+        finally:
+            connection.close()
+        return result[0] if result is not None else None
+
+
+def reset_watermarks(
+    dbname: str,
+    platform: str,
+    table_name: str | None = None,
+    scope: str | None = None,
+) -> int:
+    """
+    delete the saved watermarks, so the ETLs would resume from their saved data
+    the watermarks just move forward, so resetting is needed
+    after deleting some saved data to process it again
+
+    can be run using `python -m hivemind_etl_helpers.src.utils.watermarks`
+
+    Parameters
+    ------------
+    dbname : str
+        the community database
+    platform : str
+        the platform of the ETLs, e.g. `discourse`
+    table_name : str | None
+        the table name of the ETL, without the `data_` prefix
+        default is `None` meaning all tables of the platform
+    scope : str | None
+        the scope of the data within the table, e.g. the forum endpoint
+        default is `None` meaning all scopes
+
+    Returns
+    ---------
+    deleted_count : int
+        the count of deleted watermarks
+    """
+    query = "DELETE FROM etl_watermarks WHERE platform = %s"
+    params: list[str] = [platform]
+    if table_name is not None:
+        query += " AND table_name = %s"
+        params.append(table_name)
+    if scope is not None:
+        query += " AND scope = %s"
+        params.append(scope)
+
+    connection = _connect(dbname)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(query + ";", tuple(params))
+            deleted_count = cursor.rowcount
+        connection.commit()
+    except psycopg2.errors.UndefinedTable:
+        # no watermark was saved yet
+        deleted_count = 0
+    finally:
+        connection.close()
+
+    logging.info(f"{deleted_count} watermarks of {platform} deleted in {dbname}")
+    return deleted_count
+
+
+def to_timestamp(value) -> datetime | None:
+    """
+    convert a metadata date to a timestamp without timezone
+    the same as casting it to `timestamp` in postgresql, ignoring the timezone
+
+    Parameters
+    ------------
+    value : Any
+        the metadata value, a datetime, a date string, or a unix timestamp
+
+    Returns
+    ---------
+    timestamp : datetime | None
+        `None` if the value was not a date
+    """
+    date: datetime
+    if isinstance(value, datetime):
+        date = value
+    elif isinstance(value, str):
+        try:
+            date = parser.parse(value)
+        except (ValueError, OverflowError):
+            return None
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        date = datetime.utcfromtimestamp(value)
+    else:
+        return None
+    return date.replace(tzinfo=None)
+
+
+def _connect(dbname: str):
+    creds = load_postgres_credentials()
+    return psycopg2.connect(
+        dbname=dbname,
+        user=creds["user"],
+        password=creds["password"],
+        host=creds["host"],
+        port=creds["port"],
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.INFO)
+    arg_parser = argparse.ArgumentParser(
+        description="reset the ETL watermarks of a community"
+    )
+    arg_parser.add_argument("community_id", help="the community to reset its ETLs")
+    arg_parser.add_argument("platform", help="the platform of the ETLs")
+    arg_parser.add_argument("--table-name", help="just the ETL of this table")
+    arg_parser.add_argument("--scope", help="just the data of this scope")
+    args = arg_parser.parse_args()
+
+    reset_watermarks(
+        dbname=f"community_{args.community_id}",
+        platform=args.platform,
+        table_name=args.table_name,
+        scope=args.scope,
+    )
@@ -0,0 +1,117 @@
+"""
+compare excluding the bots (`$nin`) against including all real users (`$in`)
+for filtering the discord `rawinfos` messages
+
+it seeds a throwaway guild database and prints the query body size,
+the winning plan stages and the execution time of both filters
+
+usage (from the `dags` directory, with the mongodb env variables set):
+    python -m hivemind_etl_helpers.tests.benchmark.bench_discord_bot_filter
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import BSON
+from hivemind_etl_helpers.src.utils.mongo import MongoSingleton
+
+GUILD_ID = "benchmark_bot_filter"
+MEMBERS_COUNT = 100_000
+BOTS_COUNT = 50
+MESSAGES_COUNT = 200_000
+CHANNELS = [f"channel_{idx}" for idx in range(20)]
+
+
+def seed_database() -> None:
+    client = MongoSingleton.get_instance().get_client()
+    client.drop_database(GUILD_ID)
+    db = client[GUILD_ID]
+
+    db["guildmembers"].insert_many(
+        [
+            {"discordId": f"user_{idx}", "isBot": idx < BOTS_COUNT}
+            for idx in range(MEMBERS_COUNT)
+        ]
+    )
+    db["guildmembers"].create_index([("isBot", 1)])
+
+    start_date = datetime(2023, 1, 1)
+    messages = []
+    for idx in range(MESSAGES_COUNT):
+        messages.append(
+            {
+                "messageId": str(idx),
+                "author": f"user_{random.randrange(MEMBERS_COUNT)}",
+                "type": 0,
+                "createdDate": start_date + timedelta(minutes=idx),
+                "isGeneratedByWebhook": False,
+                "channelId": random.choice(CHANNELS),
+                "content": f"message {idx}",
+            }
+        )
+        if len(messages) == 10_000:
+            db["rawinfos"].insert_many(messages)
+            messages = []
+    if messages:
+        db["rawinfos"].insert_many(messages)
+
+    db["rawinfos"].create_index([("channelId", 1), ("createdDate", 1)])
+    db["rawinfos"].create_index([("createdDate", 1)])
+
+
+def get_plan_stages(plan: dict) -> list[str]:
+    stages = [plan["stage"]]
+    for key in ("inputStage", "inputStages"):
+        children = plan.get(key, [])
+        for child in children if isinstance(children, list) else [children]:
+            stages.extend(get_plan_stages(child))
+    return stages
+
+
+def run_query(author_filter: dict, label: str) -> None:
+    db = MongoSingleton.get_instance().get_client()[GUILD_ID]
+    query = {
+        "author": author_filter,
+        "type": {"$ne": 18},
+        "createdDate": {"$gte": datetime(2023, 3, 1)},
+        "isGeneratedByWebhook": False,
+        "channelId": {"$in": CHANNELS[:10]},
+    }
+
+    explain = db["rawinfos"].find(query).sort("createdDate", 1).explain()
+    stages = get_plan_stages(explain["queryPlanner"]["winningPlan"])
+
+    start = time.perf_counter()
+    count = sum(1 for _ in db["rawinfos"].find(query).sort("createdDate", 1))
+    duration = time.perf_counter() - start
+
+    print(
+        f"{label}: query body {len(BSON.encode(query)) / 1024:.1f} KB, "
+        f"{count} messages in {duration:.2f}s, plan: {' <- '.join(stages)}"
+    )
+    if "IXSCAN" not in stages:
+        print(f"{label}: WARNING the query is not using an index!")
+
+
+def main() -> None:
+    seed_database()
+    db = MongoSingleton.get_instance().get_client()[GUILD_ID]
+
+    user_ids = [
+        member["discordId"]
+        for member in db["guildmembers"].find({"isBot": False}, {"discordId": 1})
+    ]
+    bot_ids = [
+        member["discordId"]
+        for member in db["guildmembers"].find({"isBot": True}, {"discordId": 1})
+    ]
+
+    run_query({"$in": user_ids}, "$in real users")
+    run_query({"$nin": bot_ids}, "$nin bots")
+
+    MongoSingleton.get_instance().get_client().drop_database(GUILD_ID)
+
+
+if __name__ == "__main__":
+    main()
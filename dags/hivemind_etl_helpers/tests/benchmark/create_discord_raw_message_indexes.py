@@ -0,0 +1,64 @@
+"""
+create the indexes that the discord raw messages queries rely on
+the `(channelId, createdDate)` index of `rawinfos` serves the channel and date
+filter with the date sort, and the `isBot` index of `guildmembers` serves
+fetching the bot ids, as verified by `bench_discord_bot_filter`
+
+the ETLs just read from mongodb, so this is run once by the operators,
+with a mongodb user having the `createIndex` privilege
+creating an already available index does nothing
+
+usage (from the `dags` directory, with the mongodb env variables set):
+    python -m hivemind_etl_helpers.tests.benchmark.create_discord_raw_message_indexes [guild_id ...]
+not giving any guild id means all discord guilds of the platforms
+"""
+
+import argparse
+import logging
+
+from hivemind_etl_helpers.src.utils.mongo import MongoSingleton
+
+
+def get_discord_guild_ids() -> list[str]:
+    """
+    get the guild id of all discord platforms
+    """
+    client = MongoSingleton.get_instance().get_client()
+    platforms = client["Core"]["platforms"].find(
+        {"name": "discord"}, {"_id": 0, "metadata.id": 1}
+    )
+    return [platform["metadata"]["id"] for platform in platforms]
+
+
+def create_raw_message_indexes(guild_id: str) -> None:
+    """
+    create the raw messages indexes of a guild if they are not available
+
+    Parameters
+    ------------
+    guild_id : str
+        the guild to create the indexes of its collections
+    """
+    client = MongoSingleton.get_instance().get_client()
+    client[guild_id]["rawinfos"].create_index([("channelId", 1), ("createdDate", 1)])
+    client[guild_id]["guildmembers"].create_index([("isBot", 1)])
+    logging.info(f"GUILDID: {guild_id} raw messages indexes are available")
+
+
+def main() -> None:
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="create the indexes of the discord raw messages queries"
+    )
+    parser.add_argument(
+        "guild_ids", nargs="*", help="the guilds, default is all discord guilds"
+    )
+    args = parser.parse_args()
+
+    for guild_id in args.guild_ids or get_discord_guild_ids():
+        create_raw_message_indexes(guild_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import unittest
+from datetime import datetime
+
+from hivemind_etl_helpers.src.db.discord.fetch_raw_messages import (
+    fetch_raw_messages,
+    get_bot_ids,
+    iterate_raw_messages,
+)
+from hivemind_etl_helpers.src.utils.mongo import MongoSingleton
+
+
+class TestFetchRawMessagesBots(unittest.TestCase):
+    def setUp(self):
+        self.guild_id = "1234"
+        self.client = MongoSingleton.get_instance().client
+        self.client[self.guild_id].drop_collection("guildmembers")
+        self.client[self.guild_id].drop_collection("rawinfos")
+
+        members = [("user1", False), ("user2", False), ("bot1", True)]
+        self.client[self.guild_id]["guildmembers"].insert_many(
+            [
+                {
+                    "discordId": discord_id,
+                    "username": discord_id,
+                    "isBot": is_bot,
+                    "globalName": None,
+                    "nickname": None,
+                }
+                for discord_id, is_bot in members
+            ]
+        )
+
+        messages = []
+        for idx, author in enumerate(["user1", "bot1", "user2", "bot1"]):
+            messages.append(
+                {
+                    "type": 0,
+                    "author": author,
+                    "content": f"message {idx}",
+                    "user_mentions": [],
+                    "role_mentions": [],
+                    "reactions": [],
+                    "replied_user": None,
+                    "createdDate": datetime(2024, 1, 1, idx),
+                    "messageId": str(idx),
+                    "channelId": "channel1",
+                    "channelName": "general",
+                    "threadId": None,
+                    "threadName": None,
+                    "isGeneratedByWebhook": False,
+                }
+            )
+        self.client[self.guild_id]["rawinfos"].insert_many(messages)
+
+    def test_get_bot_ids(self):
+        self.assertEqual(get_bot_ids(self.guild_id), ["bot1"])
+
+    def test_bots_excluded(self):
+        messages = fetch_raw_messages(
+            self.guild_id, ["channel1"], from_date=datetime(2023, 1, 1)
+        )
+        self.assertEqual([msg["author"] for msg in messages], ["user1", "user2"])
+
+        streamed = list(
+            iterate_raw_messages(
+                self.guild_id, ["channel1"], from_date=datetime(2023, 1, 1)
+            )
+        )
+        self.assertEqual([msg["messageId"] for msg in streamed], ["0", "2"])
+
+    def test_bots_filter_uses_index(self):
+        self.client[self.guild_id]["rawinfos"].create_index(
+            [("channelId", 1), ("createdDate", 1)]
+        )
+        explain = (
+            self.client[self.guild_id]["rawinfos"]
+            .find(
+                {
+                    "author": {"$nin": get_bot_ids(self.guild_id)},
+                    "type": {"$ne": 18},
+                    "createdDate": {"$gte": datetime(2023, 1, 1)},
+                    "isGeneratedByWebhook": False,
+                    "channelId": {"$in": ["channel1"]},
+                }
+            )
+            .sort("createdDate", 1)
+            .explain()
+        )
+        self.assertIn("IXSCAN", str(explain["queryPlanner"]["winningPlan"]))
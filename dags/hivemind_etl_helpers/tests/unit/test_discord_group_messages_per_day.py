@@ -0,0 +1,28 @@
+import unittest
+from datetime import datetime
+
+from hivemind_etl_helpers.src.db.discord.fetch_raw_messages import (
+    group_messages_per_day,
+)
+
+
+class TestDiscordGroupMessagesPerDay(unittest.TestCase):
+    def test_empty_messages(self):
+        self.assertEqual(list(group_messages_per_day([])), [])
+
+    def test_messages_multiple_days(self):
+        messages = [
+            {"messageId": "1", "createdDate": datetime(2023, 10, 1, 10)},
+            {"messageId": "2", "createdDate": datetime(2023, 10, 1, 23, 59)},
+            {"messageId": "3", "createdDate": datetime(2023, 10, 3, 0, 0)},
+            {"messageId": "4", "createdDate": datetime(2023, 10, 3, 5)},
+        ]
+        daily_messages = list(group_messages_per_day(iter(messages)))
+
+        self.assertEqual(
+            [
+                (date, [msg["messageId"] for msg in msgs])
+                for date, msgs in daily_messages
+            ],
+            [("2023-10-01", ["1", "2"]), ("2023-10-03", ["3", "4"])],
+        )
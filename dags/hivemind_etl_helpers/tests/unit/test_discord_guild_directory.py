@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
+
+
+class TestDiscordGuildDirectory(unittest.TestCase):
+    def setUp(self):
+        self.members = [
+            {
+                "discordId": "1",
+                "username": "user1",
+                "globalName": "User One",
+                "nickname": None,
+            },
+            {
+                "discordId": "2",
+                "username": "user2",
+                "globalName": None,
+                "nickname": "two",
+            },
+        ]
+        self.roles = [{"roleId": "r1", "name": "admin"}]
+
+        self.collections = {
+            "guildmembers": MagicMock(),
+            "roles": MagicMock(),
+        }
+        self.collections["guildmembers"].find.return_value = self.members
+        self.collections["roles"].find.return_value = self.roles
+
+        client = MagicMock()
+        client.__getitem__.return_value.__getitem__.side_effect = (
+            lambda name: self.collections[name]
+        )
+        mongo_patch = patch(
+            "hivemind_etl_helpers.src.db.discord.utils.guild_directory.MongoSingleton"
+        )
+        self.mongo_singleton = mongo_patch.start()
+        self.mongo_singleton.get_instance.return_value.client = client
+        self.addCleanup(mongo_patch.stop)
+
+    def test_get_members_keeps_order(self):
+        directory = GuildDirectory("1234")
+        members = directory.get_members(["2", "1", "2"])
+
+        self.assertEqual(
+            [member["username"] for member in members], ["user2", "user1", "user2"]
+        )
+        # just the bulk query
+        self.assertEqual(self.collections["guildmembers"].find.call_count, 1)
+
+    def test_unseen_ids_are_fetched_once(self):
+        directory = GuildDirectory("1234")
+        directory.load()
+
+        new_member = {
+            "discordId": "3",
+            "username": "user3",
+            "globalName": None,
+            "nickname": None,
+        }
+        self.collections["guildmembers"].find.return_value = [new_member]
+
+        members = directory.get_members(["3", "4", "1"])
+        self.assertEqual([member["username"] for member in members], ["user3", "user1"])
+        # the not available id is not fetched again
+        directory.get_members(["4"])
+        self.assertEqual(self.collections["guildmembers"].find.call_count, 2)
+
+    def test_get_roles(self):
+        directory = GuildDirectory("1234")
+        self.assertEqual(
+            directory.get_roles(["r1"]), [{"roleId": "r1", "name": "admin"}]
+        )
+        self.assertEqual(self.collections["roles"].find.call_count, 1)
+
+    def test_read_only_copy(self):
+        directory = GuildDirectory("1234")
+        copy = directory.get_read_only_copy(
+            [
+                {
+                    "author": "1",
+                    "user_mentions": ["3"],
+                    "role_mentions": ["r1"],
+                    "reactions": ["2,:thumbsup:"],
+                    "replied_user": None,
+                }
+            ]
+        )
+        self.assertEqual(set(copy.members.keys()), {"1", "2", "3"})
+        self.assertIsNone(copy.members["3"])
+        self.assertEqual(copy.get_roles(["r1"]), [{"roleId": "r1", "name": "admin"}])
+
+        find_count = self.collections["guildmembers"].find.call_count
+        # the copy doesn't query the database for the ids not within it
+        self.assertEqual(copy.get_members(["5", "1"])[0]["username"], "user1")
+        self.assertEqual(self.collections["guildmembers"].find.call_count, find_count)
@@ -0,0 +1,50 @@
+import unittest
+
+from hivemind_etl_helpers.src.db.discord.utils.message_rewriter import MessageRewriter
+
+
+class TestDiscordMessageRewriter(unittest.TestCase):
+    def setUp(self):
+        self.rewriter = MessageRewriter()
+
+    def test_mentions_and_urls(self):
+        message, references = self.rewriter.rewrite(
+            "Hello <@&1234> and <@4321>, check <https://google.com>",
+            roles={"1234": "Everyone"},
+            users={"4321": "user1_name"},
+        )
+        self.assertEqual(message, "Hello Everyone and user1_name, check <[URL0]>")
+        self.assertEqual(references, {"[URL0]": "https://google.com"})
+
+    def test_unknown_mentions_kept(self):
+        message, references = self.rewriter.rewrite(
+            "Hello <@&1> and <@2>",
+            roles={"2": "role_name"},
+            users={"1": "user_name"},
+        )
+        self.assertEqual(message, "Hello <@&1> and <@2>")
+        self.assertEqual(references, {})
+
+    def test_repeated_url_single_reference(self):
+        message, references = self.rewriter.rewrite(
+            "https://example.com/a https://example.com https://example.com/a",
+            roles={},
+            users={},
+        )
+        self.assertEqual(message, "[URL0] [URL1] [URL0]")
+        self.assertEqual(
+            references,
+            {"[URL0]": "https://example.com/a", "[URL1]": "https://example.com"},
+        )
+
+    def test_no_mentions_or_urls(self):
+        message, references = self.rewriter.rewrite(
+            "Good morning!", roles={"1": "role"}, users={"2": "user"}
+        )
+        self.assertEqual(message, "Good morning!")
+        self.assertEqual(references, {})
+
+    def test_shared_url_extractor(self):
+        self.assertIs(
+            MessageRewriter.get_url_extractor(), MessageRewriter.get_url_extractor()
+        )
@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.db.discord.discord_raw_message_to_document import (
+    discord_raw_to_documents_batches,
+)
+
+MODULE = "hivemind_etl_helpers.src.db.discord.discord_raw_message_to_document"
+
+
+class TestDiscordRawToDocumentsBatches(unittest.TestCase):
+    @patch(f"{MODULE}.GuildDirectory")
+    @patch(f"{MODULE}.transform_discord_raw_messages")
+    @patch(f"{MODULE}.iterate_raw_messages")
+    def test_batches(self, mock_iterate, mock_transform, mock_directory):
+        mock_iterate.return_value = iter([{"messageId": str(i)} for i in range(5)])
+        mock_transform.side_effect = lambda guild_id, messages, directory: [
+            message["messageId"] for message in messages
+        ]
+
+        batches = list(
+            discord_raw_to_documents_batches(
+                guild_id="1234",
+                selected_channels=["c1"],
+                from_date=datetime(2024, 1, 1),
+                batch_size=2,
+            )
+        )
+
+        self.assertEqual(batches, [["0", "1"], ["2", "3"], ["4"]])
+        # one directory shared for all batches
+        mock_directory.assert_called_once_with("1234")
+        for call in mock_transform.call_args_list:
+            self.assertIs(call.kwargs["directory"], mock_directory.return_value)
+
+    @patch(f"{MODULE}.GuildDirectory")
+    @patch(f"{MODULE}.transform_discord_raw_messages")
+    @patch(f"{MODULE}.iterate_raw_messages")
+    def test_no_messages(self, mock_iterate, mock_transform, mock_directory):
+        mock_iterate.return_value = iter([])
+
+        batches = list(
+            discord_raw_to_documents_batches(
+                guild_id="1234",
+                selected_channels=["c1"],
+                from_date=datetime(2024, 1, 1),
+            )
+        )
+
+        self.assertEqual(batches, [])
+        mock_transform.assert_not_called()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.db.discord.discord_summary import DiscordSummary
+from llama_index.core import Document, Settings
+from llama_index.core.llms import MockLLM
+
+
+class TestDiscordSummaryIterateDaily(unittest.TestCase):
+    def setUp(self):
+        Settings.llm = MockLLM()
+
+    def summarize(self, guild_id, raw_data_grouped, summarization_prefix, directory):
+        (date,) = raw_data_grouped.keys()
+        return (
+            [Document(text=f"thread {date}", metadata={"date": date})],
+            [Document(text=f"channel {date}", metadata={"date": date})],
+            [Document(text=f"daily {date}", metadata={"date": date})],
+        )
+
+    def test_summaries_per_day(self):
+        discord_summary = DiscordSummary(llm=MockLLM())
+        grouped_days = [
+            ("2023-10-01", {"general": {None: [{"content": "a"}]}}),
+            ("2023-10-02", {"general": {"thread": [{"content": "b"}]}}),
+        ]
+
+        with patch(
+            "hivemind_etl_helpers.src.db.discord.discord_summary.iterate_grouped_data",
+            return_value=iter(grouped_days),
+        ), patch(
+            "hivemind_etl_helpers.src.db.discord.discord_summary.GuildDirectory"
+        ) as mock_directory, patch.object(
+            discord_summary, "_summarize_grouped_data", side_effect=self.summarize
+        ) as mock_summarize:
+            daily_documents = discord_summary.iterate_daily_summaries(
+                guild_id="1234",
+                selected_channels=["111"],
+                summarization_prefix="summarize",
+                from_date=datetime(2023, 10, 1),
+            )
+
+            date, documents = next(daily_documents)
+            # the next day is not summarized before the first one is consumed
+            self.assertEqual(mock_summarize.call_count, 1)
+            self.assertEqual(date, "2023-10-01")
+            self.assertEqual(
+                [doc.text for doc in documents],
+                ["thread 2023-10-01", "channel 2023-10-01", "daily 2023-10-01"],
+            )
+
+            date, documents = next(daily_documents)
+            self.assertEqual(date, "2023-10-02")
+            self.assertEqual(documents[-1].text, "daily 2023-10-02")
+            self.assertEqual(
+                mock_summarize.call_args.args[1],
+                {"2023-10-02": {"general": {"thread": [{"content": "b"}]}}},
+            )
+            self.assertEqual(list(daily_documents), [])
+
+        # the guild members and roles are loaded once for all days
+        mock_directory.assert_called_once_with("1234")
+        for call in mock_summarize.call_args_list:
+            self.assertIs(call.args[3], mock_directory.return_value)
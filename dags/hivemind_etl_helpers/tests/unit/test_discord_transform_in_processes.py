@@ -0,0 +1,73 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from hivemind_etl_helpers.src.db.discord.utils.guild_directory import GuildDirectory
+from hivemind_etl_helpers.src.db.discord.utils.transform_discord_raw_messges import (
+    transform_discord_raw_messages,
+)
+
+
+class TestDiscordTransformInProcesses(unittest.TestCase):
+    def setUp(self):
+        members = [
+            {
+                "discordId": str(idx),
+                "username": f"user{idx}",
+                "globalName": None,
+                "nickname": None,
+            }
+            for idx in range(5)
+        ]
+        collections = {
+            "guildmembers": MagicMock(),
+            "roles": MagicMock(),
+        }
+        collections["guildmembers"].find.return_value = members
+        collections["roles"].find.return_value = [{"roleId": "r1", "name": "admin"}]
+
+        client = MagicMock()
+        client.__getitem__.return_value.__getitem__.side_effect = (
+            lambda name: collections[name]
+        )
+        mongo_patch = patch(
+            "hivemind_etl_helpers.src.db.discord.utils.guild_directory.MongoSingleton"
+        )
+        mongo_singleton = mongo_patch.start()
+        mongo_singleton.get_instance.return_value.client = client
+        self.addCleanup(mongo_patch.stop)
+
+        self.messages = [
+            {
+                "messageId": str(idx),
+                "author": str(idx % 5),
+                "content": f"message {idx} <@{(idx + 1) % 5}> <@&r1> https://x.com/{idx}",
+                "createdDate": datetime(2024, 1, 1, idx % 24),
+                "channelName": "general",
+                "threadName": None,
+                "user_mentions": [str((idx + 1) % 5)],
+                "role_mentions": ["r1"],
+                "replied_user": None if idx % 2 else str((idx + 2) % 5),
+                "reactions": [f"{(idx + 3) % 5},:heart:"],
+            }
+            for idx in range(23)
+        ]
+
+    def test_same_documents_as_single_process(self):
+        expected = transform_discord_raw_messages(
+            "1234", self.messages, directory=GuildDirectory("1234"), workers=1
+        )
+        documents = transform_discord_raw_messages(
+            "1234",
+            self.messages,
+            directory=GuildDirectory("1234"),
+            workers=2,
+            chunk_size=4,
+        )
+
+        self.assertEqual(len(documents), 23)
+        self.assertEqual(
+            [(doc.text, doc.metadata) for doc in documents],
+            [(doc.text, doc.metadata) for doc in expected],
+        )
+        self.assertEqual(documents[3].text, "message 3 user4 admin [URL0]")
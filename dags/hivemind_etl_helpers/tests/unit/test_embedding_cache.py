@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+from hivemind_etl_helpers.src.utils.embedding_cache import (
+    CachedEmbedding,
+    SqliteEmbeddingCache,
+    get_embedding_key,
+    get_model_name,
+)
+from llama_index.core import MockEmbedding
+from tc_hivemind_backend.embeddings.cohere import CohereEmbedding
+
+
+class CountingEmbedding(MockEmbedding):
+    embedded_texts: list[str] = []
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        self.embedded_texts.extend(texts)
+        return [[float(len(text))] * self.embed_dim for text in texts]
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._get_text_embeddings([text])[0]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "embeddings.db")
+
+    def _cached_model(self, inner: CountingEmbedding, write_batch_size: int = 100):
+        return CachedEmbedding(
+            inner,
+            SqliteEmbeddingCache(self.path),
+            model_name="test-model",
+            embed_dim=4,
+            write_batch_size=write_batch_size,
+        )
+
+    def test_embedding_key(self):
+        key = get_embedding_key("model", 4, "hello")
+        self.assertEqual(key, get_embedding_key("model", 4, "hello"))
+        self.assertNotEqual(key, get_embedding_key("model", 8, "hello"))
+        self.assertNotEqual(key, get_embedding_key("model2", 4, "hello"))
+        self.assertNotEqual(key, get_embedding_key("model", 4, "hello!"))
+
+    def test_model_name(self):
+        name = get_model_name(CohereEmbedding())
+        self.assertTrue(
+            name.startswith(
+                "tc_hivemind_backend.embeddings.cohere.CohereEmbedding:unknown:"
+            )
+        )
+        # changing with the package version defining the model
+        self.assertRegex(name, r":tc_hivemind_backend==\d+\.\d+")
+
+    def test_model_name_derived(self):
+        inner = CountingEmbedding(embed_dim=4, embedded_texts=[])
+        model = CachedEmbedding(inner, SqliteEmbeddingCache(self.path), embed_dim=4)
+        self.assertEqual(model.model_name, get_model_name(inner))
+        self.assertIn("CountingEmbedding", model.model_name)
+
+    def test_sqlite_get_set(self):
+        cache = SqliteEmbeddingCache(self.path)
+        self.assertEqual(cache.get_many(["key1"]), {})
+
+        cache.set_many({"key1": [0.5, 1.5], "key2": [2.0, 3.0]})
+        self.assertEqual(
+            cache.get_many(["key1", "key2", "key3"]),
+            {"key1": [0.5, 1.5], "key2": [2.0, 3.0]},
+        )
+
+    def test_repeated_texts_embedded_once(self):
+        inner = CountingEmbedding(embed_dim=4, embedded_texts=[])
+        model = self._cached_model(inner)
+
+        embeddings = model.get_text_embedding_batch(["a", "bb", "a"])
+        self.assertEqual(embeddings, [[1.0] * 4, [2.0] * 4, [1.0] * 4])
+        self.assertEqual(inner.embedded_texts, ["a", "bb"])
+
+        # not flushed yet, but kept within the pending embeddings
+        self.assertEqual(model.get_text_embedding("bb"), [2.0] * 4)
+        self.assertEqual(inner.embedded_texts, ["a", "bb"])
+        self.assertEqual(model.hits, 2)
+        self.assertEqual(model.misses, 2)
+        self.assertEqual(model.hit_ratio, 0.5)
+
+    def test_cache_shared_across_models(self):
+        inner = CountingEmbedding(embed_dim=4, embedded_texts=[])
+        model = self._cached_model(inner)
+        model.get_text_embedding_batch(["a", "bb"])
+        model.flush()
+
+        inner2 = CountingEmbedding(embed_dim=4, embedded_texts=[])
+        model2 = self._cached_model(inner2)
+        embeddings = model2.get_text_embedding_batch(["bb", "ccc", "a"])
+
+        self.assertEqual(embeddings, [[2.0] * 4, [3.0] * 4, [1.0] * 4])
+        self.assertEqual(inner2.embedded_texts, ["ccc"])
+        self.assertEqual(model2.hits, 2)
+
+    def test_misses_written_in_batches(self):
+        inner = CountingEmbedding(embed_dim=4, embedded_texts=[])
+        model = self._cached_model(inner, write_batch_size=2)
+        cache = SqliteEmbeddingCache(self.path)
+        key_a = get_embedding_key("test-model", 4, "a")
+        key_bb = get_embedding_key("test-model", 4, "bb")
+
+        model.get_text_embedding("a")
+        self.assertEqual(cache.get_many([key_a]), {})
+
+        model.get_text_embedding("bb")
+        self.assertEqual(
+            cache.get_many([key_a, key_bb]),
+            {key_a: [1.0] * 4, key_bb: [2.0] * 4},
+        )
@@ -0,0 +1,205 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.utils.vector_copy import PGVectorInsertWriter
+from hivemind_etl_helpers.src.utils.watermarks import (
+    Watermark,
+    reset_watermarks,
+    to_timestamp,
+)
+from llama_index.core.schema import TextNode
+
+
+class FakeCursor:
+    def __init__(self) -> None:
+        self.queries: list[tuple[str, tuple | None]] = []
+        self.rowcount = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def execute(self, query: str, params=None) -> None:
+        self.queries.append((" ".join(query.split()), params))
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.fake_cursor = FakeCursor()
+        self.committed = False
+
+    def cursor(self) -> FakeCursor:
+        return self.fake_cursor
+
+    def commit(self) -> None:
+        self.committed = True
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TestETLWatermarks(unittest.TestCase):
+    def test_to_timestamp(self):
+        self.assertEqual(
+            to_timestamp("2024-01-01T10:00:00.000Z"), datetime(2024, 1, 1, 10)
+        )
+        self.assertEqual(to_timestamp("2024-01-01"), datetime(2024, 1, 1))
+        self.assertEqual(
+            to_timestamp(datetime(2024, 1, 1, 10, tzinfo=timezone.utc)),
+            datetime(2024, 1, 1, 10),
+        )
+        self.assertEqual(to_timestamp(1704103200.0), datetime(2024, 1, 1, 10))
+        self.assertIsNone(to_timestamp(None))
+        self.assertIsNone(to_timestamp("not a date"))
+        self.assertIsNone(to_timestamp(True))
+
+    def test_get_latest(self):
+        watermark = Watermark(
+            platform="discord", table_name="discord", metadata_key="date"
+        )
+        nodes = [
+            TextNode(text="a", metadata={"date": "2024-01-02"}),
+            TextNode(text="b", metadata={"date": "2024-01-05"}),
+            TextNode(text="c", metadata={"date": None}),
+            TextNode(text="d", metadata={}),
+        ]
+        self.assertEqual(watermark.get_latest(nodes), datetime(2024, 1, 5))
+
+    def test_get_latest_no_dates(self):
+        watermark = Watermark(
+            platform="discord", table_name="discord", metadata_key="date"
+        )
+        self.assertIsNone(watermark.get_latest([TextNode(text="a", metadata={})]))
+        self.assertIsNone(watermark.get_latest([]))
+
+    def test_get_latest_null_keys(self):
+        watermark = Watermark(
+            platform="discord",
+            table_name="discord_summary",
+            metadata_key="date",
+            null_keys=["channel", "thread"],
+        )
+        nodes = [
+            TextNode(
+                text="daily",
+                metadata={"date": "2024-01-02", "channel": None, "thread": None},
+            ),
+            TextNode(
+                text="channel",
+                metadata={"date": "2024-01-03", "channel": "general", "thread": None},
+            ),
+            TextNode(
+                text="thread",
+                metadata={"date": "2024-01-03", "channel": "general", "thread": "t"},
+            ),
+        ]
+        self.assertEqual(watermark.get_latest(nodes), datetime(2024, 1, 2))
+
+    def test_set(self):
+        watermark = Watermark(
+            platform="discourse",
+            table_name="discourse",
+            metadata_key="updatedAt",
+            scope="https://forum.example.com",
+        )
+        cursor = FakeCursor()
+        watermark.set(cursor, datetime(2024, 1, 5))
+
+        # the table is created on load, not within every batch transaction
+        self.assertEqual(len(cursor.queries), 1)
+        query, params = cursor.queries[0]
+        self.assertIn("INSERT INTO etl_watermarks", query)
+        self.assertIn("GREATEST(etl_watermarks.watermark, EXCLUDED.watermark)", query)
+        self.assertEqual(
+            params,
+            (
+                "discourse",
+                "discourse",
+                "https://forum.example.com",
+                datetime(2024, 1, 5),
+            ),
+        )
+
+    def test_insert_writer_sets_watermark(self):
+        watermark = Watermark(
+            platform="discord", table_name="discord", metadata_key="date"
+        )
+        writer = PGVectorInsertWriter.__new__(PGVectorInsertWriter)
+        writer.watermark = watermark
+
+        written: list[list] = []
+        writer._write_rows = lambda cursor, nodes: written.append(nodes)
+
+        writer.connection = FakeConnection()
+        nodes = [
+            TextNode(id_="n1", text="a", metadata={"date": "2024-01-02"}),
+            TextNode(id_="n2", text="b", metadata={"date": "2024-01-03"}),
+        ]
+        ids = writer.add(nodes)
+
+        self.assertEqual(ids, ["n1", "n2"])
+        self.assertEqual(written, [nodes])
+        self.assertTrue(writer.connection.committed)
+        _, params = writer.connection.fake_cursor.queries[-1]
+        self.assertEqual(params[-1], datetime(2024, 1, 3))
+
+    def test_load_creates_table(self):
+        watermark = Watermark(
+            platform="discord", table_name="discord", metadata_key="date"
+        )
+        connection = FakeConnection()
+        with patch.object(watermark, "_fetch", return_value=None), patch(
+            "hivemind_etl_helpers.src.utils.watermarks.setup_db",
+            return_value=datetime(2024, 1, 3),
+        ), patch(
+            "hivemind_etl_helpers.src.utils.watermarks._connect",
+            return_value=connection,
+        ):
+            from_date = watermark.load("1234", "community_1234", "SELECT 1;")
+
+        self.assertEqual(from_date, datetime(2024, 1, 3))
+        queries = connection.fake_cursor.queries
+        self.assertTrue(queries[0][0].startswith("CREATE TABLE IF NOT EXISTS"))
+        self.assertIn("INSERT INTO etl_watermarks", queries[1][0])
+        self.assertTrue(connection.committed)
+
+    def test_load_saved_watermark(self):
+        watermark = Watermark(
+            platform="discord", table_name="discord", metadata_key="date"
+        )
+        with patch.object(
+            watermark, "_fetch", return_value=datetime(2024, 1, 5)
+        ), patch("hivemind_etl_helpers.src.utils.watermarks.setup_db") as setup_db:
+            from_date = watermark.load("1234", "community_1234", "SELECT 1;")
+
+        self.assertEqual(from_date, datetime(2024, 1, 5))
+        setup_db.assert_not_called()
+
+    def test_reset_watermarks(self):
+        connection = FakeConnection()
+        with patch(
+            "hivemind_etl_helpers.src.utils.watermarks._connect",
+            return_value=connection,
+        ):
+            deleted_count = reset_watermarks(
+                "community_1234", "discourse", table_name="discourse_summary"
+            )
+
+        self.assertEqual(deleted_count, 1)
+        self.assertEqual(
+            connection.fake_cursor.queries,
+            [
+                (
+                    "DELETE FROM etl_watermarks "
+                    "WHERE platform = %s AND table_name = %s;",
+                    ("discourse", "discourse_summary"),
+                )
+            ],
+        )
+        self.assertTrue(connection.committed)
@@ -121,6 +121,16 @@ class TestPrepareDeletion(unittest.TestCase):
         """
         self.assertEqual(deletion_query.strip(), expected_query.strip())
 
+    def test_create_deletion_query_promoted_columns(self):
+        prepare_deletion = PrepareDeletion("test_community", promoted=True)
+        deletion_query = prepare_deletion._create_deletion_query(["1", "2"])
+
+        expected_query = """
+            DELETE FROM data_github
+            WHERE metadata_id IN ('1', '2');
+        """
+        self.assertEqual(deletion_query.strip(), expected_query.strip())
+
     @patch("hivemind_etl_helpers.src.utils.check_documents.fetch_files_date_field")
     def test_check_documents_one_doc_one_updated(self, mock_fetch_files_date_field):
         mock_fetch_files_date_field.return_value = {
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.utils.rate_limiter import (
+    LLMRateLimitEventHandler,
+    RateLimiter,
+    register_llm_rate_limiter,
+)
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.events.llm import LLMChatStartEvent
+from llama_index.core.llms import ChatMessage, MockLLM
+
+
+class TestLLMRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+        def sleep(seconds: float):
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+        time_patch = patch("hivemind_etl_helpers.src.utils.rate_limiter.time")
+        mock_time = time_patch.start()
+        mock_time.monotonic.side_effect = lambda: self.now
+        mock_time.sleep.side_effect = sleep
+        self.addCleanup(time_patch.stop)
+
+    def test_no_limits(self):
+        limiter = RateLimiter()
+        for _ in range(100):
+            limiter.acquire(tokens=1000)
+        self.assertEqual(self.sleeps, [])
+
+    def test_requests_limit(self):
+        limiter = RateLimiter(requests_per_period=2, period=60)
+        limiter.acquire()
+        self.now = 10
+        limiter.acquire()
+        limiter.acquire()
+
+        # waiting for the first request to leave the window
+        self.assertEqual(self.sleeps, [50])
+
+    def test_tokens_limit(self):
+        limiter = RateLimiter(tokens_per_period=100, period=60)
+        limiter.acquire(tokens=80)
+        limiter.acquire(tokens=20)
+        self.assertEqual(self.sleeps, [])
+
+        limiter.acquire(tokens=10)
+        self.assertEqual(self.sleeps, [60])
+
+    def test_request_larger_than_tokens_limit(self):
+        limiter = RateLimiter(tokens_per_period=100, period=60)
+        # allowed as there's no other request within the window
+        limiter.acquire(tokens=500)
+        self.assertEqual(self.sleeps, [])
+
+
+class TestLLMRateLimitEventHandler(unittest.TestCase):
+    def setUp(self):
+        register_llm_rate_limiter()
+
+        limiter_patch = patch(
+            "hivemind_etl_helpers.src.utils.rate_limiter.get_llm_rate_limiter"
+        )
+        self.get_llm_rate_limiter = limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+
+    def test_registered_once(self):
+        register_llm_rate_limiter()
+        handlers = [
+            handler
+            for handler in get_dispatcher().event_handlers
+            if isinstance(handler, LLMRateLimitEventHandler)
+        ]
+        self.assertEqual(len(handlers), 1)
+
+    def test_acquired_per_completion_call(self):
+        llm = MockLLM()
+        llm.complete("a" * 400)
+        llm.complete("b" * 40)
+
+        acquire = self.get_llm_rate_limiter.return_value.acquire
+        self.assertEqual(acquire.call_count, 2)
+        self.assertEqual(acquire.call_args_list[0].args, (100,))
+        self.assertEqual(acquire.call_args_list[1].args, (10,))
+
+    def test_acquired_per_chat_call(self):
+        event = LLMChatStartEvent(
+            messages=[ChatMessage(role="user", content="a" * 80)],
+            additional_kwargs={},
+            model_dict={},
+        )
+        LLMRateLimitEventHandler().handle(event)
+
+        acquire = self.get_llm_rate_limiter.return_value.acquire
+        acquire.assert_called_once_with(20)
@@ -0,0 +1,88 @@
+import unittest
+
+from hivemind_etl_helpers.src.utils.metadata_columns import (
+    CAST_FUNCTION_QUERIES,
+    _migrate_table,
+    get_metadata_column,
+    get_promoted_column,
+)
+
+
+class FakeCursor:
+    def __init__(self, columns: list[str]) -> None:
+        self.columns = columns
+        self.queries: list[str] = []
+
+    def execute(self, query: str, params=None) -> None:
+        self.queries.append(" ".join(query.split()))
+
+    def fetchall(self) -> list[tuple[str]]:
+        return [(column,) for column in self.columns]
+
+
+class TestMetadataColumns(unittest.TestCase):
+    def test_get_promoted_column(self):
+        self.assertEqual(get_promoted_column("discourse", "postId"), "metadata_id")
+        self.assertEqual(get_promoted_column("github", "created_at"), "metadata_date")
+        self.assertIsNone(get_promoted_column("github", "merged_at"))
+        self.assertIsNone(get_promoted_column("telegram", "date"))
+
+    def test_get_metadata_column(self):
+        self.assertEqual(
+            get_metadata_column("discord", "date", promoted=True), "metadata_date"
+        )
+        self.assertEqual(
+            get_metadata_column("discord", "date", promoted=False),
+            "(metadata_->>'date')::timestamp",
+        )
+        self.assertEqual(
+            get_metadata_column("discourse", "postId", promoted=False),
+            "(metadata_->>'postId')::double precision",
+        )
+
+    def test_cast_functions_immutable(self):
+        for column_type, query in CAST_FUNCTION_QUERIES.items():
+            query = " ".join(query.split())
+            self.assertIn(f"RETURNS {column_type} LANGUAGE sql IMMUTABLE", query)
+            # not depending on the session settings or hiding the errors
+            self.assertNotIn("EXCEPTION", query)
+            self.assertNotIn(f"value::{column_type}", query.split("THEN")[0])
+
+    def test_migrate_no_table(self):
+        cursor = FakeCursor(columns=[])
+        self.assertFalse(_migrate_table(cursor, "data_discord", "discord"))
+        self.assertEqual(len(cursor.queries), 1)
+
+    def test_migrate_table(self):
+        cursor = FakeCursor(columns=["id", "text", "metadata_", "node_id", "embedding"])
+        self.assertTrue(_migrate_table(cursor, "data_discourse", "discourse"))
+
+        alter_queries = [q for q in cursor.queries if q.startswith("ALTER TABLE")]
+        self.assertEqual(len(alter_queries), 1)
+        self.assertIn(
+            "ADD COLUMN IF NOT EXISTS metadata_id double precision GENERATED ALWAYS "
+            "AS (hivemind_to_float(metadata_->>'postId')) STORED",
+            alter_queries[0],
+        )
+        self.assertIn(
+            "ADD COLUMN IF NOT EXISTS metadata_forum_endpoint text GENERATED ALWAYS "
+            "AS (metadata_->>'forum_endpoint') STORED",
+            alter_queries[0],
+        )
+        self.assertIn(
+            "CREATE INDEX IF NOT EXISTS data_discourse_forum_endpoint_updated_at_idx "
+            "ON data_discourse (metadata_forum_endpoint, metadata_updated_at);",
+            cursor.queries,
+        )
+
+    def test_migrate_migrated_table(self):
+        cursor = FakeCursor(columns=["id", "metadata_", "metadata_date"])
+        self.assertTrue(_migrate_table(cursor, "data_discord", "discord"))
+
+        self.assertFalse(any(q.startswith("ALTER TABLE") for q in cursor.queries))
+        self.assertFalse(any("FUNCTION" in q for q in cursor.queries))
+        self.assertIn(
+            "CREATE INDEX IF NOT EXISTS data_discord_date_idx "
+            "ON data_discord (metadata_date);",
+            cursor.queries,
+        )
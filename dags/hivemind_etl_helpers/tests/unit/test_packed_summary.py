@@ -0,0 +1,108 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from hivemind_etl_helpers.src.db.discord.summary.prepare_summaries import (
+    PrepareSummaries,
+)
+from hivemind_etl_helpers.src.utils.summary.packed_summary import (
+    pack_by_token_budget,
+    parse_packed_summaries,
+    prepare_packed_prompt,
+)
+from llama_index.core import Document
+from llama_index.core.llms import MockLLM
+
+
+class TestPackedSummary(unittest.TestCase):
+    def test_pack_by_token_budget(self):
+        packs = pack_by_token_budget([10, 20, 30, 100, 5, 5], token_budget=60)
+        self.assertEqual(packs, [[0, 1, 2], [3], [4, 5]])
+
+    def test_prepare_packed_prompt(self):
+        prompt = prepare_packed_prompt(
+            [[Document(text="hi"), Document(text="hello")], [Document(text="bye")]],
+            "summarize",
+        )
+        self.assertTrue(prompt.startswith("summarize\n"))
+        self.assertIn("[T1]\nhi\nhello\n", prompt)
+        self.assertIn("[T2]\nbye\n", prompt)
+
+    def test_parse_packed_summaries(self):
+        response = '```json\n{"T1": "first", "T2": ["- a", "- b"]}\n```'
+        self.assertEqual(parse_packed_summaries(response, 2), ["first", "- a\n- b"])
+
+    def test_parse_packed_summaries_invalid(self):
+        self.assertIsNone(parse_packed_summaries("no json here", 1))
+        self.assertIsNone(parse_packed_summaries('{"T1": "first"', 1))
+        # a missing label
+        self.assertIsNone(parse_packed_summaries('{"T1": "first"}', 2))
+        self.assertIsNone(parse_packed_summaries('{"T1": ""}', 1))
+
+
+class TestPrepareSummariesPacking(unittest.TestCase):
+    def setUp(self):
+        self.prepare_summaries = PrepareSummaries(llm=MockLLM())
+        self.query = "summarize"
+        self.thread_keys = [
+            ("2023-10-01", "general", "t1"),
+            ("2023-10-01", "general", "t2"),
+            ("2023-10-01", "general", "t3"),
+            ("2023-10-01", "random", "t4"),
+        ]
+        self.jobs = [
+            ([Document(text="short one")], self.query),
+            ([Document(text="short two")], self.query),
+            ([Document(text="long " * 200)], self.query),
+            ([Document(text="short four")], self.query),
+        ]
+
+    def get_summary(self, documents, query):
+        return f"single {documents[0].text[:5]}"
+
+    def test_packed_threads(self):
+        with patch.object(
+            self.prepare_summaries,
+            "_get_packed_summaries",
+            return_value=["packed one", "packed two"],
+        ) as mock_packed, patch.object(
+            self.prepare_summaries, "_get_summary", side_effect=self.get_summary
+        ) as mock_single:
+            summaries = self.prepare_summaries._get_packed_thread_summaries(
+                self.thread_keys, self.jobs, self.query, token_budget=100
+            )
+
+        # just the small threads of the same channel are packed
+        self.assertEqual(mock_packed.call_count, 1)
+        self.assertEqual(mock_single.call_count, 2)
+        self.assertEqual(
+            summaries, ["packed one", "packed two", "single long ", "single short"]
+        )
+
+    def test_packed_threads_fallback(self):
+        with patch.object(
+            self.prepare_summaries, "_get_packed_summaries", return_value=None
+        ), patch.object(
+            self.prepare_summaries, "_get_summary", side_effect=self.get_summary
+        ) as mock_single:
+            summaries = self.prepare_summaries._get_packed_thread_summaries(
+                self.thread_keys, self.jobs, self.query, token_budget=100
+            )
+
+        self.assertEqual(mock_single.call_count, 4)
+        self.assertEqual(
+            summaries,
+            ["single short", "single short", "single long ", "single short"],
+        )
+
+    def test_get_packed_summaries(self):
+        llm = MagicMock()
+        llm.complete.return_value.text = '{"T1": "summary 1", "T2": "summary 2"}'
+        self.prepare_summaries.llm = llm
+
+        with patch.dict(os.environ, {"LLM_REQUESTS_PER_MINUTE": "0"}):
+            summaries = self.prepare_summaries._get_packed_summaries(
+                [[doc for doc in job[0]] for job in self.jobs[:2]], self.query
+            )
+        self.assertEqual(summaries, ["summary 1", "summary 2"])
+        self.assertEqual(llm.complete.call_count, 1)
@@ -0,0 +1,29 @@
+import unittest
+
+from hivemind_etl_helpers.src.utils.prefetch import prefetch
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_prefetch_keeps_order(self):
+        items = list(prefetch(iter(range(10)), max_prefetch=2))
+        self.assertEqual(items, list(range(10)))
+
+    def test_prefetch_empty(self):
+        self.assertEqual(list(prefetch(iter([]))), [])
+
+    def test_prefetch_raises_producer_error(self):
+        def produce():
+            yield 1
+            raise ValueError("producer failed")
+
+        consumed = []
+        with self.assertRaises(ValueError):
+            for item in prefetch(produce()):
+                consumed.append(item)
+        self.assertEqual(consumed, [1])
+
+    def test_consumer_stopping_early(self):
+        for item in prefetch(iter(range(100)), max_prefetch=1):
+            if item == 3:
+                break
+        self.assertEqual(item, 3)
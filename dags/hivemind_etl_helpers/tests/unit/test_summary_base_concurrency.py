@@ -0,0 +1,31 @@
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.utils.summary.summary_base import SummaryBase
+from llama_index.core import Document
+from llama_index.core.llms import MockLLM
+
+
+class TestSummaryBaseConcurrency(unittest.TestCase):
+    def get_summary(self, documents: list[Document], query: str) -> str:
+        # the later jobs finish sooner
+        time.sleep(0.01 * (5 - int(documents[0].text)))
+        return f"{query} {documents[0].text}"
+
+    def test_summaries_order(self):
+        summary_base = SummaryBase(llm=MockLLM())
+        jobs = [([Document(text=str(idx))], "summary of") for idx in range(5)]
+
+        with patch.dict(os.environ, {"SUMMARY_MAX_CONCURRENCY": "4"}), patch.object(
+            summary_base, "_get_summary", side_effect=self.get_summary
+        ) as mock_get_summary:
+            summaries = summary_base._get_summaries(jobs)
+
+        self.assertEqual(mock_get_summary.call_count, 5)
+        self.assertEqual(summaries, [f"summary of {idx}" for idx in range(5)])
+
+    def test_no_jobs(self):
+        summary_base = SummaryBase(llm=MockLLM())
+        self.assertEqual(summary_base._get_summaries([]), [])
@@ -0,0 +1,42 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.utils.summary.summary_base import SummaryBase
+from llama_index.core import Document
+from llama_index.core.llms import MockLLM
+
+
+class TestSummaryExtractive(unittest.TestCase):
+    def setUp(self):
+        with patch.dict(os.environ, {"SUMMARY_EXTRACTIVE_MAX_TOKENS": "20"}):
+            self.summary_base = SummaryBase(llm=MockLLM())
+
+    def test_small_documents(self):
+        documents = [
+            Document(text="hello there"),
+            Document(text="  "),
+            Document(text="see you\ntomorrow"),
+        ]
+        with patch.object(self.summary_base, "retrieve_summary") as mock_retrieve:
+            summary = self.summary_base._get_summary(documents, "summarize")
+
+        mock_retrieve.assert_not_called()
+        self.assertEqual(summary, "- hello there\n- see you tomorrow")
+        self.assertEqual(self.summary_base.llm_calls_avoided, 1)
+
+    def test_large_documents(self):
+        documents = [Document(text="word " * 100)]
+        with patch.object(
+            self.summary_base, "retrieve_summary", return_value="llm summary"
+        ) as mock_retrieve:
+            summary = self.summary_base._get_summary(documents, "summarize")
+
+        mock_retrieve.assert_called_once()
+        self.assertEqual(summary, "llm summary")
+        self.assertEqual(self.summary_base.llm_calls_avoided, 0)
+
+    def test_disabled(self):
+        with patch.dict(os.environ, {"SUMMARY_EXTRACTIVE_MAX_TOKENS": ""}):
+            summary_base = SummaryBase(llm=MockLLM())
+        self.assertFalse(summary_base._is_extractive([Document(text="hi")]))
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.utils.summary.summary_base import SummaryBase
+from hivemind_etl_helpers.src.utils.summary.summary_memo import (
+    SqliteSummaryMemo,
+    get_summary_key,
+)
+from llama_index.core import Document, PromptTemplate
+from llama_index.core.llms import MockLLM
+from llama_index.core.response_synthesizers import get_response_synthesizer
+
+
+class TestSummaryMemo(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "memo.db")
+
+    def test_summary_key(self):
+        llm = MockLLM()
+        documents = [Document(text="hello"), Document(text="world")]
+        key = get_summary_key(documents, "summarize", llm)
+
+        self.assertEqual(key, get_summary_key(list(documents), "summarize", llm))
+        self.assertNotEqual(key, get_summary_key(documents, "summarize!", llm))
+        self.assertNotEqual(key, get_summary_key(documents[::-1], "summarize", llm))
+        self.assertNotEqual(
+            key,
+            get_summary_key([Document(text="hello world")], "summarize", llm),
+        )
+
+    def test_summary_key_llm_params(self):
+        documents = [Document(text="hello")]
+        key = get_summary_key(documents, "summarize", MockLLM(max_tokens=100))
+
+        self.assertEqual(
+            key, get_summary_key(documents, "summarize", MockLLM(max_tokens=100))
+        )
+        self.assertNotEqual(
+            key, get_summary_key(documents, "summarize", MockLLM(max_tokens=200))
+        )
+
+    def test_summary_key_prompt_template(self):
+        llm = MockLLM()
+        documents = [Document(text="hello")]
+        key = get_summary_key(documents, "summarize", llm)
+
+        default_synthesizer = get_response_synthesizer(
+            llm=llm, response_mode="tree_summarize"
+        )
+        self.assertEqual(
+            key, get_summary_key(documents, "summarize", llm, default_synthesizer)
+        )
+
+        synthesizer = get_response_synthesizer(
+            llm=llm,
+            response_mode="tree_summarize",
+            summary_template=PromptTemplate("{context_str} briefly {query_str}"),
+        )
+        self.assertNotEqual(
+            key, get_summary_key(documents, "summarize", llm, synthesizer)
+        )
+
+    def test_sqlite_get_set(self):
+        memo = SqliteSummaryMemo(self.path)
+        self.assertIsNone(memo.get("key1"))
+        memo.set("key1", "summary1")
+        self.assertEqual(memo.get("key1"), "summary1")
+
+        # persisted for the next runs
+        self.assertEqual(SqliteSummaryMemo(self.path).get("key1"), "summary1")
+
+    def test_sqlite_eviction(self):
+        memo = SqliteSummaryMemo(self.path)
+        for idx in range(3):
+            memo.set(f"key{idx}", f"summary{idx}")
+        with memo.connection:
+            memo.connection.execute(
+                "UPDATE summary_memo SET created_at = ? WHERE key = 'key0'",
+                (time.time() - 31 * 86400,),
+            )
+            memo.connection.execute(
+                "UPDATE summary_memo SET used_at = 0 WHERE key = 'key1'"
+            )
+
+        memo = SqliteSummaryMemo(self.path, max_entries=1, max_age_days=30)
+        connection = sqlite3.connect(self.path)
+        keys = [row[0] for row in connection.execute("SELECT key FROM summary_memo")]
+        connection.close()
+        self.assertEqual(keys, ["key2"])
+
+    def test_summary_base_memoized(self):
+        env = {"SUMMARY_MEMO": "sqlite", "SUMMARY_MEMO_PATH": self.path}
+        with patch.dict(os.environ, env):
+            summary_base = SummaryBase(llm=MockLLM())
+        documents = [Document(text="some discussion")]
+
+        with patch.object(
+            summary_base, "retrieve_summary", return_value="the summary"
+        ) as mock_retrieve:
+            self.assertEqual(summary_base._get_summary(documents, "q"), "the summary")
+            self.assertEqual(summary_base._get_summary(documents, "q"), "the summary")
+            self.assertEqual(mock_retrieve.call_count, 1)
+
+            summary_base._get_summary(documents, "another query")
+            self.assertEqual(mock_retrieve.call_count, 2)
@@ -0,0 +1,243 @@
+import json
+import struct
+import unittest
+
+from hivemind_etl_helpers.src.utils.vector_copy import (
+    COPY_HEADER,
+    COPY_TRAILER,
+    PGVectorCopyWriter,
+    encode_copy_rows,
+    encode_vector,
+    to_concurrent_definition,
+)
+from hivemind_etl_helpers.src.utils.vector_loader import PipelinedVectorLoader
+from llama_index.core import MockEmbedding
+from llama_index.core.schema import TextNode
+
+
+def decode_copy_rows(data: bytes) -> list[list[bytes]]:
+    """
+    decode the binary COPY data into the raw fields of each row
+    """
+    rows: list[list[bytes]] = []
+    offset = len(COPY_HEADER)
+    while True:
+        (field_count,) = struct.unpack_from("!h", data, offset)
+        offset += 2
+        if field_count == -1:
+            break
+        fields = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from("!i", data, offset)
+            offset += 4
+            fields.append(data[offset : offset + length])
+            offset += length
+        rows.append(fields)
+    assert offset == len(data)
+    return rows
+
+
+class TestVectorCopy(unittest.TestCase):
+    def setUp(self):
+        self.nodes = [
+            TextNode(
+                id_="node1",
+                text="hello",
+                metadata={"author": "user1", "date": "2024-01-01"},
+                embedding=[0.5, -1.0, 2.0],
+            ),
+            TextNode(id_="node2", text="سلام world", embedding=[1.0, 0.0, 0.25]),
+        ]
+
+    def test_encode_vector(self):
+        data = encode_vector([0.5, -1.0, 2.0])
+        self.assertEqual(struct.unpack("!hh", data[:4]), (3, 0))
+        self.assertEqual(struct.unpack("!3f", data[4:]), (0.5, -1.0, 2.0))
+
+    def test_encode_rows(self):
+        data = encode_copy_rows(self.nodes)
+        self.assertTrue(data.startswith(COPY_HEADER))
+        self.assertTrue(data.endswith(COPY_TRAILER))
+
+        rows = decode_copy_rows(data)
+        self.assertEqual(len(rows), 2)
+
+        text, metadata, node_id, embedding = rows[0]
+        self.assertEqual(text.decode("utf-8"), "hello")
+        self.assertEqual(node_id.decode("utf-8"), "node1")
+        self.assertEqual(embedding, encode_vector([0.5, -1.0, 2.0]))
+        metadata = json.loads(metadata)
+        self.assertEqual(metadata["author"], "user1")
+        self.assertEqual(metadata["date"], "2024-01-01")
+        self.assertIn("_node_content", metadata)
+
+        self.assertEqual(rows[1][0].decode("utf-8"), "سلام world")
+
+    def test_encode_rows_jsonb(self):
+        json_rows = decode_copy_rows(encode_copy_rows(self.nodes))
+        jsonb_rows = decode_copy_rows(encode_copy_rows(self.nodes, jsonb=True))
+        for json_row, jsonb_row in zip(json_rows, jsonb_rows):
+            self.assertEqual(jsonb_row[1], b"\x01" + json_row[1])
+
+    def test_loader_insert_method(self):
+        with self.assertRaises(ValueError):
+            PipelinedVectorLoader(
+                table_name="test",
+                dbname="test",
+                embed_model=MockEmbedding(embed_dim=3),
+                embed_dim=3,
+                insert_method="upsert",
+            )
+
+
+class FakeIndexesCursor:
+    def __init__(self, indexes: list[tuple[str, str]]) -> None:
+        self.indexes = indexes
+        self.queries: list[tuple[str, tuple | None]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def execute(self, query: str, params=None) -> None:
+        self.queries.append((" ".join(query.split()), params))
+
+    def fetchall(self) -> list[tuple[str, str]]:
+        return self.indexes
+
+    def fetchone(self) -> tuple | None:
+        # the deferred indexes are not available
+        return None
+
+
+class FakeAutocommitCursor:
+    def __init__(self, connection: "FakeIndexesConnection") -> None:
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def execute(self, query: str, params=None) -> None:
+        if self.connection.commits_before_autocommit is None:
+            self.connection.commits_before_autocommit = self.connection.commits
+        self.connection.autocommit_queries.append(query)
+
+
+class FakeIndexesConnection:
+    def __init__(self, cursor: FakeIndexesCursor) -> None:
+        self.fake_cursor = cursor
+        self.commits = 0
+        self.autocommit = False
+        self.commits_before_autocommit: int | None = None
+        # the queries run outside of a transaction
+        self.autocommit_queries: list[str] = []
+
+    def cursor(self) -> FakeIndexesCursor:
+        if self.autocommit:
+            return FakeAutocommitCursor(self)
+        return self.fake_cursor
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+DATE_INDEX = (
+    "data_discord_date_idx",
+    "CREATE INDEX data_discord_date_idx ON public.data_discord "
+    "USING btree (metadata_date)",
+)
+VECTOR_INDEX = (
+    "data_discord_embedding_idx",
+    "CREATE INDEX data_discord_embedding_idx ON public.data_discord "
+    "USING hnsw (embedding vector_cosine_ops)",
+)
+
+
+class TestVectorCopyDeferIndexes(unittest.TestCase):
+    def _writer(self, cursor: FakeIndexesCursor) -> PGVectorCopyWriter:
+        writer = PGVectorCopyWriter.__new__(PGVectorCopyWriter)
+        writer.table_name = "data_discord"
+        writer._deferred = False
+        writer._deferred_vector_index = False
+        writer.connection = FakeIndexesConnection(cursor)
+        return writer
+
+    def test_concurrent_definition(self):
+        self.assertEqual(
+            to_concurrent_definition(DATE_INDEX[1]),
+            "CREATE INDEX CONCURRENTLY data_discord_date_idx ON public.data_discord "
+            "USING btree (metadata_date)",
+        )
+        self.assertEqual(
+            to_concurrent_definition("CREATE UNIQUE INDEX idx ON public.t (a)"),
+            "CREATE UNIQUE INDEX CONCURRENTLY idx ON public.t (a)",
+        )
+
+    def test_definitions_saved_before_drop(self):
+        cursor = FakeIndexesCursor(indexes=[DATE_INDEX, VECTOR_INDEX])
+        writer = self._writer(cursor)
+
+        writer.defer_indexes()
+        writer.defer_indexes()
+
+        queries = [query for query, _ in cursor.queries]
+        # the constraints of just this table are excluded
+        self.assertTrue(any("c.conrelid = format(" in query for query in queries))
+        # both indexes are saved, so a stopped load would restore the vector index
+        saved = [
+            params[1]
+            for query, params in cursor.queries
+            if query.startswith("INSERT INTO vector_deferred_indexes")
+        ]
+        self.assertEqual(saved, ["data_discord_date_idx", "data_discord_embedding_idx"])
+        # the saving transaction is committed before the first drop
+        self.assertGreaterEqual(writer.connection.commits_before_autocommit, 1)
+
+        # dropped concurrently outside of the saving transaction, just once
+        self.assertEqual(
+            writer.connection.autocommit_queries,
+            [
+                'DROP INDEX CONCURRENTLY IF EXISTS "data_discord_date_idx";',
+                'DROP INDEX CONCURRENTLY IF EXISTS "data_discord_embedding_idx";',
+            ],
+        )
+        self.assertFalse(any(query.startswith("DROP") for query in queries))
+        self.assertFalse(writer.connection.autocommit)
+        self.assertTrue(writer._deferred_vector_index)
+
+    def test_restore_indexes_concurrently(self):
+        cursor = FakeIndexesCursor(indexes=[DATE_INDEX, VECTOR_INDEX])
+        writer = self._writer(cursor)
+
+        writer._restore_indexes(include_vector_index=False)
+
+        self.assertEqual(
+            writer.connection.autocommit_queries,
+            [
+                'DROP INDEX CONCURRENTLY IF EXISTS "data_discord_date_idx";',
+                to_concurrent_definition(DATE_INDEX[1]),
+            ],
+        )
+        forgotten = [
+            params
+            for query, params in cursor.queries
+            if query.startswith("DELETE FROM vector_deferred_indexes")
+        ]
+        # the vector index is kept saved until it is built sized to the table
+        self.assertEqual(forgotten, [("data_discord", "data_discord_date_idx")])
+
+    def test_restore_stopped_load_vector_index(self):
+        cursor = FakeIndexesCursor(indexes=[VECTOR_INDEX])
+        writer = self._writer(cursor)
+
+        writer._restore_indexes(include_vector_index=True)
+
+        self.assertIn(
+            to_concurrent_definition(VECTOR_INDEX[1]),
+            writer.connection.autocommit_queries,
+        )
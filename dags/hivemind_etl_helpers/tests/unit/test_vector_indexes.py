@@ -0,0 +1,140 @@
+import json
+import unittest
+
+from hivemind_etl_helpers.src.utils.vector_indexes import (
+    _manage_index,
+    get_vector_index_params,
+)
+
+
+class FakeCursor:
+    def __init__(self, row_count: int | None, index: tuple | None) -> None:
+        self.row_count = row_count
+        self.index = index
+        self.queries: list[str] = []
+
+    def execute(self, query: str, params=None) -> None:
+        self.queries.append(" ".join(query.split()))
+
+    def fetchone(self):
+        query = self.queries[-1]
+        if "reltuples" in query:
+            return (self.row_count,) if self.row_count is not None else None
+        elif "indisvalid" in query:
+            return self.index
+        elif "pg_relation_size" in query:
+            return (1024,)
+        raise ValueError(f"Unexpected query: {query}")
+
+
+def index_comment(method: str, params: dict, rows: int) -> str:
+    return json.dumps({"method": method, "params": params, "rows": rows})
+
+
+class TestVectorIndexes(unittest.TestCase):
+    def test_hnsw_params(self):
+        self.assertEqual(
+            get_vector_index_params("hnsw", 50_000), {"m": 16, "ef_construction": 64}
+        )
+        self.assertEqual(
+            get_vector_index_params("hnsw", 2_000_000),
+            {"m": 24, "ef_construction": 96},
+        )
+
+    def test_ivfflat_params(self):
+        self.assertEqual(get_vector_index_params("ivfflat", 500), {"lists": 1})
+        self.assertEqual(get_vector_index_params("ivfflat", 50_000), {"lists": 50})
+        self.assertEqual(get_vector_index_params("ivfflat", 4_000_000), {"lists": 2000})
+
+    def test_not_supported_method(self):
+        with self.assertRaises(ValueError):
+            get_vector_index_params("flat", 1000)
+
+    def test_no_table(self):
+        cursor = FakeCursor(row_count=None, index=None)
+        self.assertIsNone(_manage_index(cursor, "discord", "hnsw", rebuild=False))
+
+    def test_small_table(self):
+        cursor = FakeCursor(row_count=100, index=None)
+        self.assertIsNone(_manage_index(cursor, "discord", "hnsw", rebuild=False))
+        self.assertFalse(any("CREATE INDEX" in q for q in cursor.queries))
+
+    def test_create_index(self):
+        cursor = FakeCursor(row_count=50_000, index=None)
+        report = _manage_index(cursor, "discord", "hnsw", rebuild=False)
+
+        self.assertEqual(report["action"], "created")
+        self.assertEqual(report["index"], "data_discord_embedding_idx")
+        self.assertEqual(report["rows"], 50_000)
+        self.assertEqual(report["size"], 1024)
+        self.assertIsNotNone(report["build_seconds"])
+        self.assertIn(
+            "CREATE INDEX CONCURRENTLY data_discord_embedding_idx ON data_discord "
+            "USING hnsw (embedding vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64);",
+            cursor.queries,
+        )
+        self.assertIn(
+            "COMMENT ON INDEX data_discord_embedding_idx IS %s;", cursor.queries
+        )
+
+    def test_unchanged_index(self):
+        comment = index_comment("ivfflat", {"lists": 50}, 50_000)
+        cursor = FakeCursor(row_count=60_000, index=(True, comment))
+        report = _manage_index(cursor, "discourse", "ivfflat", rebuild=False)
+
+        self.assertEqual(report["action"], "unchanged")
+        self.assertEqual(report["params"], {"lists": 50})
+        self.assertIsNone(report["build_seconds"])
+        self.assertFalse(any("INDEX CONCURRENTLY" in q for q in cursor.queries))
+
+    def test_rebuild_grown_ivfflat(self):
+        comment = index_comment("ivfflat", {"lists": 50}, 50_000)
+        cursor = FakeCursor(row_count=200_000, index=(True, comment))
+        report = _manage_index(cursor, "github", "ivfflat", rebuild=False)
+
+        self.assertEqual(report["action"], "rebuilt")
+        self.assertEqual(report["params"], {"lists": 200})
+        creation = [q for q in cursor.queries if q.startswith("CREATE INDEX")]
+        self.assertEqual(
+            creation,
+            [
+                "CREATE INDEX CONCURRENTLY data_github_embedding_idx_new "
+                "ON data_github USING ivfflat (embedding vector_cosine_ops) "
+                "WITH (lists = 200);"
+            ],
+        )
+        self.assertIn(
+            "ALTER INDEX data_github_embedding_idx_new "
+            "RENAME TO data_github_embedding_idx;",
+            cursor.queries,
+        )
+
+    def test_reindex_grown_hnsw(self):
+        comment = index_comment("hnsw", {"m": 16, "ef_construction": 64}, 50_000)
+        cursor = FakeCursor(row_count=120_000, index=(True, comment))
+        report = _manage_index(cursor, "discord", "hnsw", rebuild=False)
+
+        self.assertEqual(report["action"], "reindexed")
+        self.assertIn(
+            "REINDEX INDEX CONCURRENTLY data_discord_embedding_idx;", cursor.queries
+        )
+        self.assertFalse(any(q.startswith("CREATE INDEX") for q in cursor.queries))
+
+    def test_rebuild_analyzes_table(self):
+        comment = index_comment("hnsw", {"m": 16, "ef_construction": 64}, 50_000)
+        cursor = FakeCursor(row_count=50_000, index=(True, comment))
+        report = _manage_index(cursor, "discord", "hnsw", rebuild=True)
+
+        self.assertEqual(report["action"], "reindexed")
+        self.assertIn("ANALYZE data_discord;", cursor.queries)
+
+    def test_invalid_index_dropped(self):
+        cursor = FakeCursor(row_count=50_000, index=(False, None))
+        report = _manage_index(cursor, "gdrive", "hnsw", rebuild=False)
+
+        self.assertEqual(report["action"], "created")
+        self.assertIn(
+            "DROP INDEX CONCURRENTLY IF EXISTS data_gdrive_embedding_idx;",
+            cursor.queries,
+        )
@@ -0,0 +1,176 @@
+import random
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from hivemind_etl_helpers.src.utils.vector_loader import PipelinedVectorLoader
+from llama_index.core import Document, MockEmbedding
+from llama_index.core.node_parser import SentenceSplitter
+
+
+class SlowEmbedding(MockEmbedding):
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        # finishing the batches out of order
+        time.sleep(random.uniform(0, 0.02))
+        return [[float(text.split("-")[1])] * self.embed_dim for text in texts]
+
+
+class FakeVectorStore:
+    def __init__(self, fail_at: int | None = None) -> None:
+        self.batches: list[list] = []
+        self.threads: set[str] = set()
+        self.fail_at = fail_at
+        self.closed = False
+        self.deferred = False
+
+    def add(self, nodes: list) -> list[str]:
+        self.threads.add(threading.current_thread().name)
+        if self.fail_at is not None and len(self.batches) == self.fail_at:
+            raise ConnectionError("insert failed")
+        self.batches.append(nodes)
+        return [node.node_id for node in nodes]
+
+    def defer_indexes(self) -> None:
+        self.deferred = True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class TestPipelinedVectorLoader(unittest.TestCase):
+    def setUp(self):
+        self.documents = [Document(text=f"text-{idx}") for idx in range(53)]
+        self.node_parser = SentenceSplitter(chunk_size=256)
+
+        patcher = patch(
+            "hivemind_etl_helpers.src.utils.vector_loader.manage_vector_index"
+        )
+        self.manage_vector_index = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _loader(self, **kwargs) -> PipelinedVectorLoader:
+        return PipelinedVectorLoader(
+            table_name="test",
+            dbname="test",
+            embed_model=SlowEmbedding(embed_dim=2),
+            batch_size=5,
+            embed_dim=2,
+            **kwargs,
+        )
+
+    def test_batches_inserted_in_order(self):
+        vector_store = FakeVectorStore()
+        loader = self._loader(max_inflight=4, max_pending_inserts=2)
+        with patch.object(loader, "_get_vector_store", return_value=vector_store):
+            loader.save_documents("1234", self.documents, node_parser=self.node_parser)
+            self.assertFalse(vector_store.closed)
+            loader.close()
+
+        self.assertEqual([len(batch) for batch in vector_store.batches], [5] * 10 + [3])
+        nodes = [node for batch in vector_store.batches for node in batch]
+        self.assertEqual(
+            [node.text for node in nodes], [d.text for d in self.documents]
+        )
+        self.assertEqual(
+            [node.embedding for node in nodes],
+            [[float(idx)] * 2 for idx in range(53)],
+        )
+        # inserted within one thread, other than the caller
+        self.assertEqual(len(vector_store.threads), 1)
+        self.assertNotIn(threading.current_thread().name, vector_store.threads)
+        self.assertTrue(vector_store.closed)
+        self.manage_vector_index.assert_called_once_with(
+            dbname="test", table_name="test", embed_dim=2
+        )
+
+    def test_no_documents(self):
+        vector_store = FakeVectorStore()
+        loader = self._loader()
+        with patch.object(loader, "_get_vector_store", return_value=vector_store):
+            loader.save_documents("1234", [], node_parser=self.node_parser)
+
+        self.assertEqual(vector_store.batches, [])
+
+    def test_insert_error_raised(self):
+        vector_store = FakeVectorStore(fail_at=2)
+        loader = self._loader(max_inflight=2, max_pending_inserts=1)
+        with patch.object(loader, "_get_vector_store", return_value=vector_store):
+            with self.assertRaises(ConnectionError):
+                loader.save_documents(
+                    "1234", self.documents, node_parser=self.node_parser
+                )
+
+        self.assertEqual(len(vector_store.batches), 2)
+
+    def test_deletion_before_insert(self):
+        vector_store = FakeVectorStore()
+        loader = self._loader()
+        with patch.object(loader, "_get_vector_store", return_value=vector_store):
+            with patch(
+                "hivemind_etl_helpers.src.utils.vector_loader.delete_data"
+            ) as delete_data:
+                loader.save_documents(
+                    "1234",
+                    self.documents[:3],
+                    node_parser=self.node_parser,
+                    deletion_query="DELETE FROM data_test;",
+                )
+
+        delete_data.assert_called_once_with(
+            deletion_query="DELETE FROM data_test;", dbname="test"
+        )
+        self.assertEqual(len(vector_store.batches), 1)
+
+    def test_connection_kept_between_calls(self):
+        loader = self._loader()
+        with patch.object(
+            loader, "_get_vector_store", side_effect=[FakeVectorStore()]
+        ) as get_vector_store:
+            for idx in range(0, 50, 10):
+                loader.save_documents(
+                    "1234", self.documents[idx : idx + 10], node_parser=self.node_parser
+                )
+            vector_store = loader._vector_store
+            loader.close()
+
+        get_vector_store.assert_called_once()
+        self.assertEqual(len(vector_store.batches), 10)
+        self.assertTrue(vector_store.closed)
+        self.manage_vector_index.assert_called_once()
+
+    def test_defer_indexes_counted_across_calls(self):
+        vector_store = FakeVectorStore()
+        loader = self._loader(insert_method="copy", defer_index_min_documents=25)
+        with patch.object(loader, "_get_vector_store", return_value=vector_store):
+            loader.save_documents(
+                "1234", self.documents[:20], node_parser=self.node_parser
+            )
+            self.assertFalse(vector_store.deferred)
+
+            loader.save_documents(
+                "1234", self.documents[20:40], node_parser=self.node_parser
+            )
+            self.assertTrue(vector_store.deferred)
+            loader.close()
+
+        self.assertTrue(vector_store.closed)
+
+    def test_rate_limited_per_embedding_request(self):
+        vector_store = FakeVectorStore()
+        loader = self._loader()
+        loader.embed_model = SlowEmbedding(embed_dim=2, embed_batch_size=2)
+        with patch.object(
+            loader, "_get_vector_store", return_value=vector_store
+        ), patch(
+            "hivemind_etl_helpers.src.utils.vector_loader.get_embedding_rate_limiter"
+        ) as get_limiter:
+            loader.save_documents("1234", self.documents, node_parser=self.node_parser)
+
+        # 10 batches of 5 nodes in 3 requests and a batch of 3 nodes in 2 requests
+        self.assertEqual(get_limiter.return_value.acquire.call_count, 32)
+        nodes = [node for batch in vector_store.batches for node in batch]
+        self.assertEqual(
+            [node.embedding for node in nodes],
+            [[float(idx)] * 2 for idx in range(53)],
+        )